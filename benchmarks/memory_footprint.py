@@ -0,0 +1,68 @@
+"""
+Memory footprint per location of Weather objects holding their response, compared with Observation records.
+
+    python -m benchmarks.memory_footprint [locations]
+
+Builds the given number of objects (default 5000) and prints the bytes allocated per location, measured with
+tracemalloc. The numbers depend on the Python version and the attributes of Weather, compare them on one machine.
+"""
+import copy
+import gc
+import json
+import sys
+import tracemalloc
+
+from weathermap import Observation, Weather
+
+WEATHER_RESPONSE = json.loads("""{
+    "coord": {"lon": -82.4584, "lat": 27.9478},
+    "weather": [{"id": 803, "main": "Clouds", "description": "broken clouds", "icon": "04d"}],
+    "base": "stations",
+    "main": {"temp": 301.52, "feels_like": 305.13, "temp_min": 300.37, "temp_max": 302.59, "pressure": 1014,
+             "humidity": 73},
+    "visibility": 10000,
+    "wind": {"speed": 4.63, "deg": 250},
+    "clouds": {"all": 75},
+    "dt": 1697558400,
+    "sys": {"type": 2, "id": 2016681, "country": "US", "sunrise": 1697541650, "sunset": 1697583260},
+    "timezone": -14400,
+    "id": 4174757,
+    "name": "Tampa",
+    "cod": 200
+}""")
+
+
+def measure(build, count):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = [build(index) for index in range(count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del kept
+    return size / count
+
+
+def weather_object(index):
+    weather = Weather(apikey="benchmark", city=f"City{index}", cache_system=False)
+    weather.data = copy.deepcopy(WEATHER_RESPONSE)
+    return weather
+
+
+def observation(index):
+    # Each location decodes its own response, as it would from the API.
+    return Observation.from_response(json.loads(json.dumps(WEATHER_RESPONSE)))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    before = measure(weather_object, count)
+    after = measure(observation, count)
+    print(f"{count} locations")
+    print(f"Weather with response: {before:8.0f} bytes per location")
+    print(f"Observation:           {after:8.0f} bytes per location ({before / after:.1f}x smaller)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+import asyncio
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import requests
+
+from weathermap import AsyncWeather, CircuitBreaker, CircuitOpenError, Weather
+from weathermap import asyncweather
+from weathermap.cachebackend import CacheBackend
+from weathermap.memorycache import MemoryCache
+
+WEATHER_PAYLOAD = {"cod": 200, "name": "Tampa", "main": {"temp": 80.0}}
+
+
+class FakeResponse:
+
+    def __init__(self, payload, delay=0):
+        self.payload = payload
+        self.delay = delay
+        self.status = 200
+        self.headers = {}
+
+    async def __aenter__(self):
+        await asyncio.sleep(self.delay)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+    async def json(self, content_type="application/json"):
+        return self.payload
+
+
+class FakeClientSession:
+
+    def __init__(self, payload, delay=0):
+        self.payload = payload
+        self.delay = delay
+        self.urls = []
+
+    def get(self, url, timeout=None):
+        self.urls.append(url)
+        return FakeResponse(self.payload, self.delay)
+
+
+class FakeClientError(Exception):
+    pass
+
+
+class FailingClientSession:
+
+    def __init__(self, error):
+        self.error = error
+        self.urls = []
+
+    def get(self, url, timeout=None):
+        self.urls.append(url)
+        raise self.error
+
+
+def fake_aiohttp():
+    return mock.Mock(ClientTimeout=mock.Mock(), ClientError=FakeClientError)
+
+
+class TestAsyncWeather(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_directory)
+        self.addCleanup(CacheBackend._backends.clear)
+        self.addCleanup(MemoryCache._tiers.clear)
+
+    def test_aiohttp_request_shares_cache_with_weather(self):
+        client_session = FakeClientSession(WEATHER_PAYLOAD)
+
+        async def fetch():
+            weather = await AsyncWeather.create(apikey="test", city="Tampa", state="FL", country="US",
+                                                units="Standard", cache_directory=self.cache_directory,
+                                                aiohttp_session=client_session)
+            first = await weather.get_current_weather()
+            second = await weather.get_current_weather()
+            return first, second
+
+        with mock.patch.object(asyncweather, "aiohttp", fake_aiohttp()):
+            first, second = asyncio.run(fetch())
+        self.assertEqual(first, WEATHER_PAYLOAD)
+        self.assertEqual(second, WEATHER_PAYLOAD)
+        self.assertEqual(len(client_session.urls), 1)
+
+        session = mock.Mock()
+        weather = Weather(apikey="test", city="Tampa", state="FL", country="US", units="Standard",
+                          cache_directory=self.cache_directory, session=session)
+        self.assertEqual(weather.get_current_weather(), WEATHER_PAYLOAD)
+        session.get.assert_not_called()
+
+    def test_concurrent_requests_of_one_object_keep_their_request_type(self):
+        forecast_payload = {"cod": "200", "list": []}
+
+        class RoutingSession(FakeClientSession):
+            def get(self, url, timeout=None):
+                self.urls.append(url)
+                if "/forecast?" in url:
+                    return FakeResponse(forecast_payload, 0.05)
+                return FakeResponse(WEATHER_PAYLOAD, 0.01)
+
+        client_session = RoutingSession(None)
+
+        async def fetch():
+            weather = AsyncWeather(apikey="test", city="Tampa", state="FL", country="US", units="Standard",
+                                   cache_system=False, aiohttp_session=client_session)
+            return await asyncio.gather(weather.get_forecast(), weather.get_current_weather())
+
+        with mock.patch.object(asyncweather, "aiohttp", fake_aiohttp()):
+            forecast, current = asyncio.run(fetch())
+        self.assertEqual(forecast, forecast_payload)
+        self.assertEqual(current, WEATHER_PAYLOAD)
+
+    def test_identical_requests_are_coalesced(self):
+        client_session = FakeClientSession(WEATHER_PAYLOAD, delay=0.05)
+
+        async def fetch():
+            weathers = [AsyncWeather(apikey="test", city="Tampa", state="FL", country="US", units="Standard",
+                                     cache_directory=self.cache_directory, aiohttp_session=client_session)
+                        for _ in range(5)]
+            return await asyncio.gather(*(weather.get_current_weather() for weather in weathers))
+
+        with mock.patch.object(asyncweather, "aiohttp", fake_aiohttp()):
+            results = asyncio.run(fetch())
+        self.assertEqual(results, [WEATHER_PAYLOAD] * 5)
+        self.assertEqual(len(client_session.urls), 1)
+        self.assertEqual(asyncweather._async_in_flight.in_flight(), 0)
+
+    def test_aiohttp_errors_are_raised_as_requests_exceptions(self):
+        async def fetch(error):
+            weather = AsyncWeather(apikey="test", city="Tampa", state="FL", country="US", cache_system=False,
+                                   max_retries=0, aiohttp_session=FailingClientSession(error))
+            return await weather.get_current_weather()
+
+        with mock.patch.object(asyncweather, "aiohttp", fake_aiohttp()):
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                asyncio.run(fetch(FakeClientError("connection reset")))
+            with self.assertRaises(requests.exceptions.Timeout):
+                asyncio.run(fetch(asyncio.TimeoutError()))
+
+    def test_server_errors_are_retried(self):
+        class FlakySession(FakeClientSession):
+            def get(self, url, timeout=None):
+                response = super().get(url, timeout)
+                if len(self.urls) == 1:
+                    response.status = 503
+                return response
+
+        client_session = FlakySession(WEATHER_PAYLOAD)
+        breaker = CircuitBreaker(failure_threshold=1)
+
+        async def fetch():
+            weather = AsyncWeather(apikey="test", city="Tampa", state="FL", country="US", units="Standard",
+                                   cache_system=False, retry_backoff=0.01, circuit_breaker=breaker,
+                                   aiohttp_session=client_session)
+            return await weather.get_current_weather()
+
+        with mock.patch.object(asyncweather, "aiohttp", fake_aiohttp()):
+            self.assertEqual(asyncio.run(fetch()), WEATHER_PAYLOAD)
+        self.assertEqual(len(client_session.urls), 2)
+        self.assertEqual(breaker.state, "closed")
+
+    def test_open_circuit_serves_cache(self):
+        Weather(apikey="test", city="Tampa", state="FL", country="US", units="Standard", weather_timeout="1S",
+                cache_directory=self.cache_directory,
+                session=mock.Mock(**{"get.return_value.json.return_value": WEATHER_PAYLOAD})).get_current_weather()
+        breaker = CircuitBreaker(failure_threshold=1)
+        breaker.record_failure()
+        client_session = FakeClientSession(WEATHER_PAYLOAD)
+
+        async def fetch(**kwargs):
+            weather = AsyncWeather(apikey="test", country="US", units="Standard", weather_timeout="1S",
+                                   circuit_breaker=breaker, cache_directory=self.cache_directory,
+                                   aiohttp_session=client_session, **kwargs)
+            return await weather.get_current_weather(), weather.freshness
+
+        with mock.patch("time.time", return_value=time.time() + 60):
+            with mock.patch.object(asyncweather, "aiohttp", fake_aiohttp()):
+                data, freshness = asyncio.run(fetch(city="Tampa", state="FL"))
+                self.assertEqual(data, WEATHER_PAYLOAD)
+                self.assertTrue(freshness["stale"])
+                with self.assertRaises(CircuitOpenError):
+                    asyncio.run(fetch(city="Miami", state="FL"))
+        self.assertEqual(client_session.urls, [])
+
+    def test_executor_fallback_without_aiohttp(self):
+        session = mock.Mock()
+        session.get.return_value.json.return_value = {"cod": "404", "message": "city not found"}
+
+        async def fetch():
+            weather = AsyncWeather(apikey="test", city="Nowhere", cache_system=False, session=session)
+            return await weather.get_forecast()
+
+        with mock.patch.object(asyncweather, "aiohttp", None):
+            with self.assertRaises(ValueError):
+                asyncio.run(fetch())
+        self.assertIn("/forecast?q=Nowhere&", session.get.call_args.args[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
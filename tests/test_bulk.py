@@ -0,0 +1,111 @@
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from weathermap import Weather, fetch_many
+from weathermap.cachebackend import CacheBackend
+from weathermap.memorycache import MemoryCache
+from weathermap.metrics import REGISTRY
+
+
+class FakeSession:
+
+    def __init__(self):
+        self.urls = []
+        self.lock = threading.Lock()
+
+    def get(self, url, timeout=None):
+        with self.lock:
+            self.urls.append(url)
+        response = mock.Mock()
+        if "Nowhere" in url:
+            response.json.return_value = {"cod": "404", "message": "city not found"}
+        else:
+            response.json.return_value = {"cod": 200, "url": url}
+        return response
+
+
+class TestFetchMany(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_directory)
+        self.addCleanup(CacheBackend._backends.clear)
+        self.addCleanup(MemoryCache._tiers.clear)
+        self.session = FakeSession()
+
+    def fetch(self, locations, **kwargs):
+        return list(fetch_many(locations, apikey="test", cache_directory=self.cache_directory,
+                               session=self.session, **kwargs))
+
+    def test_hits_duplicates_and_errors(self):
+        Weather(apikey="test", city="Tampa", country="US", cache_directory=self.cache_directory,
+                session=self.session).get_current_weather()
+        self.session.urls.clear()
+
+        locations = [
+            {"city": "Tampa", "country": "US"},
+            {"city": "tampa", "country": "us"},
+            "Miami",
+            "Miami",
+            {"lat": 41.4, "lon": -23.4},
+            "Nowhere",
+            {"country": "US"},
+        ]
+        results = self.fetch(locations, max_workers=4)
+
+        self.assertEqual(len(results), len(locations))
+        self.assertEqual(sorted(url.split("?")[1].split("&")[0] for url in self.session.urls),
+                         ["lat=41.405", "q=Miami", "q=Nowhere"])
+
+        by_location = {}
+        for result in results:
+            by_location.setdefault(str(result.location), []).append(result)
+        self.assertTrue(all(result.cached for result in by_location[str(locations[0])]))
+        self.assertTrue(by_location[str(locations[1])][0].cached)
+        self.assertEqual(len(by_location["Miami"]), 2)
+        self.assertIsNone(by_location["Miami"][0].error)
+        self.assertIsInstance(by_location["Nowhere"][0].error, ValueError)
+        self.assertIsInstance(by_location[str(locations[6])][0].error, ValueError)
+
+    def test_req_types(self):
+        results = self.fetch(["Tampa"], req_types=("weather", "forecast"))
+        self.assertEqual(sorted(result.req_type for result in results), ["forecast", "weather"])
+        self.assertEqual(len(self.session.urls), 2)
+
+    def test_misses_are_looked_up_once(self):
+        REGISTRY.clear()
+        self.addCleanup(REGISTRY.clear)
+        results = self.fetch(["Tampa", "Miami"])
+        self.assertEqual([result.error for result in results], [None, None])
+        self.assertEqual(len(self.session.urls), 2)
+        self.assertEqual(REGISTRY.get("weathermap_cache_misses_total").value(req_type="weather"), 2)
+        self.assertEqual(REGISTRY.get("weathermap_cache_lookup_seconds").count(req_type="weather"), 2)
+
+    def test_any_error_is_reported_per_item(self):
+        class BrokenSession(FakeSession):
+            def get(self, url, timeout=None):
+                if "Broken" in url:
+                    raise KeyError("main")
+                return super().get(url, timeout)
+
+        self.session = BrokenSession()
+        results = self.fetch(["Broken", "Miami"], max_workers=2)
+        errors = {result.location: result.error for result in results}
+        self.assertIsInstance(errors["Broken"], KeyError)
+        self.assertIsNone(errors["Miami"])
+
+    def test_one_weather_per_location(self):
+        with mock.patch("weathermap.bulk.Weather", wraps=Weather) as weather_class:
+            results = self.fetch(["Tampa", "Miami"], req_types=("weather", "forecast", "air_pollution"))
+        self.assertEqual(weather_class.call_count, 2)
+        self.assertEqual(len(results), 6)
+        self.assertEqual(sorted(url.split("?")[0].rsplit("/", 1)[1] for url in self.session.urls),
+                         ["forecast", "forecast", "weather", "weather"])
+        self.assertEqual(sum(isinstance(result.error, AttributeError) for result in results), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,467 @@
+import gc
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from weathermap import Weather, WeatherCache
+from weathermap.cachebackend import CacheBackend, CacheManifest, FileCacheBackend, SQLiteCacheBackend
+from weathermap.janitor import CacheJanitor
+from weathermap.memorycache import MemoryCache
+
+
+def fake_response(payload):
+    response = mock.Mock()
+    response.json.return_value = payload
+    return response
+
+
+WEATHER_PAYLOAD = {"cod": 200, "name": "Tampa", "main": {"temp": 80.0}}
+WEATHER_TIMEOUT = {"req_type": "weather", "weather_timeout": {"seconds": 0, "minutes": 0, "hours": 1, "days": 0}}
+
+
+class TestCacheManifest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_directory = tempfile.mkdtemp()
+        CacheBackend._backends.clear()
+        MemoryCache._tiers.clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_directory)
+        CacheBackend._backends.clear()
+        MemoryCache._tiers.clear()
+
+    def make_weather(self, **kwargs):
+        return Weather(apikey="test", city="Tampa", state="FL", country="US", units="Standard",
+                       cache_directory=self.cache_directory, session=self.session, **kwargs)
+
+    def test_miss_then_hit_uses_manifest(self):
+        self.session = mock.Mock()
+        self.session.get.return_value = fake_response(WEATHER_PAYLOAD)
+        self.make_weather().get_current_weather()
+        self.make_weather().get_current_weather()
+        self.assertEqual(self.session.get.call_count, 1)
+
+        manifest = FileCacheBackend.for_directory(self.cache_directory).manifest
+        entry = manifest.get("TAMPAFLUS_wea_standard")
+        self.assertEqual(entry["path"], "TAMPAFLUS_wea_standard.json")
+        self.assertEqual(entry["req_type"], "weather")
+
+        with mock.patch("os.listdir") as listdir:
+            self.assertEqual(self.make_weather().get_current_weather(), WEATHER_PAYLOAD)
+        listdir.assert_not_called()
+
+    def test_entries_without_units_are_not_read(self):
+        # Entries of earlier versions were cached in the units of the request, without units in their key.
+        cache = WeatherCache(cache_system=True, cache_cleaning=True, cache_directory=self.cache_directory)
+        cache._create_cache(data={"cod": 200, "name": "Tampa", "main": {"temp": 80.0}}, timeout=WEATHER_TIMEOUT,
+                            city="Tampa", state="FL", country="US", req_type="weather")
+        self.session = mock.Mock()
+        self.session.get.return_value = fake_response({"cod": 200, "name": "Tampa", "main": {"temp": 300.0}})
+
+        weather = Weather(apikey="test", city="Tampa", state="FL", country="US", units="Imperial",
+                          cache_directory=self.cache_directory, session=self.session)
+        self.assertEqual(weather.get_current_weather()["main"]["temp"], 80.33)
+        self.assertEqual(self.session.get.call_count, 1)
+        self.assertEqual(weather._fallback_response(weather._begin_request())["main"]["temp"], 80.33)
+
+    def test_manifest_is_reloaded_from_journal(self):
+        cache = WeatherCache(cache_system=True, cache_cleaning=True, cache_directory=self.cache_directory)
+        cache._create_cache(data=WEATHER_PAYLOAD, timeout=WEATHER_TIMEOUT, city="Tampa", req_type="weather")
+
+        CacheBackend._backends.clear()
+        MemoryCache._tiers.clear()
+        cache = WeatherCache(cache_system=True, cache_cleaning=True, cache_directory=self.cache_directory)
+        self.assertEqual(cache._get_cached_weather(timeout=WEATHER_TIMEOUT, city="Tampa", req_type="weather"),
+                         WEATHER_PAYLOAD)
+
+    def test_expired_entry_is_a_miss(self):
+        cache = WeatherCache(cache_system=True, cache_cleaning=True, cache_directory=self.cache_directory)
+        cache._create_cache(data=WEATHER_PAYLOAD, timeout=WEATHER_TIMEOUT, city="Tampa", req_type="weather",
+                            date_time=datetime.now() - timedelta(hours=2))
+
+        with self.assertRaises(FileNotFoundError):
+            cache._get_cached_weather(timeout=WEATHER_TIMEOUT, city="Tampa", req_type="weather")
+        # Lookups never delete, expired entries are left to sweep().
+        self.assertIsNotNone(cache._backend.manifest.get("TAMPA_wea"))
+
+        cache.cache_timeouts = {"weather": timedelta(hours=1)}
+        self.assertEqual(cache.sweep(), ["TAMPA_wea"])
+        self.assertIsNone(cache._backend.manifest.get("TAMPA_wea"))
+        self.assertFalse(os.path.exists(os.path.join(self.cache_directory, "TAMPA_wea.json")))
+
+    def test_janitor_sweeps_in_background(self):
+        cache = WeatherCache(cache_system=True, cache_cleaning=True, cache_directory=self.cache_directory,
+                             cache_timeouts={"weather": timedelta(hours=1)}, cache_janitor_interval=0.01)
+        self.addCleanup(cache.stop_janitor)
+        cache._backend.write("OLD_wea", "OLD", "weather", "{}", time.time() - 7200)
+
+        deadline = time.time() + 5
+        while cache._backend.manifest.get("OLD_wea") is not None and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertIsNone(cache._backend.manifest.get("OLD_wea"))
+
+        janitor = CacheJanitor.running(self.cache_directory)
+        self.assertIsNotNone(janitor)
+        cache.stop_janitor()
+        self.assertFalse(janitor.is_alive())
+        self.assertIsNone(CacheJanitor.running(self.cache_directory))
+
+    def test_janitor_sweeps_with_longest_timeouts(self):
+        cache = WeatherCache(cache_system=True, cache_cleaning=True, cache_directory=self.cache_directory,
+                             cache_timeouts={"weather": timedelta(minutes=10)})
+        other = WeatherCache(cache_system=True, cache_cleaning=True, cache_directory=self.cache_directory,
+                             cache_timeouts={"weather": timedelta(hours=3)})
+        janitor = CacheJanitor.for_cache(cache, 3600)
+        self.addCleanup(janitor.stop)
+        self.assertIs(CacheJanitor.for_cache(other, 3600), janitor)
+        self.assertEqual(janitor._sweep_timeouts(list(janitor._caches)), {"weather": timedelta(hours=3)})
+
+        del other
+        gc.collect()
+        self.assertEqual(janitor._sweep_timeouts(list(janitor._caches)), {"weather": timedelta(minutes=10)})
+
+    def test_janitor_survives_sweep_errors(self):
+        cache = WeatherCache(cache_system=True, cache_cleaning=True, cache_directory=self.cache_directory)
+        calls = []
+
+        def sweep(cache_timeouts=None):
+            calls.append(cache_timeouts)
+            if len(calls) == 1:
+                raise ValueError("corrupt manifest line")
+
+        cache.sweep = sweep
+        with self.assertLogs("weathermap.janitor", level="ERROR"):
+            janitor = CacheJanitor.for_cache(cache, 0.01)
+            self.addCleanup(janitor.stop)
+            deadline = time.time() + 5
+            while janitor.sweeps < 1 and time.time() < deadline:
+                time.sleep(0.01)
+        self.assertTrue(janitor.is_alive())
+        self.assertGreaterEqual(janitor.sweeps, 1)
+        self.assertIsInstance(janitor.last_error, ValueError)
+
+    def test_janitor_stops_when_caches_are_collected(self):
+        cache = WeatherCache(cache_system=True, cache_cleaning=True, cache_directory=self.cache_directory,
+                             cache_janitor_interval=0.01)
+        janitor = CacheJanitor.running(self.cache_directory)
+        self.addCleanup(janitor.stop)
+        del cache
+        gc.collect()
+        janitor.join(5)
+        self.assertFalse(janitor.is_alive())
+        self.assertIsNone(CacheJanitor.running(self.cache_directory))
+
+    def test_entries_of_other_processes_are_merged(self):
+        backend = FileCacheBackend.for_directory(self.cache_directory)
+        backend.write("TAMPA_wea", "TAMPA", "weather", "{}", time.time())
+        # A second backend of the directory stands for another process.
+        other = FileCacheBackend(self.cache_directory)
+        other.write("MIAMI_wea", "MIAMI", "weather", '{"a": 1}', time.time())
+
+        self.assertEqual(backend.read("MIAMI_wea")[0], {"a": 1})
+        self.assertEqual(backend.total_bytes, 10)
+        other.delete("MIAMI_wea")
+        self.assertEqual(backend.delete_oldest(), "TAMPA_wea")
+        self.assertEqual(backend.total_bytes, 0)
+
+    def test_compaction_keeps_entries_of_other_processes(self):
+        backend = FileCacheBackend.for_directory(self.cache_directory)
+        other = FileCacheBackend(self.cache_directory)
+        other.write("MIAMI_wea", "MIAMI", "weather", "{}", time.time())
+        for _ in range(40):
+            backend.write("TAMPA_wea", "TAMPA", "weather", "{}", time.time())
+
+        manifest = CacheManifest(self.cache_directory)
+        self.assertEqual(sorted(manifest.entries), ["MIAMI_wea", "TAMPA_wea"])
+        for _ in range(40):
+            other.write("MIAMI_wea", "MIAMI", "weather", "{}", time.time())
+        # The journal compacted by the other process is read again.
+        self.assertEqual(backend.expire("weather", time.time() + 1), ["TAMPA_wea", "MIAMI_wea"])
+        self.assertEqual(CacheManifest(self.cache_directory).entries, {})
+
+    def test_legacy_files_are_indexed(self):
+        with open(os.path.join(self.cache_directory, "TampaFLUS_wea_2020-01-01_10-00.json"), "w") as file:
+            json.dump(WEATHER_PAYLOAD, file)
+
+        cache = WeatherCache(cache_system=True, cache_cleaning=False, cache_directory=self.cache_directory)
+        entry = cache._backend.manifest.get("TAMPAFLUS_wea")
+        self.assertEqual(entry["path"], "TampaFLUS_wea_2020-01-01_10-00.json")
+        self.assertTrue(os.path.exists(os.path.join(self.cache_directory, CacheManifest.journal_name)))
+
+
+class TestSQLiteCacheBackend(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_directory = tempfile.mkdtemp()
+        CacheBackend._backends.clear()
+        MemoryCache._tiers.clear()
+        self.cache = WeatherCache(cache_system=True, cache_cleaning=True, cache_directory=self.cache_directory,
+                                  cache_backend="sqlite", memory_cache_entries=0)
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_directory)
+        CacheBackend._backends.clear()
+        MemoryCache._tiers.clear()
+
+    def test_single_database_file(self):
+        self.cache._create_cache(data=WEATHER_PAYLOAD, timeout=WEATHER_TIMEOUT, city="Tampa", req_type="weather")
+        self.cache._create_cache(data=WEATHER_PAYLOAD, timeout=WEATHER_TIMEOUT, city="Miami", req_type="weather")
+        self.assertEqual(self.cache._get_cached_weather(timeout=WEATHER_TIMEOUT, city="Miami", req_type="weather"),
+                         WEATHER_PAYLOAD)
+        self.assertFalse([name for name in os.listdir(self.cache_directory) if name.endswith(".json")])
+        self.assertTrue(os.path.exists(os.path.join(self.cache_directory, SQLiteCacheBackend.database_name)))
+
+    def test_expiry_and_oldest_eviction(self):
+        backend = self.cache._backend
+        now = time.time()
+        backend.write("OLD_wea", "OLD", "weather", "{}", now - 7200)
+        backend.write("NEW_wea", "NEW", "weather", "{}", now)
+        backend.write("NEW_for", "NEW", "forecast", "{}", now - 7200)
+
+        self.assertIsNone(backend.read("OLD_wea", not_before=now - 3600))
+        self.assertEqual(backend.expire("weather", now - 3600), ["OLD_wea"])
+        self.assertEqual(backend.delete_oldest(), "NEW_for")
+        self.assertEqual(backend.read("NEW_wea")[0], {})
+
+    def test_expiry_time_outlives_timeout(self):
+        backend = self.cache._backend
+        now = time.time()
+        backend.write("LONG_wea", "LONG", "weather", "{}", now - 7200, now + 3600)
+        self.assertEqual(backend.expire("weather", now - 3600), [])
+        self.assertEqual(backend.read("LONG_wea")[3], now + 3600)
+
+    def test_incomplete_backend_is_not_constructed(self):
+        class ReadOnlyBackend(CacheBackend):
+            def read(self, key, not_before=0):
+                return None
+
+        with self.assertRaises(TypeError):
+            ReadOnlyBackend(self.cache_directory)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            WeatherCache(cache_system=True, cache_cleaning=True, cache_directory=self.cache_directory,
+                         cache_backend="redis")
+
+
+class TestEviction(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_directory = tempfile.mkdtemp()
+        CacheBackend._backends.clear()
+        MemoryCache._tiers.clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_directory)
+        CacheBackend._backends.clear()
+        MemoryCache._tiers.clear()
+
+    def fill(self, backend):
+        now = time.time()
+        serialized = json.dumps("x" * 98)
+        backend.write("EXPIRED_wea", "EXPIRED", "weather", serialized, now - 7200)
+        backend.write("COLD_for", "COLD", "forecast", serialized, now - 60)
+        backend.write("HOT_for", "HOT", "forecast", serialized, now - 30)
+        backend.write("NEW_for", "NEW", "forecast", serialized, now)
+        backend.touch("HOT_for")
+
+    def assert_evicts_expired_then_lru(self, cache_backend):
+        cache = WeatherCache(cache_system=True, cache_cleaning=True, cache_directory=self.cache_directory,
+                             cache_backend=cache_backend)
+        self.fill(cache._backend)
+        self.assertEqual(cache._backend.total_bytes, 400)
+
+        cache.manage_directory_size(timeout=WEATHER_TIMEOUT, threshold_size=300)
+        self.assertEqual(cache._backend.total_bytes, 100)
+        self.assertIsNotNone(cache._backend.read("HOT_for"))
+        for key in ("EXPIRED_wea", "COLD_for", "NEW_for"):
+            self.assertIsNone(cache._backend.read(key))
+
+        with self.assertRaises(ValueError):
+            cache.manage_directory_size(timeout=WEATHER_TIMEOUT, threshold_size=300)
+
+    def test_file_backend(self):
+        self.assert_evicts_expired_then_lru("file")
+
+    def test_sqlite_backend(self):
+        self.assert_evicts_expired_then_lru("sqlite")
+
+    def test_total_bytes_survive_reload(self):
+        cache = WeatherCache(cache_system=True, cache_cleaning=True, cache_directory=self.cache_directory)
+        self.fill(cache._backend)
+        cache._backend.delete("COLD_for")
+        CacheBackend._backends.clear()
+        self.assertEqual(FileCacheBackend.for_directory(self.cache_directory).total_bytes, 300)
+
+    def test_create_cache_enforces_limit(self):
+        cache = WeatherCache(cache_system=True, cache_cleaning=True, cache_directory=self.cache_directory,
+                             auto_cache_clean_for_exceed_limit=True, cache_size_limit_mb=0.0002)
+        for city in ("Tampa", "Miami", "Orlando", "Austin", "Denver"):
+            cache._create_cache(data={"cod": 200, "padding": "x" * 60}, timeout=WEATHER_TIMEOUT,
+                                city=city, req_type="weather")
+        self.assertLessEqual(cache._backend.total_bytes, 0.0002 * 1024 * 1024)
+
+
+class TestMemoryCache(unittest.TestCase):
+
+    def test_lru_eviction_by_entries(self):
+        tier = MemoryCache(max_entries=2)
+        now = time.time()
+        tier.set("a", 1, now)
+        tier.set("b", 2, now)
+        tier.get("a", 60)
+        tier.set("c", 3, now)
+        self.assertIsNone(tier.get("b", 60))
+        self.assertEqual(tier.get("a", 60), 1)
+        self.assertEqual(tier.get("c", 60), 3)
+
+    def test_byte_budget(self):
+        tier = MemoryCache(max_entries=10, max_bytes=100)
+        now = time.time()
+        tier.set("a", 1, now, size=60)
+        tier.set("b", 2, now, size=60)
+        self.assertEqual(len(tier), 1)
+        self.assertEqual(tier.current_bytes, 60)
+        self.assertIsNone(tier.get("a", 60))
+
+    def test_max_age(self):
+        tier = MemoryCache()
+        tier.set("a", 1, time.time() - 120)
+        self.assertEqual(tier.get("a", 300), 1)
+        self.assertIsNone(tier.get("a", 60))
+
+    def test_hot_entry_skips_filesystem(self):
+        cache_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_directory)
+        self.addCleanup(MemoryCache._tiers.clear)
+        self.addCleanup(CacheBackend._backends.clear)
+        cache = WeatherCache(cache_system=True, cache_cleaning=True, cache_directory=cache_directory)
+        cache._create_cache(data=WEATHER_PAYLOAD, timeout=WEATHER_TIMEOUT, city="Tampa", req_type="weather")
+
+        with mock.patch("builtins.open") as open_file:
+            data = cache._get_cached_weather(timeout=WEATHER_TIMEOUT, city="Tampa", req_type="weather")
+        open_file.assert_not_called()
+        self.assertEqual(data, WEATHER_PAYLOAD)
+
+
+class TestStaleWhileRevalidate(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_directory = tempfile.mkdtemp()
+        CacheBackend._backends.clear()
+        MemoryCache._tiers.clear()
+        self.session = mock.Mock()
+        self.session.get.return_value = fake_response({"cod": 200, "name": "Tampa", "main": {"temp": 90.0}})
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_directory)
+        CacheBackend._backends.clear()
+        MemoryCache._tiers.clear()
+
+    def make_weather(self, **kwargs):
+        return Weather(apikey="test", city="Tampa", state="FL", country="US", weather_timeout="1H",
+                       units="Standard", cache_directory=self.cache_directory, session=self.session, **kwargs)
+
+    def write_entry(self, age):
+        cache = WeatherCache(cache_system=True, cache_cleaning=True, cache_directory=self.cache_directory)
+        cache._create_cache(data=WEATHER_PAYLOAD, timeout=WEATHER_TIMEOUT, city="Tampa", state="FL", country="US",
+                            req_type="weather", units="standard", date_time=datetime.now() - age)
+
+    def wait_for_refresh(self, weather):
+        for thread in threading.enumerate():
+            if thread.name == "weathermap-revalidate":
+                thread.join(5)
+        lookup = weather._lookup_cache(timeout=WEATHER_TIMEOUT, city="Tampa", state="FL", country="US",
+                                       req_type="weather", units="standard")
+        self.assertEqual(lookup.data["main"]["temp"], 90.0)
+
+    def test_stale_entry_is_served_and_refreshed(self):
+        self.write_entry(timedelta(minutes=70))
+        weather = self.make_weather(max_stale="30M")
+        self.assertEqual(weather.get_current_weather(), WEATHER_PAYLOAD)
+        self.assertEqual(weather.freshness["source"], "cache")
+        self.assertTrue(weather.freshness["stale"])
+        self.assertGreater(weather.freshness["age"], 3600)
+
+        self.wait_for_refresh(weather)
+        self.assertEqual(self.session.get.call_count, 1)
+        weather.get_current_weather()
+        self.assertFalse(weather.freshness["stale"])
+
+    def test_entry_past_max_stale_is_fetched(self):
+        self.write_entry(timedelta(minutes=100))
+        weather = self.make_weather(max_stale="30M")
+        self.assertEqual(weather.get_current_weather()["main"]["temp"], 90.0)
+        self.assertEqual(weather.freshness["source"], "network")
+
+    def test_refresh_bypasses_cache(self):
+        self.write_entry(timedelta(minutes=1))
+        weather = self.make_weather()
+        self.assertEqual(weather.refresh(req_type="weather")["main"]["temp"], 90.0)
+        self.assertEqual(self.session.get.call_count, 1)
+
+    def test_invalid_max_stale(self):
+        with self.assertRaises(ValueError):
+            self.make_weather(max_stale="soon")
+
+
+class TestNegativeCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_directory = tempfile.mkdtemp()
+        CacheBackend._backends.clear()
+        MemoryCache._tiers.clear()
+        self.session = mock.Mock()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_directory)
+        CacheBackend._backends.clear()
+        MemoryCache._tiers.clear()
+
+    def make_weather(self, city="Nowhere", **kwargs):
+        return Weather(apikey="test", city=city, cache_directory=self.cache_directory, session=self.session,
+                       **kwargs)
+
+    def test_not_found_is_cached(self):
+        self.session.get.return_value = fake_response({"cod": "404", "message": "city not found"})
+        for _ in range(3):
+            with self.assertRaises(ValueError) as raised:
+                self.make_weather().get_current_weather()
+            self.assertEqual(raised.exception.args[0], "city not found")
+        self.assertEqual(self.session.get.call_count, 1)
+
+        with self.assertRaises(ValueError):
+            self.make_weather().get_forecast()
+        self.assertEqual(self.session.get.call_count, 2)
+
+    def test_negative_entries_never_shadow_data(self):
+        cache = WeatherCache(cache_system=True, cache_cleaning=True, cache_directory=self.cache_directory)
+        cache._create_cache(data=WEATHER_PAYLOAD, timeout=WEATHER_TIMEOUT, city="Nowhere", req_type="weather")
+        cache._create_negative_cache({"cod": "404", "message": "city not found"}, "weather?q=Nowhere")
+        self.assertEqual(cache._get_cached_weather(timeout=WEATHER_TIMEOUT, city="Nowhere", req_type="weather"),
+                         WEATHER_PAYLOAD)
+
+    def test_other_errors_are_not_cached(self):
+        self.session.get.return_value = fake_response({"cod": 401, "message": "Invalid API key"})
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                self.make_weather().get_current_weather()
+        self.assertEqual(self.session.get.call_count, 2)
+
+    def test_negative_entries_expire(self):
+        self.session.get.return_value = fake_response({"cod": "404", "message": "city not found"})
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                self.make_weather(negative_cache_timeout="0S").get_current_weather()
+        self.assertEqual(self.session.get.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import time
+import unittest
+from datetime import datetime, timezone
+from unittest import mock
+
+import numpy as np
+
+from weathermap import ForecastFrame, Weather, forecastframe
+
+# The next 3 hour step, so the forecast is in the future.
+START = (int(time.time()) // 10800 + 1) * 10800
+
+
+def forecast_item(step, temp, condition_id=800, main="Clear", **extra):
+    item = {
+        "dt": START + step * 10800,
+        "main": {"temp": temp, "feels_like": temp - 1, "temp_min": temp - 2, "temp_max": temp + 2,
+                 "humidity": 50 + step, "pressure": 1013},
+        "weather": [{"id": condition_id, "main": main, "description": main.lower()}],
+        "clouds": {"all": 10},
+        "wind": {"speed": 3.5, "deg": 180},
+        "pop": 0.1 * step,
+        "dt_txt": datetime.fromtimestamp(START + step * 10800, timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    item.update(extra)
+    return item
+
+
+FORECAST = {
+    "cod": "200",
+    "list": [
+        forecast_item(0, 70.0),
+        forecast_item(1, 72.5, wind={"speed": 5.0, "deg": 90, "gust": 9.0}),
+        forecast_item(2, 68.0, 500, "Rain", rain={"3h": 1.25}),
+        forecast_item(3, 65.0, 601, "Snow", snow={"3h": 2.0}),
+        forecast_item(4, 66.0, 803, "Clouds"),
+    ],
+    "city": {"name": "Tampa", "timezone": -18000},
+}
+
+
+class TestForecastFrame(unittest.TestCase):
+
+    def setUp(self):
+        self.frame = ForecastFrame.from_response(FORECAST)
+
+    def test_columns(self):
+        self.assertEqual(len(self.frame), 5)
+        self.assertEqual(self.frame.dt.dtype, np.int64)
+        self.assertEqual(self.frame.temp.tolist(), [70.0, 72.5, 68.0, 65.0, 66.0])
+        self.assertEqual(self.frame.condition.tolist(), ["Clear", "Clear", "Rain", "Snow", "Clouds"])
+        self.assertEqual(self.frame.rain.tolist(), [0.0, 0.0, 1.25, 0.0, 0.0])
+        self.assertTrue(np.isnan(self.frame.wind_gust[0]))
+        self.assertEqual(self.frame.wind_gust[1], 9.0)
+        self.assertEqual(self.frame.dt_txt(), [item["dt_txt"] for item in FORECAST["list"]])
+        self.assertEqual((self.frame.city, self.frame.timezone_offset), ("Tampa", -18000))
+
+    def test_slices_share_memory(self):
+        head = self.frame[:2]
+        self.assertEqual(len(head), 2)
+        self.assertTrue(np.shares_memory(head.temp, self.frame.temp))
+
+        window = self.frame.window(START + 10800, START + 4 * 10800)
+        self.assertEqual(window.temp.tolist(), [72.5, 68.0, 65.0])
+        self.assertTrue(np.shares_memory(window.dt, self.frame.dt))
+        self.assertEqual(len(self.frame.window(START + 10 ** 6)), 0)
+        start = datetime.fromtimestamp(START + 3 * 10800, timezone.utc)
+        self.assertEqual(self.frame.window(start=start).condition.tolist(), ["Snow", "Clouds"])
+
+    def test_invalid_response(self):
+        with self.assertRaises(ValueError):
+            ForecastFrame.from_response({"cod": 200, "main": {}})
+
+    def test_weather_forecast_frame(self):
+        weather = Weather(apikey="test", city="Tampa", cache_system=False)
+        weather.data = FORECAST
+        self.assertIs(weather.forecast_frame(), weather.forecast_frame())
+        self.assertEqual(weather.forecast_frame().temp.tolist(), [70.0, 72.5, 68.0, 65.0, 66.0])
+
+    def test_next_12h_without_numpy(self):
+        weather = Weather(apikey="test", city="Tampa", cache_system=False)
+        weather.data = FORECAST
+        with mock.patch.object(forecastframe, "np", None):
+            self.assertEqual(weather.next_12h_simplified()[2], (FORECAST["list"][2]["dt_txt"], 68.0, "rain"))
+            self.assertEqual(len(weather.next_12h_simplified()), 4)
+            self.assertEqual(weather.next_12h(), FORECAST["list"][:4])
+
+
+class TestForecastQueries(unittest.TestCase):
+
+    def setUp(self):
+        # 2024-01-01 00:00 UTC is 2023-12-31 19:00 in Tampa (UTC-5).
+        self.start = 1704067200
+        items = [forecast_item(step, 60.0 + step, 500 if step in (2, 3) else 800, "Rain" if step in (2, 3) else
+                               "Clear", rain={"3h": 3.0} if step in (2, 3) else None) for step in range(10)]
+        for step, item in enumerate(items):
+            item["dt"] = self.start + step * 10800
+            if item["rain"] is None:
+                del item["rain"]
+        self.frame = ForecastFrame.from_response({"list": items, "city": {"name": "Tampa", "timezone": -18000}})
+
+    def test_window_by_binary_search(self):
+        window = self.frame.window(self.start + 3600, self.start + 4 * 10800)
+        self.assertEqual(window.temp.tolist(), [61.0, 62.0, 63.0])
+        self.assertEqual(self.frame.locate(self.start - 1, self.start), slice(0, 0))
+
+    def test_hourly_resampling(self):
+        hourly = self.frame.resample()
+        self.assertEqual(len(hourly), 28)
+        self.assertTrue(np.all(np.diff(hourly.dt) == 3600))
+        self.assertEqual(hourly.temp[:4].tolist(), [60.0, 60 + 1 / 3, 60 + 2 / 3, 61.0])
+        self.assertAlmostEqual(hourly.rain.sum(), self.frame.rain.sum())
+        self.assertEqual(hourly.rain[4:7].tolist(), [1.0, 1.0, 1.0])
+        self.assertEqual(hourly.condition[7:10].tolist(), ["Rain", "Rain", "Rain"])
+        self.assertEqual(len(self.frame.window(end=self.start + 1).resample()), 1)
+
+    def test_resample_keeps_precipitation_of_first_step(self):
+        items = [forecast_item(step, 60.0, rain={"3h": 1.5 if step == 0 else 3.0}) for step in range(3)]
+        frame = ForecastFrame.from_response({"list": items, "city": {"name": "Tampa", "timezone": 0}})
+        hourly = frame.resample()
+        self.assertAlmostEqual(hourly.rain.sum(), 7.5)
+        self.assertEqual(hourly.rain.tolist(), [1.5, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0])
+
+    def test_daily_rollups_in_local_time(self):
+        daily = self.frame.daily()
+        self.assertEqual([str(day) for day in daily["date"]], ["2023-12-31", "2024-01-01"])
+        self.assertEqual(daily["steps"].tolist(), [2, 8])
+        self.assertEqual(daily["temp_min"].tolist(), [58.0, 60.0])
+        self.assertEqual(daily["temp_max"].tolist(), [63.0, 71.0])
+        self.assertEqual(daily["temp_mean"].tolist(), [60.5, 65.5])
+        self.assertEqual(daily["precipitation"].tolist(), [0.0, 6.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from weathermap import Gazetteer, Weather
+from weathermap.cachebackend import CacheBackend
+from weathermap.memorycache import MemoryCache
+
+CITY_LIST = [
+    {"id": 4174757, "name": "Tampa", "state": "FL", "country": "US", "coord": {"lon": -82.458427, "lat": 27.947599}},
+    {"id": 4180439, "name": "Atlanta", "state": "GA", "country": "US", "coord": {"lon": -84.387978, "lat": 33.749}},
+    {"id": 4180386, "name": "Athens", "state": "GA", "country": "US", "coord": {"lon": -83.377937, "lat": 33.96095}},
+    {"id": 264371, "name": "Athens", "state": "", "country": "GR", "coord": {"lon": 23.716221, "lat": 37.979449}},
+    {"id": 3117735, "name": "Málaga", "state": "", "country": "ES", "coord": {"lon": -4.42034, "lat": 36.720161}},
+]
+
+
+class TestGazetteer(unittest.TestCase):
+
+    def setUp(self):
+        self.gazetteer = Gazetteer(places=CITY_LIST, aliases={"Tampa Bay": 4174757},
+                                   zip_codes={"33602,US": 4174757})
+
+    def test_input_forms_resolve_to_one_place(self):
+        forms = [
+            {"city": "Tampa"},
+            {"city": "tampa, FL, US"},
+            {"city": "Tampa, Florida"},
+            {"city": "TAMPA", "state": "Florida", "country": "us"},
+            {"city": "Tampa Bay"},
+            {"zip_code": "33602", "country": "US"},
+        ]
+        for form in forms:
+            self.assertEqual(self.gazetteer.resolve(**form).id, 4174757, form)
+
+    def test_ambiguous_names_are_not_resolved(self):
+        self.assertIsNone(self.gazetteer.resolve(city="Athens"))
+        self.assertEqual(self.gazetteer.resolve(city="Athens, GR").id, 264371)
+        self.assertEqual(self.gazetteer.resolve(city="Athens", state="GA").id, 4180386)
+        self.assertIsNone(self.gazetteer.resolve(city="Nowhere"))
+
+    def test_accents_are_ignored(self):
+        self.assertEqual(self.gazetteer.resolve(city="Malaga, ES").id, 3117735)
+
+    def test_load_city_list(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.addCleanup(Gazetteer._loaded.clear)
+        path = os.path.join(directory, "city.list.json.gz")
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump(CITY_LIST, f)
+        gazetteer = Gazetteer.load(path)
+        self.assertEqual(len(gazetteer), len(CITY_LIST))
+        self.assertIs(Gazetteer.load(path), gazetteer)
+
+
+class TestCanonicalCacheKey(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_directory)
+        self.addCleanup(CacheBackend._backends.clear)
+        self.addCleanup(MemoryCache._tiers.clear)
+        self.session = mock.Mock()
+        self.session.get.return_value.json.return_value = {"cod": 200, "name": "Tampa"}
+        self.gazetteer = Gazetteer(places=CITY_LIST, zip_codes={"33602,US": 4174757})
+
+    def make_weather(self, **kwargs):
+        return Weather(apikey="test", cache_directory=self.cache_directory, session=self.session,
+                       gazetteer=self.gazetteer, **kwargs)
+
+    def test_input_forms_share_one_entry(self):
+        self.make_weather(city="Tampa").get_current_weather()
+        self.make_weather(city="tampa, FL, US").get_current_weather()
+        self.make_weather(zip_code="33602", country="US").get_current_weather()
+        self.assertEqual(self.session.get.call_count, 1)
+        self.assertIn("weather?id=4174757&", self.session.get.call_args[0][0])
+
+    def test_unknown_city_keeps_raw_key(self):
+        weather = self.make_weather(city="Athens")
+        self.assertIsNone(weather.place)
+        weather.get_current_weather()
+        self.assertIn("weather?q=Athens&", self.session.get.call_args[0][0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from weathermap import Weather
+from weathermap.cachebackend import CacheBackend
+from weathermap.geogrid import CoordinateGrid, geohash_decode, geohash_encode
+from weathermap.memorycache import MemoryCache
+
+
+class TestCoordinateGrid(unittest.TestCase):
+
+    def test_points_of_a_cell_share_its_key(self):
+        grid = CoordinateGrid(cell_degrees=0.05)
+        first, second = grid.cell(27.95101, -82.45702), grid.cell(27.95109, -82.45708)
+        self.assertEqual(first, second)
+        self.assertEqual((first.lat, first.lon), (27.975, -82.475))
+        self.assertNotEqual(grid.cell(27.95, 82.45).key, first.key)
+
+    def test_geohash(self):
+        self.assertEqual(geohash_encode(57.64911, 10.40744, 11), "u4pruydqqvj")
+        lat, lon = geohash_decode("u4pruydqqvj")
+        self.assertAlmostEqual(lat, 57.64911, places=4)
+        self.assertAlmostEqual(lon, 10.40744, places=4)
+        grid = CoordinateGrid(geohash_precision=5)
+        self.assertEqual(grid.cell(27.95, -82.46).key, "GH-dhvr5")
+
+    def test_points_on_cell_boundaries(self):
+        grid = CoordinateGrid(cell_degrees=0.01)
+        self.assertEqual(grid.cell(0.29, -0.57).key, "GRID0.01:N29:W57")
+        self.assertEqual(grid.cell(0.29, -0.57).lat, 0.295)
+
+    def test_invalid_coordinates(self):
+        with self.assertRaises(ValueError):
+            CoordinateGrid().cell(91, 0)
+
+
+class TestCoordinateCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_directory)
+        self.addCleanup(CacheBackend._backends.clear)
+        self.addCleanup(MemoryCache._tiers.clear)
+        self.session = mock.Mock()
+        self.session.get.return_value.json.return_value = {"cod": 200, "name": "Tampa"}
+
+    def make_weather(self, **kwargs):
+        return Weather(apikey="test", cache_directory=self.cache_directory, session=self.session, **kwargs)
+
+    def test_nearby_points_share_one_request(self):
+        self.make_weather(lat=27.950011, lon=-82.457021, cache_grid=0.05).get_current_weather()
+        self.make_weather(lat=27.950019, lon=-82.457029, cache_grid=0.05).get_current_weather()
+        self.assertEqual(self.session.get.call_count, 1)
+        self.assertIn("lat=27.975&lon=-82.475", self.session.get.call_args[0][0])
+
+    def test_geohash_cells(self):
+        self.make_weather(lat=27.9501, lon=-82.4570, cache_geohash_precision=5).get_current_weather()
+        self.make_weather(lat=27.9601, lon=-82.4670, cache_geohash_precision=5).get_current_weather()
+        self.assertEqual(self.session.get.call_count, 1)
+
+    def test_zip_code_is_cached(self):
+        self.make_weather(zip_code="33601", country="US").get_current_weather()
+        self.make_weather(zip_code="33601", country="US").get_current_weather()
+        self.assertEqual(self.session.get.call_count, 1)
+
+    def test_air_pollution_by_coordinates_is_cached(self):
+        self.make_weather(lat=27.95, lon=-82.45, req_type="air_pollution").api_request()
+        self.make_weather(lat=27.95, lon=-82.45, req_type="air_pollution").api_request()
+        self.assertEqual(self.session.get.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from weathermap import LocationTrack, Weather
+from weathermap import locationtrack, create_session
+from weathermap.cachebackend import CacheBackend
+from weathermap.memorycache import MemoryCache
+
+IPINFO_PAYLOAD = {"city": "Tampa ", "region": "Florida", "country": "US", "loc": "27.9,-82.4",
+                  "postal": "33601", "timezone": "America/New_York"}
+
+
+class IPInfoSession:
+
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.calls = 0
+
+    def get(self, url, timeout=None):
+        self.calls += 1
+        time.sleep(self.delay)
+        response = mock.Mock()
+        response.json.return_value = dict(IPINFO_PAYLOAD)
+        return response
+
+
+class TestLocationMemo(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_directory = tempfile.mkdtemp()
+        self.location_path = os.path.join(self.cache_directory, "location.json")
+        self.session = IPInfoSession()
+        locationtrack._resolved_locations.clear()
+        self.addCleanup(shutil.rmtree, self.cache_directory)
+        self.addCleanup(locationtrack._resolved_locations.clear)
+        self.addCleanup(CacheBackend._backends.clear)
+        self.addCleanup(MemoryCache._tiers.clear)
+
+    def make_location(self, **kwargs):
+        return LocationTrack(session=self.session, location_cache_path=self.location_path, **kwargs)
+
+    def test_one_lookup_per_process(self):
+        self.assertEqual(self.make_location().city, "Tampa ")
+        self.assertEqual(self.make_location().zip_code, "33601")
+        self.assertEqual(self.session.calls, 1)
+
+    def test_location_is_saved_for_other_processes(self):
+        self.make_location()
+        locationtrack._resolved_locations.clear()
+        self.assertEqual(self.make_location().timezone, "America/New_York")
+        self.assertEqual(self.session.calls, 1)
+        with open(self.location_path) as f:
+            self.assertEqual(json.load(f)["location"]["country"], "US")
+
+    def test_expired_location_is_looked_up(self):
+        self.make_location()
+        self.make_location(location_ttl=0)
+        self.assertEqual(self.session.calls, 2)
+
+    def test_refresh_location(self):
+        location = self.make_location()
+        self.assertEqual(location.refresh_location()["city"], "Tampa ")
+        self.assertEqual(self.session.calls, 2)
+
+    def test_concurrent_lookups_are_coalesced(self):
+        self.session.delay = 0.2
+        threads = [threading.Thread(target=self.make_location) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.session.calls, 1)
+
+    def test_weather_reuses_the_lookup(self):
+        for _ in range(3):
+            weather = Weather(apikey="test", session=self.session, cache_directory=self.cache_directory)
+        self.assertEqual(weather.city, "Tampa")
+        self.assertEqual(self.session.calls, 1)
+        self.assertTrue(os.path.exists(self.location_path))
+
+
+class StubHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        delay, _, city = self.path.strip("/").partition("/")
+        time.sleep(float(delay))
+        body = json.dumps(dict(IPINFO_PAYLOAD, city=city)).encode()
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except OSError:
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestProviderRace(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        locationtrack._resolved_locations.clear()
+        locationtrack._provider_stats.clear()
+        self.addCleanup(locationtrack._resolved_locations.clear)
+        self.addCleanup(locationtrack._provider_stats.clear)
+
+    def make_location(self, providers, **kwargs):
+        return LocationTrack(session=create_session(), location_cache_path=None, location_providers=providers,
+                             **kwargs)
+
+    def test_fastest_provider_wins(self):
+        slow, fast = f"{self.base_url}/1.5/Slow", f"{self.base_url}/0/Fast"
+        started = time.perf_counter()
+        location = self.make_location((slow, fast), location_resolution="race")
+        self.assertLess(time.perf_counter() - started, 1.0)
+        self.assertEqual(location.city, "Fast")
+        stats = LocationTrack.provider_stats()
+        self.assertEqual(stats[fast]["successes"], 1)
+        self.assertLess(stats[fast]["last_latency"], 1.0)
+
+    def test_deadline(self):
+        slow = f"{self.base_url}/1.5/Slow"
+        started = time.perf_counter()
+        location = self.make_location((slow,), location_resolution="race", location_deadline=0.2)
+        self.assertLess(time.perf_counter() - started, 1.0)
+        self.assertIsNone(location.city)
+
+    def test_sequential_falls_back(self):
+        location = self.make_location(("http://127.0.0.1:1/", f"{self.base_url}/0/Fallback"))
+        self.assertEqual(location.city, "Fallback")
+        self.assertEqual(LocationTrack.provider_stats()["http://127.0.0.1:1/"]["failures"], 1)
+
+    def test_invalid_resolution(self):
+        with self.assertRaises(ValueError):
+            self.make_location(("ipinfo",), location_resolution="parallel")
+
+
+if __name__ == '__main__':
+    unittest.main()
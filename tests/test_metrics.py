@@ -0,0 +1,96 @@
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import requests
+
+from weathermap import MetricsRegistry, Weather
+from weathermap.cachebackend import CacheBackend
+from weathermap.memorycache import MemoryCache
+from weathermap.metrics import REGISTRY, start_http_server
+
+WEATHER_RESPONSE = {"dt": 1697558400, "main": {"temp": 301.15}, "name": "Tampa", "cod": 200}
+
+
+class TestMetricsRegistry(unittest.TestCase):
+
+    def test_render(self):
+        registry = MetricsRegistry()
+        hits = registry.counter("hits_total", "Hits.", ["req_type"])
+        latency = registry.histogram("latency_seconds", "Latency.", ["req_type"], buckets=(0.1, 1))
+        registry.gauge("size_bytes", "Size.", ["directory"], callback=lambda: {("cache",): 42})
+        hits.inc(req_type="weather")
+        hits.inc(2, req_type="weather")
+        latency.observe(0.05, req_type="weather")
+        latency.observe(0.5, req_type="weather")
+
+        text = registry.render()
+        self.assertIn("# TYPE hits_total counter\nhits_total{req_type=\"weather\"} 3\n", text)
+        self.assertIn('latency_seconds_bucket{req_type="weather",le="0.1"} 1\n', text)
+        self.assertIn('latency_seconds_bucket{req_type="weather",le="1.0"} 2\n', text)
+        self.assertIn('latency_seconds_bucket{req_type="weather",le="+Inf"} 2\n', text)
+        self.assertIn('latency_seconds_count{req_type="weather"} 2\n', text)
+        self.assertIn('size_bytes{directory="cache"} 42\n', text)
+
+    def test_labels_are_checked(self):
+        hits = MetricsRegistry().counter("hits_total", "Hits.", ["req_type"])
+        with self.assertRaises(ValueError):
+            hits.inc(city="Tampa")
+
+    def test_http_endpoint(self):
+        registry = MetricsRegistry()
+        registry.counter("hits_total", "Hits.").inc()
+        server = start_http_server(0, registry=registry)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        response = requests.get(f"http://127.0.0.1:{server.server_address[1]}/metrics", timeout=5)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("hits_total 1", response.text)
+
+
+class TestWeatherMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_directory)
+        self.addCleanup(CacheBackend._backends.clear)
+        self.addCleanup(MemoryCache._tiers.clear)
+        REGISTRY.clear()
+        self.addCleanup(REGISTRY.clear)
+
+    def test_request_metrics(self):
+        session = mock.Mock()
+        session.get.return_value.status_code = 200
+        session.get.return_value.json.return_value = WEATHER_RESPONSE
+        weather = Weather(apikey="test", city="Tampa", country="US", session=session, rate_limiter=None,
+                          circuit_breaker=None, cache_directory=self.cache_directory)
+        weather.get_current_weather()
+        weather.get_current_weather()
+
+        self.assertEqual(REGISTRY.get("weathermap_cache_misses_total").value(req_type="weather"), 1)
+        self.assertEqual(REGISTRY.get("weathermap_cache_hits_total").value(req_type="weather"), 1)
+        self.assertEqual(REGISTRY.get("weathermap_cache_writes_total").value(req_type="weather"), 1)
+        self.assertEqual(REGISTRY.get("weathermap_upstream_requests_total").value(req_type="weather", status=200), 1)
+        self.assertEqual(REGISTRY.get("weathermap_http_request_seconds").count(req_type="weather"), 1)
+        self.assertEqual(REGISTRY.get("weathermap_response_parse_seconds").count(req_type="weather"), 1)
+        # One lookup per request, the miss is not looked up again before the API request.
+        self.assertEqual(REGISTRY.get("weathermap_cache_lookup_seconds").count(req_type="weather"), 2)
+        self.assertGreater(REGISTRY.get("weathermap_cache_bytes").value(directory=self.cache_directory), 0)
+
+        weather.sweep()
+        self.assertIn('weathermap_cache_evictions_total{reason="expired"} 0', REGISTRY.render())
+
+    def test_file_lock_checks_cache_again(self):
+        session = mock.Mock()
+        session.get.return_value.status_code = 200
+        session.get.return_value.json.return_value = WEATHER_RESPONSE
+        weather = Weather(apikey="test", city="Tampa", country="US", session=session, rate_limiter=None,
+                          circuit_breaker=None, cache_directory=self.cache_directory, cache_file_lock=True)
+        weather.get_current_weather()
+        # Another process may fill the cache while the lock is awaited.
+        self.assertEqual(REGISTRY.get("weathermap_cache_lookup_seconds").count(req_type="weather"), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
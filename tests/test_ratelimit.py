@@ -0,0 +1,100 @@
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from weathermap import RateLimiter, Weather, set_default_limiter
+from weathermap.cachebackend import CacheBackend
+from weathermap.memorycache import MemoryCache
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_burst_then_refill(self):
+        limiter = RateLimiter(rate=20, per=1, burst=2)
+        self.assertTrue(limiter.acquire())
+        self.assertTrue(limiter.acquire())
+        self.assertFalse(limiter.acquire(timeout=0.01))
+
+        start = time.monotonic()
+        self.assertTrue(limiter.acquire(timeout=1))
+        self.assertGreater(time.monotonic() - start, 0.02)
+        stats = limiter.stats()
+        self.assertEqual((stats["admitted"], stats["queue_depth"]), (3, 0))
+        self.assertGreater(stats["wait_time_max"], 0.02)
+
+    def test_interactive_before_background(self):
+        limiter = RateLimiter(rate=2, per=1, burst=1)
+        limiter.acquire()
+        order = []
+
+        def acquire(priority):
+            limiter.acquire(priority)
+            order.append(priority)
+
+        threads = [threading.Thread(target=acquire, args=("background",))]
+        threads[0].start()
+        while limiter.stats()["queue_depth"] < 1:
+            time.sleep(0.001)
+        threads.append(threading.Thread(target=acquire, args=("interactive",)))
+        threads[1].start()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(order, ["interactive", "background"])
+
+    def test_penalize_pauses_calls(self):
+        limiter = RateLimiter(rate=100, per=1, burst=10)
+        limiter.penalize(retry_after=0.1)
+        self.assertFalse(limiter.acquire(timeout=0.05))
+        self.assertTrue(limiter.acquire(timeout=1))
+        self.assertEqual(limiter.stats()["throttled"], 1)
+
+    def test_exponential_backoff(self):
+        limiter = RateLimiter(base_backoff=1, max_backoff=3)
+        for _ in range(3):
+            limiter.penalize()
+        self.assertEqual(limiter._backoff, 3)
+        limiter.record_success()
+        self.assertEqual(limiter._backoff, 0)
+
+    def test_default_limiter_is_opt_in(self):
+        self.addCleanup(set_default_limiter, None)
+        self.assertIsNone(Weather(apikey="test", city="Tampa", cache_system=False).rate_limiter)
+
+        limiter = RateLimiter()
+        set_default_limiter(limiter)
+        self.assertIs(Weather(apikey="test", city="Tampa", cache_system=False).rate_limiter, limiter)
+        self.assertIsNone(Weather(apikey="test", city="Tampa", cache_system=False, rate_limiter=None).rate_limiter)
+
+    def test_invalid_priority(self):
+        with self.assertRaises(ValueError):
+            RateLimiter().acquire("urgent")
+
+
+class TestWeatherRateLimit(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_directory)
+        self.addCleanup(CacheBackend._backends.clear)
+        self.addCleanup(MemoryCache._tiers.clear)
+
+    def test_429_penalizes_limiter(self):
+        limiter = RateLimiter(rate=100, per=1)
+        session = mock.Mock()
+        session.get.return_value.status_code = 429
+        session.get.return_value.headers = {"Retry-After": "30"}
+        session.get.return_value.json.return_value = {"cod": 429, "message": "Too many requests"}
+        weather = Weather(apikey="test", city="Tampa", country="US", session=session, rate_limiter=limiter,
+                          cache_directory=self.cache_directory)
+        with self.assertRaises(ValueError):
+            weather.get_current_weather()
+        stats = limiter.stats()
+        self.assertEqual((stats["admitted"], stats["throttled"]), (1, 1))
+        self.assertGreater(stats["backoff"], 29)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from weathermap import ForecastPoint, Observation, WeatherClient
+from weathermap.cachebackend import CacheBackend
+from weathermap.memorycache import MemoryCache
+
+WEATHER_RESPONSE = {
+    "coord": {"lon": -82.4584, "lat": 27.9478},
+    "weather": [{"id": 803, "main": "Clouds", "description": "broken clouds", "icon": "04d"}],
+    "main": {"temp": 301.15, "feels_like": 305.13, "temp_min": 300.37, "temp_max": 302.59, "pressure": 1014,
+             "humidity": 73},
+    "visibility": 10000,
+    "wind": {"speed": 4.63, "deg": 250},
+    "clouds": {"all": 75},
+    "dt": 1697558400,
+    "sys": {"country": "US", "sunrise": 1697541650, "sunset": 1697583260},
+    "timezone": -14400,
+    "id": 4174757,
+    "name": "Tampa",
+    "cod": 200,
+}
+FORECAST_RESPONSE = {
+    "cod": "200",
+    "list": [{"dt": 1697565600, "main": {"temp": 300.15, "humidity": 70}, "wind": {"speed": 3.0},
+              "weather": [{"id": 500, "main": "Rain", "description": "light rain"}], "pop": 0.4,
+              "rain": {"3h": 0.5}}],
+}
+
+
+class TestRecords(unittest.TestCase):
+
+    def test_observation(self):
+        observation = Observation.from_response(WEATHER_RESPONSE)
+        self.assertEqual((observation.name, observation.country, observation.temp), ("Tampa", "US", 301.15))
+        self.assertEqual((observation.condition, observation.wind_gust, observation.units),
+                         ("Clouds", None, "standard"))
+        self.assertIs(observation.temp, WEATHER_RESPONSE["main"]["temp"])
+        self.assertFalse(hasattr(observation, "__dict__"))
+        with self.assertRaises(AttributeError):
+            observation.temp = 0
+
+    def test_forecast_points(self):
+        points = ForecastPoint.from_response(FORECAST_RESPONSE)
+        self.assertEqual(len(points), 1)
+        self.assertEqual((points[0].temp, points[0].rain, points[0].description), (300.15, 0.5, "light rain"))
+        self.assertFalse(hasattr(points[0], "__dict__"))
+
+
+class TestWeatherClient(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_directory)
+        self.addCleanup(CacheBackend._backends.clear)
+        self.addCleanup(MemoryCache._tiers.clear)
+        self.session = mock.Mock()
+
+    def test_current_and_forecast(self):
+        client = WeatherClient(apikey="test", units="Metric", cache_directory=self.cache_directory,
+                               session=self.session)
+        self.assertFalse(hasattr(client, "__dict__"))
+
+        self.session.get.return_value.json.return_value = WEATHER_RESPONSE
+        observation = client.current(city="Tampa", country="US")
+        self.assertEqual((observation.temp, observation.units), (28.0, "metric"))
+        self.assertEqual(client.current(city="Tampa", country="US"), observation)
+        self.assertEqual(self.session.get.call_count, 1)
+
+        self.session.get.return_value.json.return_value = FORECAST_RESPONSE
+        self.assertEqual(client.forecast(lat=27.95, lon=-82.46)[0].temp, 27.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,167 @@
+import json
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from weathermap import (CircuitBreaker, CircuitOpenError, DeadlineExceededError, RateLimiter, Weather, create_session,
+                        set_default_breaker)
+from weathermap.cachebackend import CacheBackend
+from weathermap.memorycache import MemoryCache
+from weathermap.resilience import LatencyTracker, backoff_delay
+
+WEATHER_PAYLOAD = {"coord": {"lon": -82.46, "lat": 27.95}, "main": {"temp": 301.15}, "name": "Tampa", "cod": 200}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # (delay, status) of the next responses, the last one is repeated.
+    script = [(0, 200)]
+    requests = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with self.lock:
+            type(self).requests += 1
+            delay, status = self.script.pop(0) if len(self.script) > 1 else self.script[0]
+        time.sleep(delay)
+        payload = WEATHER_PAYLOAD if status == 200 else {"cod": status, "message": "Internal error"}
+        body = json.dumps(payload).encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except OSError:
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestResilience(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.cache_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_directory)
+        self.addCleanup(CacheBackend._backends.clear)
+        self.addCleanup(MemoryCache._tiers.clear)
+        StubHandler.requests = 0
+        self.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+
+    def serve(self, *script):
+        StubHandler.script = list(script)
+
+    def make_weather(self, **kwargs):
+        options = dict(apikey="test", city="Tampa", country="US", base_url=self.base_url, session=create_session(),
+                       cache_directory=self.cache_directory, rate_limiter=None, circuit_breaker=self.breaker,
+                       retry_backoff=0.01)
+        options.update(kwargs)
+        return Weather(**options)
+
+    def test_retries_server_errors(self):
+        self.serve((0, 503), (0, 502), (0, 200))
+        self.assertEqual(self.make_weather().get_current_weather()["name"], "Tampa")
+        self.assertEqual(StubHandler.requests, 3)
+        self.assertEqual(self.breaker.state, "closed")
+
+    def test_retries_exhausted(self):
+        self.serve((0, 503))
+        with self.assertRaises(requests.exceptions.HTTPError):
+            self.make_weather(max_retries=1).get_current_weather()
+        self.assertEqual(StubHandler.requests, 2)
+
+    def test_deadline(self):
+        self.serve((1, 200))
+        start = time.monotonic()
+        with self.assertRaises(requests.exceptions.Timeout):
+            self.make_weather(request_deadline=0.2, max_retries=3).get_current_weather()
+        self.assertLess(time.monotonic() - start, 0.9)
+
+    def test_hedged_request(self):
+        self.serve((1.5, 200), (0, 200))
+        start = time.monotonic()
+        self.assertEqual(self.make_weather(hedge_after=0.1).get_current_weather()["name"], "Tampa")
+        self.assertLess(time.monotonic() - start, 1.2)
+        self.assertEqual(StubHandler.requests, 2)
+
+    def test_circuit_open_serves_cache(self):
+        self.serve((0, 200))
+        self.make_weather(weather_timeout="1S").get_current_weather()
+        time.sleep(1.1)
+
+        self.serve((0, 503))
+        weather = self.make_weather(weather_timeout="1S", max_retries=0)
+        self.assertEqual(weather.get_current_weather()["name"], "Tampa")
+        self.assertTrue(weather.freshness["stale"])
+        self.assertEqual(self.breaker.state, "open")
+
+        # While the circuit is open the API is not requested.
+        self.assertEqual(weather.get_current_weather()["name"], "Tampa")
+        self.assertEqual(StubHandler.requests, 2)
+        with self.assertRaises(CircuitOpenError):
+            self.make_weather(city="Miami").get_current_weather()
+
+    def test_rate_limiter_wait_is_not_a_failure(self):
+        limiter = RateLimiter(rate=1, per=60, burst=1)
+        limiter.acquire()
+        with self.assertRaises(DeadlineExceededError):
+            self.make_weather(rate_limiter=limiter, request_deadline=0.1).get_current_weather()
+        # Nothing was sent, the API did not fail.
+        self.assertEqual(StubHandler.requests, 0)
+        self.assertEqual(self.breaker.state, "closed")
+
+    def test_circuit_half_open(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "closed")
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, "closed")
+
+
+class TestBackoff(unittest.TestCase):
+
+    def test_default_breaker_is_opt_in(self):
+        self.addCleanup(set_default_breaker, None)
+        self.assertIsNone(Weather(apikey="test", city="Tampa", cache_system=False).circuit_breaker)
+
+        breaker = CircuitBreaker()
+        set_default_breaker(breaker)
+        self.assertIs(Weather(apikey="test", city="Tampa", cache_system=False).circuit_breaker, breaker)
+
+    def test_backoff_delay_is_jittered_and_capped(self):
+        delays = [backoff_delay(10, 0.25, 5) for _ in range(50)]
+        self.assertTrue(all(0 <= delay <= 5 for delay in delays))
+        self.assertGreater(len(set(delays)), 1)
+
+    def test_latency_percentile(self):
+        tracker = LatencyTracker(min_samples=10)
+        self.assertIsNone(tracker.percentile(95))
+        for latency in range(1, 101):
+            tracker.record(latency / 100)
+        self.assertEqual(tracker.percentile(95), 0.95)
+
+
+if __name__ == '__main__':
+    unittest.main()
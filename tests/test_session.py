@@ -0,0 +1,51 @@
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import requests
+
+from weathermap import Weather, create_session, get_default_session, set_default_session
+from weathermap.cachebackend import CacheBackend
+from weathermap.memorycache import MemoryCache
+
+
+class TestSession(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_directory)
+        self.addCleanup(CacheBackend._backends.clear)
+        self.addCleanup(MemoryCache._tiers.clear)
+
+    def test_create_session_pool(self):
+        session = create_session(pool_connections=2, pool_maxsize=32, keep_alive=False)
+        adapter = session.get_adapter("https://api.openweathermap.org")
+        self.assertEqual(adapter._pool_maxsize, 32)
+        self.assertEqual(session.headers["Connection"], "close")
+
+    def test_weather_shares_default_session(self):
+        previous = get_default_session()
+        self.addCleanup(set_default_session, previous)
+        session = requests.Session()
+        set_default_session(session)
+
+        first = Weather(apikey="test", city="Tampa", cache_directory=self.cache_directory)
+        second = Weather(apikey="test", city="Miami", cache_directory=self.cache_directory)
+        self.assertIs(first.session, session)
+        self.assertIs(second.session, session)
+
+    def test_injected_session_and_timeouts(self):
+        session = mock.Mock()
+        session.get.return_value.json.return_value = {"cod": 200, "name": "Tampa"}
+        weather = Weather(apikey="test", city="Tampa", cache_system=False, session=session,
+                          connect_timeout=1, read_timeout=2)
+        weather.get_current_weather()
+
+        url = session.get.call_args.args[0]
+        self.assertTrue(url.startswith("https://api.openweathermap.org/data/2.5/weather?q=Tampa&"))
+        self.assertEqual(session.get.call_args.kwargs["timeout"], (1, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
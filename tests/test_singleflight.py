@@ -0,0 +1,102 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from weathermap import Weather
+from weathermap.cachebackend import CacheBackend
+from weathermap.memorycache import MemoryCache
+from weathermap.singleflight import FileLock, SingleFlight
+
+
+class SlowSession:
+
+    def __init__(self, payload, delay=0.2):
+        self.payload = payload
+        self.delay = delay
+        self.calls = 0
+
+    def get(self, url, timeout=None):
+        self.calls += 1
+        time.sleep(self.delay)
+        response = mock.Mock()
+        response.json.return_value = self.payload
+        return response
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_directory)
+        self.addCleanup(CacheBackend._backends.clear)
+        self.addCleanup(MemoryCache._tiers.clear)
+
+    def run_concurrently(self, session, count=8, **kwargs):
+        results, errors = [], []
+
+        def worker():
+            weather = Weather(apikey="test", city="Tampa", country="US", session=session,
+                              cache_directory=self.cache_directory, **kwargs)
+            try:
+                results.append(weather.get_current_weather())
+            except ValueError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results, errors
+
+    def test_concurrent_misses_send_one_request(self):
+        session = SlowSession({"cod": 200, "name": "Tampa"})
+        results, errors = self.run_concurrently(session)
+        self.assertEqual(session.calls, 1)
+        self.assertEqual(len(results), 8)
+        self.assertFalse(errors)
+
+    def test_errors_are_shared(self):
+        session = SlowSession({"cod": "404", "message": "city not found"})
+        results, errors = self.run_concurrently(session, cache_system=False)
+        self.assertEqual(session.calls, 1)
+        self.assertEqual(len(errors), 8)
+
+    def test_file_lock_variant(self):
+        session = SlowSession({"cod": 200, "name": "Tampa"})
+        results, errors = self.run_concurrently(session, count=4, coalesce_requests=False, cache_file_lock=True)
+        self.assertEqual(session.calls, 1)
+        self.assertEqual(len(results), 4)
+
+    def test_flight_is_released(self):
+        flight = SingleFlight()
+        self.assertEqual(flight.do("key", lambda: 1), 1)
+        self.assertEqual(flight.do("key", lambda: 2), 2)
+        self.assertEqual(flight.in_flight(), 0)
+
+    def test_file_lock_excludes(self):
+        path = os.path.join(self.cache_directory, "locks", "test.lock")
+        events = []
+
+        def holder():
+            with FileLock(path):
+                events.append("acquired")
+                time.sleep(0.2)
+                events.append("released")
+
+        thread = threading.Thread(target=holder)
+        thread.start()
+        while not events:
+            time.sleep(0.01)
+        with FileLock(path):
+            events.append("second")
+        thread.join()
+        self.assertEqual(events, ["acquired", "released", "second"])
+
+
+if __name__ == '__main__':
+    unittest.main()
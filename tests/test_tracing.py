@@ -0,0 +1,89 @@
+import contextlib
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from weathermap import OpenTelemetryTracer, RecordingTracer, Weather, set_tracer
+from weathermap.cachebackend import CacheBackend
+from weathermap.memorycache import MemoryCache
+from weathermap.tracing import start_span
+
+WEATHER_RESPONSE = {"dt": 1697558400, "main": {"temp": 301.15}, "name": "Tampa", "cod": 200}
+
+
+class TestTracing(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_directory)
+        self.addCleanup(CacheBackend._backends.clear)
+        self.addCleanup(MemoryCache._tiers.clear)
+        self.addCleanup(set_tracer, None)
+
+    def test_disabled_tracing_is_a_shared_noop(self):
+        with start_span("a") as first, start_span("b", {"key": "value"}) as second:
+            first.set_attribute("hit", True)
+        self.assertIs(first, second)
+        self.assertFalse(first.is_recording())
+
+    def test_request_phases(self):
+        tracer = RecordingTracer()
+        set_tracer(tracer)
+        session = mock.Mock()
+        session.get.return_value.status_code = 200
+        session.get.return_value.headers = {"Content-Length": "85"}
+        session.get.return_value.json.return_value = WEATHER_RESPONSE
+        weather = Weather(apikey="test", city="Tampa", country="US", session=session, rate_limiter=None,
+                          circuit_breaker=None, cache_directory=self.cache_directory)
+        weather.get_current_weather()
+
+        spans = {span.name: span for span in tracer.spans}
+        root = spans["weathermap.api_request"]
+        self.assertEqual(root.attributes, {"req_type": "weather", "location_key": "TAMPAUS", "cache": "miss"})
+        self.assertIsNone(root.parent)
+        for name in ("weathermap.cache.lookup", "weathermap.http", "weathermap.parse", "weathermap.cache.write"):
+            self.assertEqual(spans[name].parent, "weathermap.api_request", name)
+        self.assertEqual(spans["weathermap.http"].attributes["status"], 200)
+        self.assertEqual(spans["weathermap.http"].attributes["bytes"], "85")
+        self.assertFalse(spans["weathermap.cache.lookup"].attributes["hit"])
+        self.assertGreater(spans["weathermap.cache.write"].attributes["bytes"], 0)
+
+        tracer.clear()
+        weather.get_current_weather()
+        spans = {span.name: span for span in tracer.spans}
+        self.assertEqual(spans["weathermap.api_request"].attributes["cache"], "hit")
+        self.assertEqual(spans["weathermap.cache.lookup"].attributes["tier"], "memory")
+        self.assertNotIn("weathermap.http", spans)
+        self.assertEqual(tracer.totals()["weathermap.cache.lookup"][1], 1)
+
+    def test_errors_are_recorded(self):
+        tracer = RecordingTracer()
+        set_tracer(tracer)
+        with self.assertRaises(KeyError):
+            with start_span("failing"):
+                raise KeyError("missing")
+        self.assertEqual(tracer.spans[0].error, "KeyError")
+
+    def test_opentelemetry_adapter(self):
+        otel_tracer = mock.Mock()
+        otel_tracer.start_as_current_span.return_value = contextlib.nullcontext()
+        adapter = OpenTelemetryTracer(otel_tracer)
+        adapter.start_span("weathermap.http", {"req_type": "weather", "status": None, "key": ("a", 1)})
+        otel_tracer.start_as_current_span.assert_called_once_with(
+            "weathermap.http", attributes={"req_type": "weather", "key": "('a', 1)"})
+
+    def test_opentelemetry_span_skips_missing_values(self):
+        otel_span = mock.Mock()
+        otel_tracer = mock.Mock()
+        otel_tracer.start_as_current_span.return_value = contextlib.nullcontext(otel_span)
+        with OpenTelemetryTracer(otel_tracer).start_span("weathermap.http") as span:
+            span.set_attribute("bytes", None)
+            span.set_attribute("status", 200)
+            span.set_attribute("key", ("a", 1))
+        self.assertEqual(otel_span.set_attribute.call_args_list,
+                         [mock.call("status", 200), mock.call("key", "('a', 1)")])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import shutil
+import tempfile
+import time
+import unittest
+from datetime import datetime
+from unittest import mock
+
+from weathermap import Gazetteer, TTLPolicy, Weather
+from weathermap.cachebackend import CacheBackend
+from weathermap.memorycache import MemoryCache
+from weathermap.ttlpolicy import parse_timeout
+
+TIMEOUTS = {"weather": 3600, "forecast": 86400, "air_pollution": 86400}
+
+
+class TestTTLPolicy(unittest.TestCase):
+
+    def test_parse_timeout(self):
+        self.assertEqual([parse_timeout(value) for value in ("30S", "5M", "1 H", "2d")], [30, 300, 3600, 172800])
+        with self.assertRaises(ValueError):
+            parse_timeout("1W")
+
+    def test_fixed(self):
+        policy = TTLPolicy(TIMEOUTS)
+        self.assertEqual(policy.expires_at("weather", {"dt": 0}, now=1000), 4600)
+
+    def test_upstream_weather(self):
+        policy = TTLPolicy(TIMEOUTS, mode="upstream")
+        # Observed 500 seconds ago, the next update is published 600 + 60 seconds after the observation.
+        self.assertEqual(policy.expires_at("weather", {"dt": 9500}, now=10000), 10160)
+        # Late upstream data lives min_ttl, and the timeout stays an upper bound.
+        self.assertEqual(policy.expires_at("weather", {"dt": 5000}, now=10000), 10060)
+        self.assertEqual(TTLPolicy({"weather": 100}, mode="upstream").expires_at("weather", {"dt": 9900}, now=9900),
+                         10000)
+        # Responses without a time fall back to the timeout.
+        self.assertEqual(policy.expires_at("weather", {}, now=10000), 13600)
+
+    def test_upstream_forecast_and_air_pollution(self):
+        policy = TTLPolicy(TIMEOUTS, mode="upstream")
+        self.assertEqual(policy.expires_at("forecast", {"list": [{"dt": 10800}]}, now=9000), 10860)
+        self.assertEqual(policy.expires_at("air_pollution", {"list": [{"dt": 7200}]}, now=8000), 10860)
+
+    def test_overrides(self):
+        policy = TTLPolicy(TIMEOUTS, overrides={"Tampa, FL, US": "10M", "London, GB": {"forecast": "3H"}})
+        self.assertEqual(policy.ttl("weather", "TAMPAFLUS"), 600)
+        self.assertEqual(policy.ttl("forecast", "TAMPAFLUS"), 600)
+        self.assertEqual(policy.ttl("forecast", "LONDONGB"), 10800)
+        self.assertEqual(policy.ttl("weather", "LONDONGB"), 3600)
+        self.assertEqual(policy.ttl("weather", "NEW-YORKNYUS"), 3600)
+
+    def test_invalid_mode(self):
+        with self.assertRaises(ValueError):
+            TTLPolicy(TIMEOUTS, mode="adaptive")
+
+
+class TestWeatherTTLPolicy(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_directory)
+        self.addCleanup(CacheBackend._backends.clear)
+        self.addCleanup(MemoryCache._tiers.clear)
+        self.session = mock.Mock()
+
+    def make_weather(self, **kwargs):
+        return Weather(apikey="test", city="Tampa", state="FL", country="US", session=self.session,
+                       cache_directory=self.cache_directory, rate_limiter=None, circuit_breaker=None, **kwargs)
+
+    def expires_in(self, weather):
+        timeout_param = weather._begin_request()
+        lookup = weather._lookup_cache(timeout=timeout_param, max_stale=float("inf"), **weather._cache_names())
+        return lookup.expires_at - time.time()
+
+    def test_upstream_policy_expiry(self):
+        self.session.get.return_value.json.return_value = {"dt": int(time.time()) - 500, "name": "Tampa", "cod": 200}
+        weather = self.make_weather(ttl_policy="upstream")
+        weather.get_current_weather()
+        self.assertAlmostEqual(self.expires_in(weather), 160, delta=2)
+        weather.get_current_weather()
+        self.assertEqual(self.session.get.call_count, 1)
+
+    def test_location_override(self):
+        self.session.get.return_value.json.return_value = {"dt": int(time.time()), "name": "Tampa", "cod": 200}
+        weather = self.make_weather(ttl_overrides={"Tampa, FL, US": "10M"})
+        weather.get_current_weather()
+        self.assertAlmostEqual(self.expires_in(weather), 600, delta=2)
+
+    def max_age(self, weather, req_type="weather"):
+        timeout_param = weather._begin_request(req_type)
+        return weather._max_age(timeout_param, weather._cache_names())
+
+    def test_override_forms(self):
+        weather = Weather(apikey="test", zip_code="33602", country="US", cache_directory=self.cache_directory,
+                          ttl_overrides={"33602, US": "10M"})
+        self.assertEqual(self.max_age(weather), 600)
+        weather = self.make_weather(ttl_overrides={"Tampa, Florida, US": "10M"})
+        self.assertEqual(self.max_age(weather), 600)
+        weather = self.make_weather(ttl_overrides={"Miami, FL, US": "10M"})
+        self.assertEqual(self.max_age(weather), 3600)
+
+    def test_override_with_gazetteer(self):
+        gazetteer = Gazetteer(places=[{"id": 4174757, "name": "Tampa", "state": "FL", "country": "US",
+                                       "coord": {"lon": -82.458427, "lat": 27.947599}}],
+                              zip_codes={"33602,US": 4174757})
+        for location in ("Tampa, Florida, US", "Tampa, US", "33602, US"):
+            weather = self.make_weather(gazetteer=gazetteer, ttl_overrides={location: {"forecast": "3H"}})
+            self.assertEqual(weather._get_location_key(weather._cache_names()), "CITY-4174757")
+            self.assertEqual(self.max_age(weather, "forecast"), 10800)
+
+    def test_invalid_override_location(self):
+        with self.assertRaises(ValueError):
+            self.make_weather(ttl_overrides={"a, b, c, d": "10M"})
+
+    def test_entry_keeps_fetch_time(self):
+        self.session.get.return_value.json.return_value = {"dt": int(time.time()) - 500, "name": "Tampa", "cod": 200}
+        weather = self.make_weather(ttl_policy="upstream")
+        weather.get_current_weather()
+        weather.get_current_weather()
+        self.assertEqual(weather.freshness["source"], "cache")
+        self.assertLess(weather.freshness["age"], 2)
+        self.assertFalse(weather.freshness["stale"])
+
+    def test_sweep_keeps_overridden_entry(self):
+        weather = self.make_weather(ttl_overrides={"Tampa, FL, US": "1D"})
+        timeout_param = weather._begin_request()
+        now = time.time()
+        weather._create_cache(data={"dt": int(now), "name": "Tampa", "cod": 200}, timeout=timeout_param,
+                              expires_at=now + 79200, date_time=datetime.fromtimestamp(now - 7200),
+                              **weather._cache_names())
+        weather.sweep()
+        weather.get_current_weather()
+        self.session.get.assert_not_called()
+        self.assertFalse(weather.freshness["stale"])
+
+    def test_timeouts_parsed_once(self):
+        weather = self.make_weather()
+        with mock.patch.object(weather, "_timeout_time_clean", wraps=weather._timeout_time_clean) as clean:
+            first = weather._begin_request("forecast")
+            self.assertIs(weather._begin_request("forecast"), first)
+            weather.forecast_timeout = "3H"
+            self.assertEqual(weather._begin_request("forecast")["forecast_timeout"]["hours"], 3)
+        self.assertEqual(clean.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from weathermap import Weather
+from weathermap.cachebackend import CacheBackend
+from weathermap.memorycache import MemoryCache
+from weathermap.units import convert_units
+
+STANDARD_WEATHER = {"cod": 200, "name": "Tampa", "main": {"temp": 300.15, "feels_like": 303.15, "humidity": 70},
+                    "wind": {"speed": 10.0, "deg": 90}}
+STANDARD_FORECAST = {"cod": "200", "list": [{"main": {"temp": 273.15, "temp_kf": 1.0}, "wind": {"speed": 1.0}},
+                                            {"main": {"temp": 283.15}, "wind": {"speed": 0.0, "gust": 2.0}}]}
+
+
+class TestConvertUnits(unittest.TestCase):
+
+    def test_weather(self):
+        imperial = convert_units(STANDARD_WEATHER, "Imperial")
+        self.assertEqual(imperial["main"], {"temp": 80.6, "feels_like": 86.0, "humidity": 70})
+        self.assertEqual(imperial["wind"], {"speed": 22.37, "deg": 90})
+        metric = convert_units(STANDARD_WEATHER, "metric")
+        self.assertEqual(metric["main"]["temp"], 27.0)
+        self.assertEqual(metric["wind"]["speed"], 10.0)
+        self.assertIs(convert_units(STANDARD_WEATHER, "Standard"), STANDARD_WEATHER)
+        self.assertEqual(STANDARD_WEATHER["main"]["temp"], 300.15)
+
+    def test_forecast(self):
+        imperial = convert_units(STANDARD_FORECAST, "imperial")
+        self.assertEqual([item["main"]["temp"] for item in imperial["list"]], [32.0, 50.0])
+        self.assertEqual(imperial["list"][0]["main"]["temp_kf"], 1.8)
+        self.assertEqual(imperial["list"][1]["wind"]["gust"], 4.47)
+
+
+class TestUnitsAgnosticCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_directory)
+        self.addCleanup(CacheBackend._backends.clear)
+        self.addCleanup(MemoryCache._tiers.clear)
+        self.session = mock.Mock()
+        self.session.get.return_value.json.return_value = STANDARD_WEATHER
+
+    def make_weather(self, **kwargs):
+        return Weather(apikey="test", city="Tampa", country="US", cache_directory=self.cache_directory,
+                       session=self.session, **kwargs)
+
+    def test_one_request_serves_every_units(self):
+        self.assertEqual(self.make_weather(units="Imperial").get_current_weather()["main"]["temp"], 80.6)
+        self.assertEqual(self.make_weather(units="Metric").get_current_weather()["main"]["temp"], 27.0)
+        self.assertEqual(self.make_weather(units="Standard").get_current_weather()["main"]["temp"], 300.15)
+        self.assertEqual(self.session.get.call_count, 1)
+        self.assertIn("&units=standard", self.session.get.call_args[0][0])
+
+    def test_uncached_requests_use_requested_units(self):
+        self.make_weather(units="Metric", cache_system=False).get_current_weather()
+        self.assertIn("&units=Metric", self.session.get.call_args[0][0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from weathermap import CacheWarmer, Weather
+from weathermap.cachebackend import CacheBackend
+from weathermap.memorycache import MemoryCache
+
+WEATHER_RESPONSE = {"coord": {"lon": -82.46, "lat": 27.95}, "main": {"temp": 301.15}, "name": "Tampa", "cod": 200}
+
+
+class TestCacheWarmer(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_directory)
+        self.addCleanup(CacheBackend._backends.clear)
+        self.addCleanup(MemoryCache._tiers.clear)
+        self.session = mock.Mock()
+        self.session.get.return_value.json.return_value = WEATHER_RESPONSE
+        self.options = dict(cache_directory=self.cache_directory, session=self.session, rate_limiter=None,
+                            circuit_breaker=None)
+
+    def start(self, warmer):
+        self.addCleanup(warmer.stop, 5)
+        warmer.start()
+        return warmer
+
+    def wait_for_calls(self, calls, timeout=5):
+        deadline = time.monotonic() + timeout
+        while self.session.get.call_count < calls and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return self.session.get.call_count
+
+    def test_fetches_missing_then_refreshes_before_expiry(self):
+        warmer = self.start(CacheWarmer("test", [{"city": "Tampa", "country": "US"}], weather_timeout="2S",
+                                        refresh_ahead=0.25, startup_window=0, **self.options))
+        self.assertEqual(self.wait_for_calls(1), 1)
+        first = time.monotonic()
+        self.assertEqual(self.wait_for_calls(2), 2)
+        # Refreshed between 1 and 1.5 seconds after the fetch, before the entry expires.
+        self.assertLess(time.monotonic() - first, 1.9)
+        self.assertEqual(warmer.stats()["failures"], 0)
+
+        weather = Weather(apikey="test", city="Tampa", country="US", weather_timeout="2S", **self.options)
+        weather.get_current_weather()
+        self.assertEqual(weather.freshness["source"], "cache")
+
+    def test_fresh_entries_are_not_refetched(self):
+        Weather(apikey="test", city="Tampa", country="US", **self.options).get_current_weather()
+        warmer = self.start(CacheWarmer("test", [{"city": "Tampa", "country": "US"}], **self.options))
+        time.sleep(0.2)
+        self.assertEqual(self.session.get.call_count, 1)
+        self.assertGreater(warmer.stats()["next_refresh"], 2800)
+
+    def test_failed_refresh_is_retried(self):
+        self.session.get.return_value.json.return_value = {"cod": 401, "message": "Invalid API key"}
+        warmer = self.start(CacheWarmer("test", ["Tampa, US"], retry_interval=0.05, startup_window=0,
+                                        **self.options))
+        self.assertGreaterEqual(self.wait_for_calls(2), 2)
+        self.assertIsInstance(warmer.last_error, ValueError)
+
+    def test_unexpected_errors_are_logged_and_retried(self):
+        self.session.get.side_effect = [KeyError("main"), self.session.get.return_value]
+        warmer = CacheWarmer("test", ["Tampa, US"], retry_interval=0.05, startup_window=0, **self.options)
+        with self.assertLogs("weathermap.warming", level="ERROR"):
+            self.start(warmer)
+            self.assertEqual(self.wait_for_calls(2), 2)
+        self.assertIsInstance(warmer.last_error, KeyError)
+        self.assertTrue(warmer.is_alive())
+        self.assertEqual(warmer.stats()["locations"], 1)
+
+    def test_missing_entries_are_spread_over_startup_window(self):
+        warmer = CacheWarmer("test", [f"City{index}" for index in range(20)], startup_window=100, **self.options)
+        due = sorted(entry[0] - time.time() for entry in warmer._schedule)
+        self.assertGreaterEqual(due[0], -1)
+        self.assertLessEqual(due[-1], 100)
+        self.assertGreater(due[-1] - due[0], 10)
+        self.assertEqual(warmer.stats()["locations"], 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,5 @@
 import os
+import time
 
 from weathermap import Weather
 from dotenv import load_dotenv
@@ -11,10 +12,20 @@ openweather_api = os.getenv("OPENWEATHER_API")
 def get_date(place, forecast_days=5, kind="Temperature"):
     weather = Weather(apikey=openweather_api, city=place, track_location=False)
     weather_response = weather.get_forecast()
-    weather_response_condensed = weather_response["list"][: forecast_days * 8]
+    now = time.time()
+    days = weather.forecast_frame().locate(now, now + forecast_days * 86400)
+    weather_response_condensed = weather_response["list"][days]
 
     return weather_response_condensed
 
 
+def get_forecast_frame(place, forecast_days=5):
+    weather = Weather(apikey=openweather_api, city=place, track_location=False)
+    weather.get_forecast()
+    now = time.time()
+
+    return weather.forecast_frame().window(now, now + forecast_days * 86400)
+
+
 if __name__ == "__main__":
     print(get_date(place="London", kind="sky"))
@@ -1,9 +1,12 @@
 import streamlit as st
 import plotly.express as px
-from backend import get_date
+from backend import get_forecast_frame
 from weathermap import locationtrack
 
+# The location is looked up once and reused by the following reruns and sessions.
 location = locationtrack.LocationTrack()
+if st.sidebar.button("Refresh location"):
+    location.refresh_location()
 
 city = location.city
 state = location.state
@@ -30,29 +33,26 @@ if submit_button:
         st.subheader(f"{option} for the next {days} days in {place}")
 
         # Get data from backend
-        data = get_date(place=place, forecast_days=days)
+        frame = get_forecast_frame(place=place, forecast_days=days)
 
         if option.lower() == "temperature":
-            filtered_data = [dicty["main"]["temp"] for dicty in data]
-            dates = [dicty["dt_txt"] for dicty in data]
-
+            hourly = frame.resample()
             figure = px.line(
-                x=dates,
-                y=filtered_data,
+                x=hourly.times(),
+                y=hourly.temp,
                 title="Temperature",
                 labels={"x": "Date", "y": "Temperature (F)"},
             )
             st.plotly_chart(figure)
 
         elif option.lower() == "sky":
-            filtered_data = [dicty["weather"][0]["main"] for dicty in data]
             images_map = {
                 "Clear": "images/clear.png",
                 "Snow": "images/snow.png",
                 "Clouds": "images/cloud.png",
                 "Rain": "images/rain.png",
             }
-            images_paths = [images_map[condition] for condition in filtered_data]
+            images_paths = [images_map[condition] for condition in frame.condition]
             st.image(images_paths, width=115)
 
     except Exception as e:
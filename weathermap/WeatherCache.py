@@ -1,12 +1,27 @@
 import os
 import json
-from datetime import datetime, timedelta
+import time
+from collections import namedtuple
+from datetime import timedelta
+
+from .cachebackend import FileCacheBackend, SQLiteCacheBackend, _normalize_key_part
+from .geogrid import CoordinateGrid
+from .janitor import CacheJanitor
+from .memorycache import MemoryCache
+from .metrics import CACHE_EVICTIONS, CACHE_LOOKUP_SECONDS, CACHE_WRITES
+from .tracing import start_span
 
 
 class CacheCleaningDisabledError(Exception):
     pass
 
 
+CacheLookup = namedtuple("CacheLookup", ["data", "created_at", "age", "stale", "expires_at"])
+
+# Request type of the negative cache entries, the error responses of the API.
+NEGATIVE_REQ_TYPE = "not_found"
+
+
 class WeatherCache:
     """
     WeatherCache Class:
@@ -25,27 +40,85 @@ class WeatherCache:
     :type auto_cache_clean_for_exceed_limit: bool
     :param cache_size_limit_mb: The cache size limit in megabytes (default is 200 MB).
     :type cache_size_limit_mb: int
+    :param memory_cache_entries: Number of entries kept in the in-process memory tier (default is 256, 0 disables it).
+    :type memory_cache_entries: int
+    :param memory_cache_bytes: Byte budget of the in-process memory tier (default is None, no byte budget).
+    :type memory_cache_bytes: int, optional
+    :param cache_backend: Storage of the cache entries, 'file' for one JSON file per entry or 'sqlite' for a single
+    SQLite database in the cache directory (default is 'file').
+    :type cache_backend: str
+    :param cache_low_watermark: Fraction of the cache size limit the cache is brought under once the limit is exceeded
+    (default is 0.5).
+    :type cache_low_watermark: float
+    :param cache_timeouts: Maximum age per request type, used to delete expired entries of every request type before
+    evicting the least recently used ones (default is None, only the request type being cached is expired).
+    :type cache_timeouts: dict of str to timedelta, optional
+    :param cache_janitor_interval: Seconds between two sweeps of a background CacheJanitor deleting expired entries
+    (when cache_cleaning is enabled) and enforcing the size limit (when auto_cache_clean_for_exceed_limit is enabled).
+    Default is None, no janitor is started and the size limit is enforced when an entry is created.
+    :type cache_janitor_interval: float, optional
+    :param cache_grid: Size in degrees of the cells coordinates are snapped to, every point of a cell shares the cache
+    entry of the cell (default is 0.01).
+    :type cache_grid: float
+    :param cache_geohash_precision: Snap coordinates to geohash cells of this many characters instead (default is
+    None).
+    :type cache_geohash_precision: int, optional
     :keyword timeout: A dictionary containing timeout values for different request types.
     :type timeout: dict
 
+    Cached entries are stored by a CacheBackend: the file backend indexes its files with a CacheManifest, so a lookup is
+    a dictionary lookup followed by a single file read instead of a scan of the cache directory, and the SQLite backend
+    turns lookups, expiry and eviction into indexed queries. Recently used entries are also kept in a MemoryCache shared
+    by the caches of the same directory; it is checked first and written through together with the files, so hot
+    entries are served without touching the filesystem.
+
     Methods:
     - create_cache(data, timeout, **kwargs): Create cache for weather data.
     - get_cached_weather(timeout, **kwargs): Retrieve cached weather data.
+    - _get_location_key(names): Build the location part of the cache key.
+    - _get_cache_key(names): Build the deterministic cache key of a location, request type and units.
+    - _grid_cell(lat, lon): Return the cell of the coordinate grid containing a point.
+    - _create_negative_cache(data, query): Cache an error response of the API.
+    - _get_negative_cache(query, max_age): Retrieve a cached error response of the API.
     - _forecast_timedelta(timeout): Calculate the forecast time delta.
     - _validate_name_for_directory_name(input_dict): Validate and clean input dictionary for cache directory naming.
     - manage_directory_size(timeout, directory=None, threshold_size=None, cache_cleaning=None): Manage directory size by
       deleting outdated files when the cache size exceeds the threshold.
+    - sweep(): Delete expired entries and enforce the size limit.
+    - start_janitor(interval): Sweep the cache periodically in a background thread.
+    - stop_janitor(timeout=None): Stop the background janitor.
 
     """
+    _backends = {'file': FileCacheBackend, 'sqlite': SQLiteCacheBackend}
+    # Grid of the objects which did not run __init__, such as a Weather without cache system.
+    _default_grid = CoordinateGrid()
+
     def __init__(self, cache_system: bool, cache_cleaning: bool, cache_directory: str = 'weather_cache',
-                 auto_cache_clean_for_exceed_limit: bool = False, cache_size_limit_mb: int = 200, **kwargs):
+                 auto_cache_clean_for_exceed_limit: bool = False, cache_size_limit_mb: int = 200,
+                 memory_cache_entries: int = 256, memory_cache_bytes: int = None, cache_backend: str = 'file',
+                 cache_low_watermark: float = 0.5, cache_timeouts: dict = None,
+                 cache_janitor_interval: float = None, cache_grid: float = 0.01, cache_geohash_precision: int = None,
+                 **kwargs):
         self.cache_directory = cache_directory
         self.cache_cleaning = cache_cleaning
         self.cache_size_limit_mb = cache_size_limit_mb
         self.auto_cache_clean_for_exceed_limit = auto_cache_clean_for_exceed_limit
         self.cache_system = cache_system
+        self.cache_backend = cache_backend
+        self.cache_low_watermark = cache_low_watermark
+        self.cache_timeouts = cache_timeouts or {}
+        self._backend = None
+        self._memory_cache = None
+        self._grid = CoordinateGrid(cell_degrees=cache_grid, geohash_precision=cache_geohash_precision)
+        if cache_backend not in self._backends:
+            raise ValueError(f"cache_backend must be one of {sorted(self._backends)}")
         if cache_system:
             self._create_dir(self.cache_directory)
+            self._backend = self._backends[cache_backend].for_directory(self.cache_directory)
+            self._memory_cache = MemoryCache.for_directory(self.cache_directory, max_entries=memory_cache_entries,
+                                                           max_bytes=memory_cache_bytes)
+            if cache_janitor_interval:
+                self.start_janitor(cache_janitor_interval)
 
     @staticmethod
     def _create_dir(weather_dir):
@@ -57,48 +130,156 @@ class WeatherCache:
         """
         os.makedirs(weather_dir, exist_ok=True)
 
-    def _get_cache_filename(self, names):
+    def _get_location_key(self, names) -> str:
         """
-        Generate a cache filename based on input data.
+        Generate the location part of the cache key.
+
+        The city id of a place resolved by a Gazetteer is used when given, otherwise the city, state and country,
+        otherwise the grid cell of lat and lon, otherwise the zip code and country.
 
-        :param names: Input data for naming the cache file.
+        :param names: Input data for naming the cache entry.
         :type names: dict
-        :return: Generated cache filename.
+        :return: Location key, e.g. 'CITY-4174757', 'TAMPAFLUS', 'GRID0-01-N2795-W8247' or 'ZIP-33601US'.
         :rtype: str
         """
         name_dict = self._validate_name_for_directory_name(names)
-        formatted_date_time = datetime.now().strftime('%Y-%m-%d_%H-%M')
-        if name_dict['date_time']:
-            formatted_date_time = name_dict['date_time'].strftime('%Y-%m-%d_%H-%M')
         try:
-            return (f"{name_dict['city']}{name_dict['state'][0:2].upper()}{name_dict['country']}_"
-                    f"{name_dict['req_type'][0:3]}_{formatted_date_time}.json")
+            if name_dict['place_id'] != "":
+                return _normalize_key_part(f"CITY-{name_dict['place_id']}")
+            if name_dict['city']:
+                return _normalize_key_part(f"{name_dict['city']}{name_dict['state'][0:2]}{name_dict['country']}")
+            if name_dict['lat'] != "" and name_dict['lon'] != "":
+                return _normalize_key_part(self._grid_cell(name_dict['lat'], name_dict['lon']).key)
+            if name_dict['zip_code'] and name_dict['country']:
+                return _normalize_key_part(f"ZIP-{name_dict['zip_code']}{name_dict['country']}")
+        except (AttributeError, TypeError, ValueError):
+            pass
+        raise CacheCleaningDisabledError("Missing attribute to create a cache")
+
+    def _grid_cell(self, lat, lon):
+        """
+        Return the cell of the coordinate grid containing a point.
+
+        :param lat: Latitude in degrees.
+        :type lat: float
+        :param lon: Longitude in degrees.
+        :type lon: float
+        :return: The cell, with its key and the coordinates of its center.
+        :rtype: GridCell
+        """
+        return getattr(self, '_grid', self._default_grid).cell(lat, lon)
+
+    def _get_cache_key(self, names) -> str:
+        """
+        Generate the deterministic cache key of a location and request type, and of the units of the data when given,
+        so entries cached in other units are never read as the requested ones.
 
-        except AttributeError:
-            raise CacheCleaningDisabledError("Missing attribute to create a cache")
+        :param names: Input data for naming the cache entry.
+        :type names: dict
+        :return: Cache key, e.g. 'TAMPAFLUS_wea' or 'TAMPAFLUS_wea_standard'.
+        :rtype: str
+        """
+        name_dict = self._validate_name_for_directory_name(names)
+        key = f"{self._get_location_key(name_dict)}_{name_dict['req_type'][0:3]}"
+        if name_dict['units']:
+            key = f"{key}_{_normalize_key_part(name_dict['units']).lower()}"
+        return key
 
-    def _create_cache(self, data, timeout: dict, **kwargs):
+    def _create_cache(self, data, timeout: dict, expires_at: float = None, **kwargs):
         """
         Create a cache for weather data.
 
+        The entry is written to the backend and to the memory tier.
+
         :param data: Weather data to cache.
         :type data: dict
         :param timeout: Timeout values for cache expiration.
         :type timeout: dict
+        :param expires_at: Time the data expires as a POSIX timestamp, default is None (its timeout after it was
+        cached).
+        :type expires_at: float, optional
         :param kwargs: Additional data for naming the cache file.
         :type kwargs: dict
         """
+        if not self.cache_system:
+            raise CacheCleaningDisabledError("Cache system is disabled.")
+
         name_dict = self._validate_name_for_directory_name(kwargs)
+        created_at = name_dict['date_time'].timestamp() if name_dict['date_time'] else time.time()
+        location_key = self._get_location_key(name_dict)
+        key = self._get_cache_key(name_dict)
         try:
-            filename = os.path.join(self.cache_directory, self._get_cache_filename(name_dict))
-            with open(filename, 'w') as file:
-                json.dump(data, file)
-
-            if self.auto_cache_clean_for_exceed_limit:
+            with start_span("weathermap.cache.write", {"key": key, "req_type": name_dict['req_type']}) as span:
+                serialized = json.dumps(data)
+                self._backend.write(key, location_key, name_dict['req_type'], serialized, created_at, expires_at)
+                self._memory_cache.set(key, data, created_at, len(serialized), expires_at)
+                span.set_attribute("bytes", len(serialized))
+            CACHE_WRITES.inc(req_type=name_dict['req_type'])
+
+            if (self.auto_cache_clean_for_exceed_limit and self.cache_cleaning and not self._janitor_running()
+                    and self._backend.total_bytes > int(self.cache_size_limit_mb * 1024 * 1024)):
                 self.manage_directory_size(timeout=timeout, directory=self.cache_directory)
         except OSError:
             raise CacheCleaningDisabledError("Cache System disabled")
 
+    @staticmethod
+    def _get_negative_cache_key(query: str) -> str:
+        """
+        Generate the key of a negative cache entry. Unlike weather data keys, it has no request type suffix, so the
+        two kinds of entries never share a key.
+
+        :param query: The request type and API query, e.g. 'weather?q=Nowhere'.
+        :type query: str
+        :return: Negative cache key, e.g. 'NEG-WEATHER-Q-NOWHERE'.
+        :rtype: str
+        """
+        return f"NEG-{_normalize_key_part(query)}"
+
+    def _create_negative_cache(self, data, query: str):
+        """
+        Cache an error response of the API, such as "city not found", for a query.
+
+        :param data: The error response.
+        :type data: dict
+        :param query: The request type and API query, e.g. 'weather?q=Nowhere'.
+        :type query: str
+        """
+        if not self.cache_system:
+            raise CacheCleaningDisabledError("Cache system is disabled.")
+
+        key = self._get_negative_cache_key(query)
+        created_at = time.time()
+        try:
+            serialized = json.dumps(data)
+            self._backend.write(key, key, NEGATIVE_REQ_TYPE, serialized, created_at)
+            self._memory_cache.set(key, data, created_at, len(serialized))
+        except OSError:
+            raise CacheCleaningDisabledError("Cache System disabled")
+
+    def _get_negative_cache(self, query: str, max_age: float):
+        """
+        Retrieve the cached error response of a query.
+
+        :param query: The request type and API query, e.g. 'weather?q=Nowhere'.
+        :type query: str
+        :param max_age: Maximum age of the entry in seconds.
+        :type max_age: float
+        :return: The error response, or None when it is not cached within max_age.
+        :rtype: dict or None
+        """
+        if not self.cache_system:
+            return None
+
+        key = self._get_negative_cache_key(query)
+        data = self._memory_cache.get(key, max_age)
+        if data is None:
+            record = self._backend.read(key, not_before=time.time() - max_age)
+            if record is None:
+                return None
+            data, created_at, size, expires_at = record
+            self._memory_cache.set(key, data, created_at, size, expires_at)
+        return data
+
     def _get_cached_weather(self, timeout: dict, **kwargs):
         """
         Retrieve cached weather data.
@@ -109,46 +290,78 @@ class WeatherCache:
         :type kwargs: dict
         :return: Cached weather data.
         :rtype: dict
+        :raises FileNotFoundError: When there is no cached data within the timeout.
+        :raises CacheCleaningDisabledError: When the cache system is disabled.
         """
-        if self.cache_system:
-            cache_filename = self._get_cache_filename(kwargs)
+        return self._lookup_cache(timeout, **kwargs).data
 
-            cache_filename_city, cache_filename_req_type, cache_filename_time_str = cache_filename[:-5].split("_", 2)
+    def _lookup_cache(self, timeout: dict, max_stale: float = 0, max_age: float = None, **kwargs):
+        """
+        Retrieve cached weather data with its freshness.
 
-            forecast_time_delta = datetime.now() - self._forecast_timedelta(timeout)
-            try:
-                cached_files = os.listdir(self.cache_directory)
-
-                for filename in cached_files:
-                    if filename.endswith(".json"):
-                        file_city, file_req_type, file_time_str = filename[:-5].split("_", 2)
-                        file_time = datetime.strptime(file_time_str, '%Y-%m-%d_%H-%M')
-
-                        if (file_city.upper() == cache_filename_city.upper() and file_time >= forecast_time_delta and
-                                file_req_type == cache_filename_req_type):
-                            # The file exists for the same city and within the past 1 hour
-                            try:
-                                filepath = os.path.join(self.cache_directory, filename)
-                                with open(filepath, 'r') as file:
-                                    return json.load(file)
-                            except FileNotFoundError:
-                                raise OSError(f"File not found: {cache_filename}")
-
-                        elif (self.cache_cleaning and file_time < forecast_time_delta
-                              and file_req_type == cache_filename_req_type):
-                            filepath = os.path.join(self.cache_directory, filename)
-                            os.remove(filepath)
-
-                        elif self.auto_cache_clean_for_exceed_limit:
-                            self.manage_directory_size(timeout=timeout, directory=self.cache_directory)
-
-                # No cached file found for the same city within the past 1 hour
-                return FileNotFoundError(f"File not found: {cache_filename}")
-            except OSError:
-                raise CacheCleaningDisabledError(f"File not found: {cache_filename}")
-        else:
+        An entry expires max_age seconds after it was created, or at its expiry time when it was cached with an
+        earlier one. Expired entries are still returned, marked as stale, when they are at most max_stale seconds
+        past their expiry.
+
+        :param timeout: Timeout values for cache expiration.
+        :type timeout: dict
+        :param max_stale: Seconds past the expiry during which an expired entry is still returned, default is 0.
+        :type max_stale: float
+        :param max_age: Maximum age of a fresh entry in seconds, default is the timeout.
+        :type max_age: float, optional
+        :param kwargs: Additional data for identifying the cache file.
+        :type kwargs: dict
+        :return: The cached data, its creation time, its age in seconds, whether it is stale and its expiry time
+        (None when it was cached without one).
+        :rtype: CacheLookup
+        :raises FileNotFoundError: When there is no cached data within the timeout and max_stale.
+        :raises CacheCleaningDisabledError: When the cache system is disabled.
+        """
+        if not self.cache_system:
             raise CacheCleaningDisabledError("Cache system is disabled.")
 
+        key = self._get_cache_key(kwargs)
+        if max_age is None:
+            max_age = self._forecast_timedelta(timeout).total_seconds()
+        start = time.perf_counter()
+        with start_span("weathermap.cache.lookup", {"key": key, "req_type": timeout['req_type']}) as span:
+            try:
+                entry = self._memory_cache.get_entry(key, max_age + max_stale)
+                if entry is not None:
+                    self._backend.touch(key)
+                    data, created_at, expires_at = entry
+                    span.set_attribute("tier", "memory")
+                else:
+                    # Expired entries are left to sweep(), a lookup never deletes.
+                    record = self._backend.read(key, not_before=time.time() - max_age - max_stale)
+                    if record is None:
+                        span.set_attribute("hit", False)
+                        raise FileNotFoundError(f"File not found: {key}")
+                    data, created_at, size, expires_at = record
+                    self._memory_cache.set(key, data, created_at, size, expires_at)
+                    span.set_attribute("tier", "backend")
+                    span.set_attribute("bytes", size)
+                now = time.time()
+                expiry = created_at + max_age if expires_at is None else min(created_at + max_age, expires_at)
+                if now > expiry + max_stale:
+                    span.set_attribute("hit", False)
+                    raise FileNotFoundError(f"File not found: {key}")
+                span.set_attribute("hit", True)
+            finally:
+                CACHE_LOOKUP_SECONDS.observe(time.perf_counter() - start, req_type=timeout['req_type'])
+
+        return CacheLookup(data, created_at, max(now - created_at, 0.0), now > expiry, expires_at)
+
+    def _delete_entry(self, key: str):
+        """
+        Delete a cache entry from the memory tier and the backend.
+
+        :param key: The cache key.
+        :type key: str
+        """
+        self._memory_cache.remove(key)
+        self._backend.delete(key)
+
     @staticmethod
     def _forecast_timedelta(timeout: dict) -> timedelta:
         """
@@ -188,9 +401,11 @@ class WeatherCache:
             "state": "",
             "country": "",
             "zip_code": "",
+            "place_id": "",
             "lat": "",
             "lon": "",
             "req_type": "",
+            "units": "",
             "date_time": None
         }
         for key in input_dict.keys():
@@ -199,52 +414,72 @@ class WeatherCache:
 
         return dicty
 
+    def _backend_for(self, directory: str):
+        """
+        Return the backend of a cache directory, of the same kind as this cache's backend.
+
+        :param directory: The cache directory.
+        :type directory: str
+        :return: The backend of the directory.
+        :rtype: CacheBackend
+        """
+        if os.path.abspath(directory) == os.path.abspath(self.cache_directory):
+            return self._backend
+        return self._backends[self.cache_backend].for_directory(directory)
+
+    def _expiry_cutoffs(self, timeout: dict = None, cache_timeouts: dict = None) -> dict:
+        """
+        Calculate the expiry POSIX timestamp of every request type with a known timeout.
+
+        :param timeout: Timeout values of the current request type, overriding cache_timeouts for it.
+        :type timeout: dict, optional
+        :param cache_timeouts: Maximum age per request type, default is the cache_timeouts of this cache.
+        :type cache_timeouts: dict, optional
+        :return: Entries of a request type created before its timestamp are expired.
+        :rtype: dict
+        """
+        now = time.time()
+        if cache_timeouts is None:
+            cache_timeouts = self.cache_timeouts
+        cutoffs = {req_type: now - max_age.total_seconds() for req_type, max_age in cache_timeouts.items()}
+        if timeout:
+            cutoffs[timeout['req_type']] = now - self._forecast_timedelta(timeout).total_seconds()
+        return cutoffs
+
     def _delete_oldest_and_outdated_file(self, directory, timeout: dict):
         """
         Delete the oldest and outdated cache files from the specified directory.
 
-        This method iterates through the files in the given directory, identifying cache files that have expired
-        according to the specified timeout values. It then deletes the cache files that are either outdated or no
-        longer needed.
+        This method deletes the cache entries of the given directory that have expired according to the specified
+        timeout values, and then the oldest remaining one.
 
         :param directory: The directory containing cache files.
         :type directory: str
         :param timeout: Timeout values for cache expiration.
         :type timeout: dict
         """
-        oldest_file = None
-        oldest_timestamp = float('inf')
-
-        forecast_time_delta = self._forecast_timedelta(timeout)
-        expired_file_time = datetime.now() - forecast_time_delta
-
-        filenames = os.listdir(directory)
-        for filename in filenames:
-            if filename.endswith(".json"):
-                file_city, file_req_type, file_time_str = filename[:-5].split("_", 2)
-                file_time = datetime.strptime(file_time_str, '%Y-%m-%d_%H-%M')
-                filepath = os.path.join(directory, filename)
-                file_timestamp = os.path.getmtime(filepath)
-
-                if file_time > expired_file_time and file_req_type == timeout['req_type'][0:3]:
-                    os.remove(filepath)
+        expired_time = time.time() - self._forecast_timedelta(timeout).total_seconds()
+        backend = self._backend_for(directory)
 
-                elif file_timestamp < oldest_timestamp:
-                    oldest_timestamp = file_timestamp
-                    oldest_file = filepath
+        expired = backend.expire(timeout['req_type'], expired_time)
+        for key in expired:
+            self._memory_cache.remove(key)
+        CACHE_EVICTIONS.inc(len(expired), reason="expired")
 
-        if oldest_file:
-            os.remove(oldest_file)
-            # print(f"Deleted oldest file: {oldest_file}")
+        oldest_key = backend.delete_oldest()
+        if oldest_key:
+            self._memory_cache.remove(oldest_key)
+            CACHE_EVICTIONS.inc(reason="oldest")
 
     def manage_directory_size(self, timeout, directory: str = None, threshold_size: int = None,
                               cache_cleaning: bool = None):
         """
         Manage the size of the cache directory by deleting files when exceeding the size limit.
 
-        This method checks the current size of the specified cache directory and compares it with the threshold size.
-        If the current size exceeds the threshold, it iteratively deletes the oldest and outdated cache files until
-        the directory size drops below half of the threshold size.
+        This method compares the size of the entries of the specified cache directory, tracked incrementally by its
+        backend, with the threshold size. If the size exceeds the threshold, it deletes the expired entries and then
+        the least recently used ones until the size drops below cache_low_watermark (half by default) of the
+        threshold size.
 
         :param timeout: Timeout values for cache expiration.
         :type timeout: dict
@@ -260,16 +495,87 @@ class WeatherCache:
         if directory is None:
             directory = self.cache_directory
         if threshold_size is None:
-            threshold_size = int(self.cache_size_limit_mb) * 1024 * 1024
+            threshold_size = int(self.cache_size_limit_mb * 1024 * 1024)
         if cache_cleaning is None:
             cache_cleaning = self.cache_cleaning
 
         if cache_cleaning:
-            current_size = os.path.getsize(directory)
-            if current_size > threshold_size:
-                while current_size <= threshold_size / 2:
-                    self._delete_oldest_and_outdated_file(directory=directory, timeout=timeout)
+            backend = self._backend_for(directory)
+            if backend.total_bytes > threshold_size:
+                with start_span("weathermap.cache.evict", {"bytes": backend.total_bytes}) as span:
+                    evicted = backend.evict(int(threshold_size * self.cache_low_watermark),
+                                            not_before=self._expiry_cutoffs(timeout))
+                    span.set_attribute("evicted", len(evicted))
+                for key in evicted:
+                    self._memory_cache.remove(key)
+                CACHE_EVICTIONS.inc(len(evicted), reason="size")
             else:
                 raise ValueError("Current directory size is not greater than the threshold size.")
         else:
             raise CacheCleaningDisabledError("cache_cleaning is disable. Please enable it use this feature.")
+
+    def sweep(self, cache_timeouts: dict = None):
+        """
+        Delete expired entries and enforce the size limit.
+
+        Expired entries of every request type in cache_timeouts are deleted when cache_cleaning is enabled, then the
+        least recently used entries are evicted down to cache_low_watermark of cache_size_limit_mb when
+        auto_cache_clean_for_exceed_limit is enabled and the limit is exceeded. This is what the background janitor
+        runs, it can also be scheduled by the application.
+
+        :param cache_timeouts: Maximum age per request type, default is the cache_timeouts of this cache.
+        :type cache_timeouts: dict of str to timedelta, optional
+        :return: The keys of the deleted entries.
+        :rtype: list
+        :raises CacheCleaningDisabledError: When the cache system is disabled.
+        """
+        if not self.cache_system:
+            raise CacheCleaningDisabledError("Cache system is disabled.")
+
+        with start_span("weathermap.cache.sweep") as span:
+            evicted = []
+            if self.cache_cleaning:
+                for req_type, not_before in self._expiry_cutoffs(cache_timeouts=cache_timeouts).items():
+                    evicted.extend(self._backend.expire(req_type, not_before))
+            CACHE_EVICTIONS.inc(len(evicted), reason="expired")
+            threshold_size = int(self.cache_size_limit_mb * 1024 * 1024)
+            if self.auto_cache_clean_for_exceed_limit and self._backend.total_bytes > threshold_size:
+                size_evicted = self._backend.evict(int(threshold_size * self.cache_low_watermark))
+                CACHE_EVICTIONS.inc(len(size_evicted), reason="size")
+                evicted.extend(size_evicted)
+            for key in evicted:
+                self._memory_cache.remove(key)
+            span.set_attribute("evicted", len(evicted))
+            span.set_attribute("bytes", self._backend.total_bytes)
+            return evicted
+
+    def start_janitor(self, interval: float):
+        """
+        Sweep the cache every interval seconds in a background thread.
+
+        A single janitor runs per cache directory in a process; if one is already running it is reused, and it sweeps
+        with the longest timeout of each request type among the caches of the directory.
+
+        :param interval: Seconds between two sweeps.
+        :type interval: float
+        :return: The janitor of the cache directory.
+        :rtype: CacheJanitor
+        :raises CacheCleaningDisabledError: When the cache system is disabled.
+        """
+        if not self.cache_system:
+            raise CacheCleaningDisabledError("Cache system is disabled.")
+        return CacheJanitor.for_cache(self, interval)
+
+    def stop_janitor(self, timeout: float = None):
+        """
+        Stop the background janitor of the cache directory and wait for it to finish.
+
+        :param timeout: Maximum number of seconds to wait, default is to wait until the janitor finishes.
+        :type timeout: float, optional
+        """
+        janitor = CacheJanitor.running(self.cache_directory)
+        if janitor is not None:
+            janitor.stop(timeout)
+
+    def _janitor_running(self) -> bool:
+        return CacheJanitor.running(self.cache_directory) is not None
@@ -1,11 +1,51 @@
 from weathermap.weather import Weather
+from weathermap.asyncweather import AsyncWeather
+from weathermap.bulk import fetch_many, FetchResult
+from weathermap.warming import CacheWarmer
 from weathermap.WeatherCache import WeatherCache, CacheCleaningDisabledError
 from weathermap.locationtrack import LocationTrack, LocationError
+from weathermap.gazetteer import Gazetteer, Place
+from weathermap.forecastframe import ForecastFrame
+from weathermap.records import Observation, ForecastPoint, WeatherClient
+from weathermap.session import create_session, get_default_session, set_default_session
+from weathermap.ttlpolicy import TTLPolicy
+from weathermap.metrics import MetricsRegistry
+from weathermap.tracing import RecordingTracer, OpenTelemetryTracer, set_tracer, get_tracer
+from weathermap.ratelimit import RateLimiter, get_default_limiter, set_default_limiter
+from weathermap.resilience import (CircuitBreaker, CircuitOpenError, DeadlineExceededError, get_default_breaker,
+                                   set_default_breaker)
 
 __all__ = [
     "Weather",
+    "AsyncWeather",
+    "fetch_many",
+    "FetchResult",
+    "CacheWarmer",
     "WeatherCache",
     "LocationTrack",
     "LocationError",
+    "Gazetteer",
+    "Place",
+    "ForecastFrame",
+    "Observation",
+    "ForecastPoint",
+    "WeatherClient",
     "CacheCleaningDisabledError",
+    "create_session",
+    "get_default_session",
+    "set_default_session",
+    "TTLPolicy",
+    "MetricsRegistry",
+    "RecordingTracer",
+    "OpenTelemetryTracer",
+    "set_tracer",
+    "get_tracer",
+    "RateLimiter",
+    "get_default_limiter",
+    "set_default_limiter",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "DeadlineExceededError",
+    "get_default_breaker",
+    "set_default_breaker",
 ]
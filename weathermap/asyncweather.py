@@ -0,0 +1,268 @@
+import asyncio
+import copy
+import functools
+import time
+
+import requests
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from .weather import Weather
+from .metrics import HTTP_SECONDS, PARSE_SECONDS, UPSTREAM_REQUESTS
+from .resilience import CircuitOpenError, DeadlineExceededError, RetryableStatusError
+from .singleflight import AsyncSingleFlight
+
+# Requests in flight in the event loops of this process, shared by every AsyncWeather.
+_async_in_flight = AsyncSingleFlight()
+
+
+class AsyncWeather(Weather):
+    """
+    AsyncWeather Class:
+
+    Asyncio version of Weather. It takes the same inputs (city/state/country, lat/lon, zip_code/country, req_type,
+    timeouts and cache options) and exposes the request methods as coroutines:
+
+        weather = await AsyncWeather.create(apikey="231432521352512355", city="Tampa", country="US")
+        current = await weather.get_current_weather()
+        forecast = await weather.get_forecast()
+        await weather.close()
+
+    HTTP requests are sent with aiohttp when it is installed, otherwise through the pooled requests session in the
+    event loop's default executor. Cache reads and writes always run in the executor, so the event loop never waits
+    on the filesystem. Cache keys and timeouts are the ones of Weather, so synchronous and asynchronous workers share
+    one cache directory.
+
+    Concurrent requests of one object do not interfere: each works on its own copy of the request state. Identical
+    requests of an event loop are coalesced when coalesce_requests is enabled, and aiohttp errors are raised as the
+    requests exceptions raised by Weather. The request_deadline, retries, rate limiter and circuit breaker of Weather
+    apply to the aiohttp requests too, and the cached response is returned whatever its age when the API can not be
+    reached.
+
+    Creating an AsyncWeather without a location tracks the location with blocking requests; use create() to run the
+    constructor in the executor.
+    """
+
+    def __init__(
+        self,
+        apikey: str,
+        city: str = None,
+        lat: float = None,
+        lon: float = None,
+        req_type: str = "weather",
+        **kwargs,
+    ):
+        """
+        Initialize the AsyncWeather object.
+
+        Takes the arguments of Weather, plus:
+
+        :keyword aiohttp_session: Session used for the API requests when aiohttp is installed. It is shared and not
+        closed by close(). Default is a session owned by this object.
+        :type aiohttp_session: aiohttp.ClientSession
+        """
+        self.aiohttp_session = None
+        self._owns_aiohttp_session = False
+        if "aiohttp_session" in kwargs:
+            self.aiohttp_session = kwargs["aiohttp_session"]
+            del kwargs["aiohttp_session"]
+        Weather.__init__(self, apikey, city=city, lat=lat, lon=lon, req_type=req_type, **kwargs)
+
+    @classmethod
+    async def create(cls, apikey: str, **kwargs):
+        """
+        Create an AsyncWeather in the executor, so location tracking does not block the event loop.
+
+        :param apikey: Your API key from openweathermap.org
+        :type apikey: str
+        :return: The AsyncWeather object.
+        :rtype: AsyncWeather
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(cls, apikey, **kwargs))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        """
+        Close the aiohttp session owned by this object.
+        """
+        if self._owns_aiohttp_session and self.aiohttp_session is not None:
+            await self.aiohttp_session.close()
+            self.aiohttp_session = None
+            self._owns_aiohttp_session = False
+
+    async def api_request(self, req_type=None):
+        """
+        Make an API request to retrieve weather data without blocking the event loop.
+
+        Same as Weather.api_request().
+
+        :param req_type: The request type ("weather", "forecast", "air_pollution").
+        :type req_type: str, optional
+        :return: Retrieved weather data.
+        :rtype: dict
+        """
+        timeout_param = self._begin_request(req_type)
+        if aiohttp is not None and self.aiohttp_session is None:
+            self.aiohttp_session = aiohttp.ClientSession()
+            self._owns_aiohttp_session = True
+        # The request type of this object may change while the request awaits, the request works on a copy.
+        request = copy.copy(self)
+        data = await request._request(timeout_param)
+        self.data, self.freshness = data, request.freshness
+        return data
+
+    async def _request(self, timeout_param):
+        """
+        Answer the current request from the cache, or fetch it.
+
+        :param timeout_param: Timeout values of the request type.
+        :type timeout_param: dict
+        :return: The response in the units of this object.
+        :rtype: dict
+        """
+        loop = asyncio.get_running_loop()
+        cached = await loop.run_in_executor(None, self._cached_response, timeout_param)
+        if cached is not None:
+            return cached
+
+        try:
+            if self.coalesce_requests:
+                data = await _async_in_flight.do(self._request_identity(), lambda: self._fetch_async(timeout_param))
+            else:
+                data = await self._fetch_async(timeout_param)
+        except requests.exceptions.RequestException:
+            fallback = await loop.run_in_executor(None, self._fallback_response, timeout_param)
+            if fallback is None:
+                raise
+            return fallback
+        self.freshness = {"source": "network", "age": 0.0, "stale": False}
+        return self._in_requested_units(data)
+
+    async def _fetch_async(self, timeout_param):
+        """
+        Request the API and cache the response.
+
+        :param timeout_param: Timeout values of the request type.
+        :type timeout_param: dict
+        :return: The API response, in the units of the API request (see _api_units()).
+        :rtype: dict
+        """
+        loop = asyncio.get_running_loop()
+        url, error_hint = self._request_url()
+        cached_error = await loop.run_in_executor(None, self._cached_error, url)
+        if cached_error is not None:
+            self._check_response(cached_error, error_hint)
+        data = await self._async_http_get_json(url)
+        if not self._response_ok(data):
+            await loop.run_in_executor(None, self._store_error, data, url)
+        self._check_response(data, error_hint)
+        await loop.run_in_executor(None, self._store_response, data, timeout_param)
+        return data
+
+    async def _async_http_get_json(self, url):
+        """
+        Send a GET request and decode its JSON body, within the request_deadline.
+
+        Connection errors, timeouts and server errors (HTTP 5xx) are retried like the requests of Weather (see
+        Weather._http_get()), and the request fails fast while the circuit breaker is open.
+
+        :param url: The url to request.
+        :type url: str
+        :return: The decoded response.
+        :rtype: dict
+        :raises CircuitOpenError: When the circuit breaker is open.
+        :raises DeadlineExceededError: When the request can not complete before the request_deadline.
+        :raises requests.exceptions.RequestException: When the last attempt fails, aiohttp errors being raised as
+        requests.exceptions.Timeout and requests.exceptions.ConnectionError.
+        """
+        if aiohttp is None:
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(None, self._http_get, url)
+            return self._parse_response(response)
+
+        breaker = self.circuit_breaker
+        if breaker is not None and not breaker.allow():
+            raise CircuitOpenError("OpenWeather is unavailable, requests are answered from the cache.")
+        deadline = None if self.request_deadline is None else time.monotonic() + self.request_deadline
+
+        attempt = 0
+        while True:
+            try:
+                data = await self._async_send(url, deadline)
+            except DeadlineExceededError:
+                # Raised before the attempt was sent, e.g. waiting for the rate limiter: only the earlier attempts
+                # failed upstream.
+                if attempt and breaker is not None:
+                    breaker.record_failure()
+                raise
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout, RetryableStatusError) as e:
+                await asyncio.sleep(self._retry_delay(attempt, e, deadline))
+                attempt += 1
+                continue
+            except requests.exceptions.RequestException:
+                if breaker is not None:
+                    breaker.record_failure()
+                raise
+            if breaker is not None:
+                breaker.record_success()
+            return data
+
+    async def _async_send(self, url, deadline):
+        """
+        Send a GET request with aiohttp once the rate limiter admits it, with its total timeout cut to the deadline.
+
+        :param url: The url to request.
+        :type url: str
+        :param deadline: time.monotonic() time the request must complete by, None for no deadline.
+        :type deadline: float
+        :return: The decoded response.
+        :rtype: dict
+        :raises DeadlineExceededError: When the deadline passes before the request is sent.
+        :raises RetryableStatusError: When the API answers with a server error (HTTP 5xx).
+        """
+        remaining = None
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise DeadlineExceededError("Request deadline exceeded.")
+        loop = asyncio.get_running_loop()
+        if not await loop.run_in_executor(None, self._acquire_rate_limit, remaining):
+            raise DeadlineExceededError("Request deadline exceeded waiting for the rate limiter.")
+        total = None if deadline is None else max(deadline - time.monotonic(), 0.001)
+        timeout = aiohttp.ClientTimeout(total=total, connect=self.connect_timeout, sock_read=self.read_timeout)
+
+        start = time.perf_counter()
+        try:
+            async with self.aiohttp_session.get(url, timeout=timeout) as response:
+                HTTP_SECONDS.observe(time.perf_counter() - start, req_type=self.req_type)
+                UPSTREAM_REQUESTS.inc(req_type=self.req_type, status=response.status)
+                self._record_rate_limit(response.status, response.headers)
+                if response.status >= 500:
+                    raise RetryableStatusError(f"{response.status} Server Error for url: {self.base_url}")
+                start = time.perf_counter()
+                try:
+                    # OpenWeather error bodies are JSON too, whatever their content type.
+                    return await response.json(content_type=None)
+                finally:
+                    PARSE_SECONDS.observe(time.perf_counter() - start, req_type=self.req_type)
+        except asyncio.TimeoutError as e:
+            UPSTREAM_REQUESTS.inc(req_type=self.req_type, status="error")
+            raise requests.exceptions.Timeout(f"Request timed out for url: {self.base_url}") from e
+        except aiohttp.ClientError as e:
+            UPSTREAM_REQUESTS.inc(req_type=self.req_type, status="error")
+            raise requests.exceptions.ConnectionError(str(e)) from e
+
+    async def get_current_weather(self):
+        return await self.api_request(req_type="weather")
+
+    async def get_forecast(self):
+        return await self.api_request(req_type="forecast")
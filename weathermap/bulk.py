@@ -0,0 +1,114 @@
+import copy
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .weather import Weather
+
+FetchResult = namedtuple("FetchResult", ["location", "req_type", "data", "error", "cached"])
+FetchResult.__doc__ = """
+Result of one location and request type of fetch_many().
+
+:param location: The location as given to fetch_many().
+:param req_type: The request type.
+:param data: The API response, None when the request failed.
+:param error: The exception raised for this item, None when it succeeded.
+:param cached: True when the response was served from the cache.
+"""
+
+
+def _fetch_miss(weather):
+    """
+    Fetch the current request of a Weather whose cache lookup missed, without looking the cache up again.
+    """
+    return weather._fetch_missed(weather._begin_request())
+
+
+def fetch_many(locations, apikey: str, req_types=("weather",), max_workers: int = 8, **kwargs):
+    """
+    Fetch weather data for many locations, yielding results in completion order.
+
+    Cache hits are resolved first, without any thread, by one Weather per location for all of its request types. The
+    remaining requests are deduplicated by location, request type and units, so identical locations cost one API call,
+    and sent concurrently on a thread pool of max_workers threads. A failure, whatever its exception, is reported in
+    the result of its items and does not stop the batch.
+
+    The misses are sent no faster than the rate limiter allows when one is configured (see Weather's rate_limiter):
+    at 60 requests per minute, 5,000 uncached locations take about 83 minutes whatever max_workers is.
+
+    Example:
+        for result in fetch_many([{"city": "Tampa", "country": "US"}, {"lat": 41.4, "lon": -23.4}], apikey=key,
+                                 req_types=("weather", "forecast")):
+            if result.error is None:
+                print(result.location, result.req_type, result.data)
+
+    :param locations: Locations to fetch. Each one is a dict of Weather location arguments (city, state, country,
+    lat, lon, zip_code) or a city name.
+    :type locations: iterable
+    :param apikey: Your API key from openweathermap.org
+    :type apikey: str
+    :param req_types: Request types to fetch for every location, default is ("weather",).
+    :type req_types: tuple
+    :param max_workers: Maximum number of concurrent API requests, default is 8.
+    :type max_workers: int
+    :param kwargs: Other Weather arguments applied to every location (units, cache options, session...).
+    :return: Generator of FetchResult.
+    :rtype: generator
+    """
+    req_types = tuple(req_types)
+    if not req_types:
+        return
+    pending = {}
+    for location in locations:
+        location_kwargs = {"city": location} if isinstance(location, str) else dict(location)
+        try:
+            weather = Weather(apikey=apikey, req_type=req_types[0], track_location=False, **location_kwargs, **kwargs)
+        except Exception as e:
+            for req_type in req_types:
+                yield FetchResult(location, req_type, None, e, False)
+            continue
+
+        for req_type in req_types:
+            try:
+                timeout_param = weather._begin_request(req_type)
+                identity = weather._request_identity()
+                if identity in pending:
+                    pending[identity][2].append(location)
+                    continue
+                cached = weather._cached_response(timeout_param)
+            except Exception as e:
+                yield FetchResult(location, req_type, None, e, False)
+                continue
+
+            if cached is not None:
+                pending[identity] = (None, req_type, [location], cached)
+                yield FetchResult(location, req_type, cached, None, True)
+            else:
+                # The Weather of the location moves on to its next request type, the miss is fetched by a copy.
+                pending[identity] = (copy.copy(weather), req_type, [location], None)
+
+    # Duplicates of cache hits are served from the first hit.
+    misses = []
+    for weather, req_type, group, cached in pending.values():
+        if cached is None:
+            misses.append((weather, group))
+        else:
+            for location in group[1:]:
+                yield FetchResult(location, req_type, cached, None, True)
+    if not misses:
+        return
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    futures = {executor.submit(_fetch_miss, weather): (weather, group) for weather, group in misses}
+    try:
+        for future in as_completed(futures):
+            weather, group = futures[future]
+            try:
+                data, error = future.result(), None
+            except Exception as e:
+                data, error = None, e
+            for location in group:
+                yield FetchResult(location, weather.req_type, data, error, False)
+    finally:
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
@@ -0,0 +1,751 @@
+import os
+import re
+import abc
+import json
+import heapq
+import time
+import sqlite3
+import threading
+from datetime import datetime
+
+from .singleflight import FileLock
+
+
+def _normalize_key_part(value) -> str:
+    """
+    Upper case a cache key component and replace anything that is not a letter or digit with '-'.
+
+    :param value: The component to normalize.
+    :type value: str
+    :return: The normalized component.
+    :rtype: str
+    """
+    return re.sub(r"[^0-9A-Z]+", "-", str(value).upper())
+
+
+class CacheManifest:
+    """
+    CacheManifest Class:
+
+    Index of the cache directory which maps a deterministic cache key to the file holding its data together with the
+    time it was created, the time it expires and its request type. The index is kept in memory and mirrored on disk
+    as an append-only journal (``manifest.jsonl``), so every update costs a single line write instead of rewriting the
+    whole index. The journal is compacted when it grows to more than twice the number of live entries. Each entry
+    records the size of its file and the manifest keeps the running total in ``total_bytes``.
+
+    The manifest is owned by the FileCacheBackend of its directory, which is shared by every WeatherCache pointing at
+    that directory in a process. Processes sharing the directory append to the same journal under a lock file
+    (``manifest.lock``): before each update, and when merge() is called, the lines the other processes appended since
+    the last read are applied, and the whole journal is read again once another process compacted it. A directory
+    created by an older version (timestamped file names and no journal) is indexed once from the file names and the
+    journal is written from that.
+
+    :param directory: The cache directory to index.
+    :type directory: str
+    :param on_merge: Called with the records applied from the journal of other processes, or with None when the
+    index was read again from scratch, default is None.
+    :type on_merge: callable, optional
+    """
+    journal_name = "manifest.jsonl"
+    lock_name = "manifest.lock"
+
+    def __init__(self, directory: str, on_merge=None):
+        self.directory = directory
+        self.journal_path = os.path.join(directory, self.journal_name)
+        self.lock_path = os.path.join(directory, self.lock_name)
+        self.on_merge = on_merge
+        self.entries = {}
+        self.total_bytes = 0
+        self._journal_lines = 0
+        # Identity of the journal file and number of bytes of it applied to the index.
+        self._journal_id = None
+        self._offset = 0
+        self._lock = threading.RLock()
+        with self._lock, FileLock(self.lock_path):
+            self._load()
+
+    def _load(self):
+        """
+        Load the journal from disk, or index the directory when there is no journal yet.
+        """
+        if not os.path.exists(self.journal_path):
+            self._index_legacy_files()
+            self._compact()
+            return
+
+        self._read_journal()
+        missing_size = False
+        for record in self.entries.values():
+            if 'size' not in record:
+                # Journals written before sizes were recorded.
+                record['size'] = self._file_size(record['path'])
+                self.total_bytes += record['size']
+                missing_size = True
+        if missing_size or self._journal_lines > 2 * len(self.entries) + 16:
+            self._compact()
+
+    def _read_journal(self) -> list:
+        """
+        Apply the complete lines of the journal past the bytes already read.
+
+        :return: The applied records.
+        :rtype: list
+        """
+        try:
+            with open(self.journal_path, 'rb') as file:
+                self._journal_id = self._file_id(os.fstat(file.fileno()))
+                file.seek(self._offset)
+                chunk = file.read()
+        except FileNotFoundError:
+            return []
+        # A line another process is still writing is read by the next merge.
+        end = chunk.rfind(b"\n") + 1
+        self._offset += end
+        records = []
+        for line in chunk[:end].splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A torn line from an interrupted write, the rest of the journal is still valid.
+                continue
+            self._journal_lines += 1
+            self._apply(record)
+            records.append(record)
+        return records
+
+    def _apply(self, record: dict):
+        previous = self.entries.pop(record['key'], None)
+        if previous is not None:
+            self.total_bytes -= previous.get('size', 0)
+        if not record.get('deleted'):
+            self.entries[record['key']] = record
+            self.total_bytes += record.get('size', 0)
+        return previous
+
+    @staticmethod
+    def _file_id(stat) -> tuple:
+        return stat.st_dev, stat.st_ino
+
+    def merge(self):
+        """
+        Apply the journal lines appended by other processes since the journal was last read, or read the whole journal
+        again when another process compacted it.
+        """
+        with self._lock:
+            try:
+                stat = os.stat(self.journal_path)
+            except FileNotFoundError:
+                return
+            if self._file_id(stat) != self._journal_id:
+                self.entries = {}
+                self.total_bytes = 0
+                self._journal_lines = 0
+                self._offset = 0
+                self._read_journal()
+                if self.on_merge is not None:
+                    self.on_merge(None)
+            elif stat.st_size > self._offset:
+                records = self._read_journal()
+                if records and self.on_merge is not None:
+                    self.on_merge(records)
+
+    def _index_legacy_files(self):
+        """
+        Index cache files named ``<location>_<req>_<%Y-%m-%d_%H-%M>.json``, keeping the newest file per key.
+        """
+        req_types = {req_type[0:3]: req_type for req_type in ('weather', 'forecast', 'air_pollution')}
+        try:
+            filenames = os.listdir(self.directory)
+        except OSError:
+            return
+        for filename in filenames:
+            if not filename.endswith(".json"):
+                continue
+            try:
+                file_location, file_req_type, file_time_str = filename[:-5].split("_", 2)
+                created_at = datetime.strptime(file_time_str, '%Y-%m-%d_%H-%M').timestamp()
+            except ValueError:
+                continue
+            if file_req_type not in req_types:
+                continue
+            key = f"{_normalize_key_part(file_location)}_{file_req_type}"
+            if key not in self.entries or self.entries[key]['created_at'] < created_at:
+                self.entries[key] = {"key": key, "path": filename, "created_at": created_at,
+                                     "req_type": req_types[file_req_type], "size": self._file_size(filename)}
+        self.total_bytes = sum(record['size'] for record in self.entries.values())
+
+    def _file_size(self, filename: str) -> int:
+        try:
+            return os.path.getsize(os.path.join(self.directory, filename))
+        except OSError:
+            return 0
+
+    def _update(self, record: dict):
+        """
+        Apply a record and append it to the journal, after the lines of the other processes. Returns the entry the
+        record replaced or deleted.
+        """
+        with self._lock, FileLock(self.lock_path):
+            self.merge()
+            previous = self._apply(record)
+            if record.get('deleted') and previous is None:
+                return None
+            with open(self.journal_path, 'ab') as file:
+                file.write((json.dumps(record) + "\n").encode("utf-8"))
+                self._journal_id = self._file_id(os.fstat(file.fileno()))
+                self._offset = file.tell()
+            self._journal_lines += 1
+            if self._journal_lines > 2 * len(self.entries) + 16:
+                self._compact()
+            return previous
+
+    def _compact(self):
+        """
+        Rewrite the journal with one line per live entry. Called holding the lock file, after a merge, so the entries
+        of the other processes are kept.
+        """
+        temp_path = f"{self.journal_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as file:
+            for record in self.entries.values():
+                file.write((json.dumps(record) + "\n").encode("utf-8"))
+        os.replace(temp_path, self.journal_path)
+        stat = os.stat(self.journal_path)
+        self._journal_id = self._file_id(stat)
+        self._offset = stat.st_size
+        self._journal_lines = len(self.entries)
+
+    def get(self, key: str):
+        """
+        Return the manifest entry of a key, or None when the key is not cached.
+
+        :param key: The cache key.
+        :type key: str
+        :return: Entry with ``path``, ``created_at``, ``req_type``, ``size`` and ``expires_at`` (missing in the entries
+        of older versions).
+        :rtype: dict or None
+        """
+        return self.entries.get(key)
+
+    def set(self, key: str, path: str, created_at: float, req_type: str, size: int = 0, expires_at: float = None):
+        """
+        Add or replace the entry of a key.
+
+        :param key: The cache key.
+        :type key: str
+        :param path: File name of the entry relative to the cache directory.
+        :type path: str
+        :param created_at: Creation time as a POSIX timestamp.
+        :type created_at: float
+        :param req_type: The request type of the cached data.
+        :type req_type: str
+        :param size: Size of the file in bytes.
+        :type size: int
+        :param expires_at: Expiry time as a POSIX timestamp, default is None (no expiry time).
+        :type expires_at: float, optional
+        :return: The replaced entry.
+        :rtype: dict or None
+        """
+        return self._update({"key": key, "path": path, "created_at": created_at, "req_type": req_type, "size": size,
+                             "expires_at": expires_at})
+
+    def remove(self, key: str):
+        """
+        Remove the entry of a key if it exists.
+
+        :param key: The cache key.
+        :type key: str
+        :return: The removed entry.
+        :rtype: dict or None
+        """
+        return self._update({"key": key, "deleted": True})
+
+
+class CacheBackend(abc.ABC):
+    """
+    CacheBackend Class:
+
+    Storage of the cache entries of a directory. An entry is identified by its cache key and stores the serialized
+    data together with its location key, request type, creation time and expiry time. The creation time is the time
+    the data was fetched; the expiry time, when given, keeps expire() from deleting an entry before it. Backends are
+    shared by every WeatherCache using the same directory in a process, see for_directory().
+
+    Backends keep a running total of the stored bytes in ``total_bytes`` and track the last access of every entry, so
+    evict() can bring the cache under a byte target by deleting expired entries first and then the least recently
+    used ones, without rescanning the cache for every deletion. Backends implement every method below, an incomplete
+    backend can not be constructed.
+
+    Methods:
+    - read(key, not_before): Return (data, created_at, size, expires_at) of an entry created at or after not_before,
+      else None.
+    - write(key, location_key, req_type, serialized, created_at, expires_at): Add or replace an entry.
+    - touch(key): Record an access to an entry served from another tier.
+    - delete(key): Delete an entry.
+    - expire(req_type, not_before, key=None): Delete the expired entries of a request type created before not_before.
+    - evict(target_bytes, not_before): Delete expired, then least recently used entries until under target_bytes.
+    - delete_oldest(): Delete the oldest entry.
+    """
+    _backends = {}
+    _backends_lock = threading.Lock()
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def for_directory(cls, directory: str):
+        """
+        Return the backend shared by every cache using the given directory, opening it on first use.
+
+        :param directory: The cache directory.
+        :type directory: str
+        :return: The backend of the directory.
+        :rtype: CacheBackend
+        """
+        registry_key = (cls, os.path.abspath(directory))
+        with CacheBackend._backends_lock:
+            backend = CacheBackend._backends.get(registry_key)
+            if backend is None:
+                backend = cls(directory)
+                CacheBackend._backends[registry_key] = backend
+            return backend
+
+    @abc.abstractmethod
+    def read(self, key: str, not_before: float = 0):
+        """
+        Read an entry and record the access.
+
+        :param key: The cache key.
+        :type key: str
+        :param not_before: Entries created before this POSIX timestamp are treated as missing.
+        :type not_before: float
+        :return: Tuple of the data, its creation time, its serialized size and its expiry time (None when it has none),
+        or None.
+        :rtype: tuple or None
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def write(self, key: str, location_key: str, req_type: str, serialized: str, created_at: float,
+              expires_at: float = None):
+        """
+        Add or replace an entry.
+
+        :param key: The cache key.
+        :type key: str
+        :param location_key: The location part of the cache key.
+        :type location_key: str
+        :param req_type: The request type of the data.
+        :type req_type: str
+        :param serialized: The JSON encoded data.
+        :type serialized: str
+        :param created_at: Creation time as a POSIX timestamp.
+        :type created_at: float
+        :param expires_at: Expiry time as a POSIX timestamp, default is None (no expiry time).
+        :type expires_at: float, optional
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def touch(self, key: str):
+        """
+        Record an access to an entry which was served without reading it from the backend.
+
+        :param key: The cache key.
+        :type key: str
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def delete(self, key: str) -> bool:
+        """
+        Delete an entry.
+
+        :param key: The cache key.
+        :type key: str
+        :return: True if the entry existed.
+        :rtype: bool
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def expire(self, req_type: str, not_before: float, key: str = None) -> list:
+        """
+        Delete the entries of a request type created before not_before, except the ones whose expiry time is still
+        to come.
+
+        :param req_type: The request type.
+        :type req_type: str
+        :param not_before: POSIX timestamp before which entries are expired.
+        :type not_before: float
+        :param key: Only expire this entry, default is every entry of the request type.
+        :type key: str, optional
+        :return: The keys of the deleted entries.
+        :rtype: list
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def evict(self, target_bytes: int, not_before: dict = None) -> list:
+        """
+        Delete expired entries, then the least recently used ones until the cache holds at most target_bytes.
+
+        :param target_bytes: Size in bytes to bring the cache under.
+        :type target_bytes: int
+        :param not_before: Expiry POSIX timestamp per request type, entries created before it are deleted first.
+        :type not_before: dict, optional
+        :return: The keys of the deleted entries.
+        :rtype: list
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def delete_oldest(self):
+        """
+        Delete the oldest entry.
+
+        :return: The key of the deleted entry, or None when the cache is empty.
+        :rtype: str or None
+        """
+        raise NotImplementedError
+
+
+class FileCacheBackend(CacheBackend):
+    """
+    FileCacheBackend Class:
+
+    Stores every entry as its own ``<key>.json`` file, indexed by a CacheManifest.
+
+    Eviction uses lazy heaps: every write or access pushes a (timestamp, key) pair and outdated pairs are skipped when
+    popped, so deleting k entries costs O(k log n). The heaps are rebuilt once they hold more than twice the number of
+    entries. Last accesses are only kept in memory; after a restart, and for the entries written by other processes,
+    entries start with their creation time.
+
+    The entries written by other processes sharing the directory are merged from the manifest journal on a miss and
+    before expiry and eviction, so a process waiting on a cache_file_lock finds the entry the lock holder wrote.
+    """
+
+    def __init__(self, directory: str):
+        super().__init__(directory)
+        self._lock = threading.RLock()
+        self.manifest = CacheManifest(directory, on_merge=self._merged)
+        self._last_access = {key: entry['created_at'] for key, entry in self.manifest.entries.items()}
+        self._rebuild_heaps()
+
+    @property
+    def total_bytes(self):
+        return self.manifest.total_bytes
+
+    def _rebuild_heaps(self):
+        self._access_heap = [(last_access, key) for key, last_access in self._last_access.items()]
+        heapq.heapify(self._access_heap)
+        self._expiry_heaps = {}
+        for key, entry in self.manifest.entries.items():
+            self._expiry_heaps.setdefault(entry['req_type'], []).append((entry['created_at'], key))
+        for heap in self._expiry_heaps.values():
+            heapq.heapify(heap)
+
+    def _record_access(self, key: str, timestamp: float):
+        self._last_access[key] = timestamp
+        heapq.heappush(self._access_heap, (timestamp, key))
+        if len(self._access_heap) > 2 * len(self._last_access) + 64:
+            self._rebuild_heaps()
+
+    def _merged(self, records):
+        """
+        Index the entries merged from the journal of other processes, every entry when records is None.
+        """
+        with self._lock:
+            if records is None:
+                self._last_access = {key: self._last_access.get(key, entry['created_at'])
+                                     for key, entry in self.manifest.entries.items()}
+                self._rebuild_heaps()
+                return
+            for record in records:
+                if record.get('deleted'):
+                    self._last_access.pop(record['key'], None)
+                else:
+                    heapq.heappush(self._expiry_heaps.setdefault(record['req_type'], []),
+                                   (record['created_at'], record['key']))
+                    self._record_access(record['key'], record['created_at'])
+
+    def _merge(self):
+        with self._lock:
+            self.manifest.merge()
+
+    def read(self, key: str, not_before: float = 0):
+        entry = self.manifest.get(key)
+        if entry is None or entry['created_at'] < not_before:
+            # Another process may have written the entry since the journal was last read.
+            self._merge()
+            entry = self.manifest.get(key)
+            if entry is None or entry['created_at'] < not_before:
+                return None
+        try:
+            with open(os.path.join(self.directory, entry['path']), 'r') as file:
+                serialized = file.read()
+        except FileNotFoundError:
+            # The file was removed behind the manifest's back.
+            self.delete(key)
+            return None
+        try:
+            data = json.loads(serialized)
+        except ValueError:
+            self.delete(key)
+            return None
+        self.touch(key)
+        return data, entry['created_at'], len(serialized), entry.get('expires_at')
+
+    def write(self, key: str, location_key: str, req_type: str, serialized: str, created_at: float,
+              expires_at: float = None):
+        filename = f"{key}.json"
+        filepath = os.path.join(self.directory, filename)
+        # Readers never see a partially written file, the complete file replaces the previous one.
+        temp_path = f"{filepath}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w') as file:
+            file.write(serialized)
+        os.replace(temp_path, filepath)
+
+        with self._lock:
+            previous = self.manifest.set(key, filename, created_at, req_type, len(serialized), expires_at)
+            heapq.heappush(self._expiry_heaps.setdefault(req_type, []), (created_at, key))
+            self._record_access(key, created_at)
+        if previous is not None and previous['path'] != filename:
+            self._remove_file(previous['path'])
+
+    def touch(self, key: str):
+        with self._lock:
+            if key in self._last_access:
+                self._record_access(key, time.time())
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            entry = self.manifest.remove(key)
+            self._last_access.pop(key, None)
+        if entry is None:
+            return False
+        self._remove_file(entry['path'])
+        return True
+
+    @staticmethod
+    def _expired(entry, not_before: float, now: float) -> bool:
+        return entry['created_at'] < not_before and (entry.get('expires_at') is None or entry['expires_at'] <= now)
+
+    def expire(self, req_type: str, not_before: float, key: str = None) -> list:
+        now = time.time()
+        if key is not None:
+            entry = self.manifest.get(key)
+            if entry and entry['req_type'] == req_type and self._expired(entry, not_before, now) and self.delete(key):
+                return [key]
+            return []
+
+        expired = []
+        with self._lock:
+            self._merge()
+            heap = self._expiry_heaps.get(req_type, [])
+            kept = []
+            while heap and heap[0][0] < not_before:
+                created_at, entry_key = heapq.heappop(heap)
+                entry = self.manifest.get(entry_key)
+                if not entry or entry['created_at'] != created_at or entry['req_type'] != req_type:
+                    continue
+                if self._expired(entry, not_before, now):
+                    self.delete(entry_key)
+                    expired.append(entry_key)
+                else:
+                    kept.append((created_at, entry_key))
+            for item in kept:
+                heapq.heappush(heap, item)
+        return expired
+
+    def evict(self, target_bytes: int, not_before: dict = None) -> list:
+        evicted = []
+        with self._lock:
+            self._merge()
+            for req_type, req_not_before in (not_before or {}).items():
+                evicted.extend(self.expire(req_type, req_not_before))
+            while self.total_bytes > target_bytes and self._access_heap:
+                last_access, key = heapq.heappop(self._access_heap)
+                if self._last_access.get(key) == last_access:
+                    self.delete(key)
+                    evicted.append(key)
+        return evicted
+
+    def delete_oldest(self):
+        self._merge()
+        entries = list(self.manifest.entries.values())
+        if not entries:
+            return None
+        oldest = min(entries, key=lambda entry: entry['created_at'])
+        self.delete(oldest['key'])
+        return oldest['key']
+
+    def _remove_file(self, filename: str):
+        try:
+            os.remove(os.path.join(self.directory, filename))
+        except FileNotFoundError:
+            pass
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    SQLiteCacheBackend Class:
+
+    Stores every entry as a row of a single SQLite database (``weather_cache.sqlite3``) in WAL mode, so readers do not
+    block the writer and the cache directory holds a handful of files whatever the number of entries. Rows are
+    indexed on (location_key, req_type, fetched_at) for lookups, on (req_type, fetched_at) for expiry and on
+    last_access for eviction. Each thread uses its own connection.
+
+    Accesses are buffered in memory and written in one batch before an eviction, so a cache hit stays a single read
+    query. The running byte total is resynchronised with the database at the start of every eviction, which picks up
+    the writes of other processes.
+    """
+    database_name = "weather_cache.sqlite3"
+    eviction_batch_size = 64
+
+    def __init__(self, directory: str):
+        super().__init__(directory)
+        self.path = os.path.join(directory, self.database_name)
+        self._local = threading.local()
+        self._lock = threading.RLock()
+        self._pending_access = {}
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                location_key TEXT NOT NULL,
+                req_type TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL,
+                data TEXT NOT NULL,
+                expires_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS cache_entries_lookup ON cache_entries (location_key, req_type, fetched_at);
+            CREATE INDEX IF NOT EXISTS cache_entries_expiry ON cache_entries (req_type, fetched_at);
+            CREATE INDEX IF NOT EXISTS cache_entries_access ON cache_entries (last_access);
+            """
+        )
+        columns = [row[1] for row in connection.execute("PRAGMA table_info(cache_entries)")]
+        if "expires_at" not in columns:
+            # Databases created before entries had an expiry time.
+            try:
+                connection.execute("ALTER TABLE cache_entries ADD COLUMN expires_at REAL")
+            except sqlite3.OperationalError:
+                # Added by another process in the meantime.
+                pass
+        self._sync_total_bytes()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _sync_total_bytes(self):
+        row = self._connection().execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()
+        self.total_bytes = row[0]
+
+    def read(self, key: str, not_before: float = 0):
+        row = self._connection().execute(
+            "SELECT data, fetched_at, size, expires_at FROM cache_entries WHERE key = ? AND fetched_at >= ?",
+            (key, not_before),
+        ).fetchone()
+        if row is None:
+            return None
+        self.touch(key)
+        return json.loads(row[0]), row[1], row[2], row[3]
+
+    def write(self, key: str, location_key: str, req_type: str, serialized: str, created_at: float,
+              expires_at: float = None):
+        connection = self._connection()
+        with self._lock:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                previous = connection.execute("SELECT size FROM cache_entries WHERE key = ?", (key,)).fetchone()
+                connection.execute(
+                    "INSERT OR REPLACE INTO cache_entries "
+                    "(key, location_key, req_type, fetched_at, last_access, size, data, expires_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, location_key, req_type, created_at, created_at, len(serialized), serialized, expires_at),
+                )
+                connection.execute("COMMIT")
+            except sqlite3.Error:
+                connection.execute("ROLLBACK")
+                raise
+            self.total_bytes += len(serialized) - (previous[0] if previous else 0)
+            self._pending_access.pop(key, None)
+
+    def touch(self, key: str):
+        self._pending_access[key] = time.time()
+
+    def _flush_access(self):
+        with self._lock:
+            pending, self._pending_access = self._pending_access, {}
+        if pending:
+            self._connection().executemany(
+                "UPDATE cache_entries SET last_access = ? WHERE key = ?",
+                [(last_access, key) for key, last_access in pending.items()],
+            )
+
+    def delete(self, key: str) -> bool:
+        return bool(self._delete_selected("SELECT key, size FROM cache_entries WHERE key = ?", (key,)))
+
+    def expire(self, req_type: str, not_before: float, key: str = None) -> list:
+        query = ("SELECT key, size FROM cache_entries WHERE req_type = ? AND fetched_at < ? "
+                 "AND (expires_at IS NULL OR expires_at <= ?)")
+        parameters = (req_type, not_before, time.time())
+        if key is not None:
+            query += " AND key = ?"
+            parameters += (key,)
+        return self._delete_selected(query, parameters)
+
+    def evict(self, target_bytes: int, not_before: dict = None) -> list:
+        self._flush_access()
+        self._sync_total_bytes()
+        evicted = []
+        for req_type, req_not_before in (not_before or {}).items():
+            evicted.extend(self.expire(req_type, req_not_before))
+        while self.total_bytes > target_bytes:
+            deleted = self._delete_selected(
+                "SELECT key, size FROM cache_entries ORDER BY last_access LIMIT ?", (self.eviction_batch_size,),
+                target_bytes=target_bytes,
+            )
+            if not deleted:
+                break
+            evicted.extend(deleted)
+        return evicted
+
+    def delete_oldest(self):
+        deleted = self._delete_selected("SELECT key, size FROM cache_entries ORDER BY fetched_at LIMIT 1", ())
+        return deleted[0] if deleted else None
+
+    def _delete_selected(self, query: str, parameters: tuple, target_bytes: int = None) -> list:
+        """
+        Delete the entries whose keys and sizes are returned by a query, in one transaction.
+
+        When target_bytes is given, deletion stops as soon as the running total is at or under it.
+        """
+        connection = self._connection()
+        with self._lock:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                keys = []
+                freed = 0
+                for key, size in connection.execute(query, parameters).fetchall():
+                    if target_bytes is not None and self.total_bytes - freed <= target_bytes:
+                        break
+                    keys.append(key)
+                    freed += size
+                connection.executemany("DELETE FROM cache_entries WHERE key = ?", [(key,) for key in keys])
+                connection.execute("COMMIT")
+            except sqlite3.Error:
+                connection.execute("ROLLBACK")
+                raise
+            self.total_bytes -= freed
+            for key in keys:
+                self._pending_access.pop(key, None)
+        return keys
@@ -0,0 +1,270 @@
+from datetime import datetime
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Main condition of the OpenWeather condition codes by hundreds, 800 being "Clear".
+_CONDITION_GROUPS = {2: "Thunderstorm", 3: "Drizzle", 5: "Rain", 6: "Snow", 7: "Atmosphere", 8: "Clouds"}
+
+
+def condition_name(code: int) -> str:
+    """
+    Return the main condition of an OpenWeather condition code, e.g. "Rain" for 501.
+
+    :param code: The condition code, weather[0].id of a response.
+    :type code: int
+    :return: The main condition, "" for unknown codes.
+    :rtype: str
+    """
+    if code == 800:
+        return "Clear"
+    return _CONDITION_GROUPS.get(int(code) // 100, "")
+
+
+class ForecastFrame:
+    """
+    ForecastFrame Class:
+
+    Columnar view of a forecast response, built in one pass over its "list". Each field is a NumPy array with one
+    value per forecast step, so charts and aggregates read whole columns instead of walking nested dictionaries:
+
+        frame = weather.forecast_frame()
+        frame.temp.max(), frame.dt, frame.condition
+
+    Missing values, such as the gusts of a calm step, are NaN, except rain and snow which are 0 for a dry step.
+    Slicing a frame by position (frame[:8]) or by time (frame.window(start, end)) returns a frame sharing the arrays
+    of the original, no data is copied. Frames must be treated as read-only.
+
+    Requires NumPy.
+
+    :param columns: Arrays of the frame by column name, of equal length.
+    :type columns: dict
+    :param city: Name of the forecast location.
+    :type city: str, optional
+    :param timezone_offset: Offset of the location's timezone from UTC in seconds.
+    :type timezone_offset: int
+
+    Columns:
+    - dt: Timestamps, int64 seconds since the epoch (UTC).
+    - temp, feels_like, temp_min, temp_max: Temperatures, in the units of the response.
+    - humidity: Humidity in %.
+    - pressure: Pressure in hPa.
+    - wind_speed, wind_gust: Wind speeds, in the units of the response.
+    - wind_deg: Wind direction in degrees.
+    - clouds: Cloudiness in %.
+    - pop: Probability of precipitation between 0 and 1.
+    - rain, snow: Precipitation volume of the step in mm.
+    - condition_id: OpenWeather condition codes.
+    - condition: Main conditions ("Clear", "Clouds", "Rain"...).
+    - description: Condition descriptions.
+
+    Methods:
+    - from_response(data): Build the frame of a forecast response.
+    - window(start, end): Return the steps between two times, without copying.
+    - locate(start, end): Return the slice of the steps between two times.
+    - resample(step): Return the frame interpolated to a regular time step, hourly by default.
+    - daily(): Return the daily minimum, maximum and mean temperatures and precipitation in the location's timezone.
+    - times(): Return the timestamps as datetime64.
+    - dt_txt(): Return the timestamps as OpenWeather's "YYYY-MM-DD HH:MM:SS" strings.
+    """
+    FLOAT_COLUMNS = ("temp", "feels_like", "temp_min", "temp_max", "humidity", "pressure", "wind_speed",
+                     "wind_deg", "wind_gust", "clouds", "pop", "rain", "snow")
+    COLUMNS = ("dt",) + FLOAT_COLUMNS + ("condition_id", "condition", "description")
+
+    def __init__(self, columns: dict, city: str = None, timezone_offset: int = 0):
+        if np is None:
+            raise ImportError("ForecastFrame requires NumPy, install it with 'pip install numpy'.")
+        self._columns = columns
+        self.city = city
+        self.timezone_offset = timezone_offset
+
+    @classmethod
+    def from_response(cls, data: dict):
+        """
+        Build the frame of a forecast response.
+
+        :param data: A forecast response of the API.
+        :type data: dict
+        :return: The frame, ordered by time as the response.
+        :rtype: ForecastFrame
+        :raises ValueError: When the response has no forecast list.
+        """
+        if np is None:
+            raise ImportError("ForecastFrame requires NumPy, install it with 'pip install numpy'.")
+        if not isinstance(data, dict) or not isinstance(data.get("list"), list):
+            raise ValueError("ForecastFrame requires a forecast response.")
+
+        nan = float("nan")
+        values = {name: [] for name in cls.COLUMNS}
+        for item in data["list"]:
+            main = item.get("main") or {}
+            wind = item.get("wind") or {}
+            condition = (item.get("weather") or [{}])[0]
+            values["dt"].append(item["dt"])
+            for field in ("temp", "feels_like", "temp_min", "temp_max", "humidity", "pressure"):
+                values[field].append(main.get(field, nan))
+            values["wind_speed"].append(wind.get("speed", nan))
+            values["wind_deg"].append(wind.get("deg", nan))
+            values["wind_gust"].append(wind.get("gust", nan))
+            values["clouds"].append((item.get("clouds") or {}).get("all", nan))
+            values["pop"].append(item.get("pop", nan))
+            values["rain"].append((item.get("rain") or {}).get("3h", 0.0))
+            values["snow"].append((item.get("snow") or {}).get("3h", 0.0))
+            values["condition_id"].append(condition.get("id", 0))
+            values["condition"].append(condition.get("main") or condition_name(condition.get("id", 0)))
+            values["description"].append(condition.get("description", ""))
+
+        columns = {"dt": np.array(values["dt"], dtype=np.int64)}
+        for field in cls.FLOAT_COLUMNS:
+            columns[field] = np.array(values[field], dtype=np.float64)
+        columns["condition_id"] = np.array(values["condition_id"], dtype=np.int32)
+        columns["condition"] = np.array(values["condition"], dtype=str)
+        columns["description"] = np.array(values["description"], dtype=str)
+
+        city = data.get("city") or {}
+        return cls(columns, city=city.get("name"), timezone_offset=int(city.get("timezone") or 0))
+
+    def __getattr__(self, name):
+        columns = self.__dict__.get("_columns", {})
+        if name in columns:
+            return columns[name]
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    def __len__(self):
+        return len(self._columns["dt"])
+
+    def __getitem__(self, index):
+        """
+        Return the steps of a slice as a frame sharing the arrays of this frame, or a column by name.
+        """
+        if isinstance(index, str):
+            return self._columns[index]
+        if not isinstance(index, slice):
+            raise TypeError("ForecastFrame supports slices and column names.")
+        return ForecastFrame({name: column[index] for name, column in self._columns.items()}, city=self.city,
+                             timezone_offset=self.timezone_offset)
+
+    def __repr__(self):
+        return f"ForecastFrame(city={self.city!r}, steps={len(self)})"
+
+    @property
+    def columns(self) -> tuple:
+        return tuple(self._columns)
+
+    def window(self, start=None, end=None):
+        """
+        Return the steps from start (included) to end (excluded), found by binary search on the timestamps. The
+        frame shares the arrays of this frame.
+
+        :param start: Start time, a POSIX timestamp or an aware datetime, default is the first step.
+        :type start: float or datetime, optional
+        :param end: End time, a POSIX timestamp or an aware datetime, default is after the last step.
+        :type end: float or datetime, optional
+        :return: The steps of the window.
+        :rtype: ForecastFrame
+        """
+        return self[self.locate(start, end)]
+
+    def locate(self, start=None, end=None) -> slice:
+        """
+        Return the slice of the steps from start (included) to end (excluded), found by binary search on the
+        timestamps. It also slices the "list" of the response the frame was built from.
+
+        :param start: Start time, a POSIX timestamp or an aware datetime, default is the first step.
+        :type start: float or datetime, optional
+        :param end: End time, a POSIX timestamp or an aware datetime, default is after the last step.
+        :type end: float or datetime, optional
+        :return: The slice of the steps.
+        :rtype: slice
+        """
+        dt = self._columns["dt"]
+        first = 0 if start is None else int(np.searchsorted(dt, self._timestamp(start), side="left"))
+        last = len(dt) if end is None else int(np.searchsorted(dt, self._timestamp(end), side="left"))
+        return slice(first, max(first, last))
+
+    def resample(self, step: int = 3600):
+        """
+        Return the frame at a regular time step from the first to the last step, hourly by default.
+
+        Measurements are interpolated linearly between the steps. The precipitation of a step, the volume of the
+        period since the previous step, is spread evenly over the new steps of that period, and the precipitation of
+        the first step is kept on the first new step, so totals are kept.
+        Conditions are the ones of the latest step at or before each new step.
+
+        :param step: The new time step in seconds, default is 3600.
+        :type step: int
+        :return: The resampled frame, a new frame not sharing the arrays of this one.
+        :rtype: ForecastFrame
+        """
+        dt = self._columns["dt"]
+        if len(dt) < 2:
+            return self[:]
+        times = np.arange(dt[0], dt[-1] + 1, step, dtype=np.int64)
+        columns = {"dt": times}
+        for field in self.FLOAT_COLUMNS:
+            if field not in ("rain", "snow"):
+                columns[field] = np.interp(times, dt, self._columns[field])
+
+        # Step i holds the precipitation of (dt[i - 1], dt[i]]. The period of step 0 ends at the first new step, its
+        # precipitation is all counted there.
+        periods = np.diff(dt)
+        covering = np.minimum(np.searchsorted(dt, times[1:], side="left"), len(dt) - 1)
+        for field in ("rain", "snow"):
+            values = self._columns[field]
+            columns[field] = np.concatenate((values[:1], values[covering] * step / periods[covering - 1]))
+
+        latest = np.searchsorted(dt, times, side="right") - 1
+        for field in ("condition_id", "condition", "description"):
+            columns[field] = self._columns[field][latest]
+        return ForecastFrame(columns, city=self.city, timezone_offset=self.timezone_offset)
+
+    def daily(self) -> dict:
+        """
+        Return the daily aggregates of the frame, days being calendar days in the location's timezone.
+
+        :return: Arrays with one value per day: "date" (datetime64[D]), "temp_min", "temp_max", "temp_mean",
+        "humidity_mean", "pop_max", "rain", "snow", "precipitation" (rain and snow in mm) and "steps".
+        :rtype: dict
+        """
+        dt = self._columns["dt"]
+        if not len(dt):
+            return {name: np.array([]) for name in ("date", "temp_min", "temp_max", "temp_mean", "humidity_mean",
+                                                     "pop_max", "rain", "snow", "precipitation", "steps")}
+        days = (dt + self.timezone_offset) // 86400
+        # Steps are ordered by time, so the steps of a day are contiguous.
+        starts = np.flatnonzero(np.diff(days, prepend=days[0] - 1))
+        steps = np.diff(np.append(starts, len(days)))
+        rain = np.add.reduceat(self._columns["rain"], starts)
+        snow = np.add.reduceat(self._columns["snow"], starts)
+        return {
+            "date": days[starts].astype("datetime64[D]"),
+            "temp_min": np.fmin.reduceat(self._columns["temp_min"], starts),
+            "temp_max": np.fmax.reduceat(self._columns["temp_max"], starts),
+            "temp_mean": np.add.reduceat(self._columns["temp"], starts) / steps,
+            "humidity_mean": np.add.reduceat(self._columns["humidity"], starts) / steps,
+            "pop_max": np.fmax.reduceat(self._columns["pop"], starts),
+            "rain": rain,
+            "snow": snow,
+            "precipitation": rain + snow,
+            "steps": steps,
+        }
+
+    def times(self):
+        """
+        Return the timestamps as a datetime64 array (UTC).
+        """
+        return self._columns["dt"].astype("datetime64[s]")
+
+    def dt_txt(self) -> list:
+        """
+        Return the timestamps as OpenWeather's "YYYY-MM-DD HH:MM:SS" strings (UTC).
+        """
+        return [str(time).replace("T", " ") for time in self.times()]
+
+    @staticmethod
+    def _timestamp(value) -> float:
+        if isinstance(value, datetime):
+            return value.timestamp()
+        return float(value)
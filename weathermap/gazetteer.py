@@ -0,0 +1,198 @@
+import os
+import gzip
+import json
+import re
+import threading
+import unicodedata
+from collections import namedtuple
+
+Place = namedtuple("Place", ["id", "name", "state", "country", "lat", "lon"])
+Place.__doc__ = """
+Place of a Gazetteer.
+
+:param id: OpenWeather city id.
+:param name: Name of the city.
+:param state: State code, empty outside of the US.
+:param country: ISO 3166 country code.
+:param lat: Latitude of the city.
+:param lon: Longitude of the city.
+"""
+
+_US_STATES = {
+    "ALABAMA": "AL", "ALASKA": "AK", "ARIZONA": "AZ", "ARKANSAS": "AR", "CALIFORNIA": "CA", "COLORADO": "CO",
+    "CONNECTICUT": "CT", "DELAWARE": "DE", "DISTRICTOFCOLUMBIA": "DC", "FLORIDA": "FL", "GEORGIA": "GA",
+    "HAWAII": "HI", "IDAHO": "ID", "ILLINOIS": "IL", "INDIANA": "IN", "IOWA": "IA", "KANSAS": "KS",
+    "KENTUCKY": "KY", "LOUISIANA": "LA", "MAINE": "ME", "MARYLAND": "MD", "MASSACHUSETTS": "MA", "MICHIGAN": "MI",
+    "MINNESOTA": "MN", "MISSISSIPPI": "MS", "MISSOURI": "MO", "MONTANA": "MT", "NEBRASKA": "NE", "NEVADA": "NV",
+    "NEWHAMPSHIRE": "NH", "NEWJERSEY": "NJ", "NEWMEXICO": "NM", "NEWYORK": "NY", "NORTHCAROLINA": "NC",
+    "NORTHDAKOTA": "ND", "OHIO": "OH", "OKLAHOMA": "OK", "OREGON": "OR", "PENNSYLVANIA": "PA", "RHODEISLAND": "RI",
+    "SOUTHCAROLINA": "SC", "SOUTHDAKOTA": "SD", "TENNESSEE": "TN", "TEXAS": "TX", "UTAH": "UT", "VERMONT": "VT",
+    "VIRGINIA": "VA", "WASHINGTON": "WA", "WESTVIRGINIA": "WV", "WISCONSIN": "WI", "WYOMING": "WY",
+}
+
+
+def _normalize_name(value) -> str:
+    """
+    Normalize a name for lookups: accents removed, upper case, letters and digits only.
+    """
+    value = unicodedata.normalize("NFKD", str(value))
+    value = "".join(char for char in value if not unicodedata.combining(char))
+    return re.sub(r"[^0-9A-Z]+", "", value.upper())
+
+
+class Gazetteer:
+    """
+    Gazetteer Class:
+
+    Local index of places resolving the location inputs of a request to one place, so every input form of a place
+    ("Tampa", "tampa, FL, US", "Tampa, Florida", an alias or one of its zip codes) maps to the same cache key. Names
+    are matched case and accent insensitively, and a name shared by several places is only resolved when the state or
+    country tells them apart, so different cities never share a key.
+
+    Places are loaded from the OpenWeather city list (city.list.json or city.list.json.gz), a list of
+    {"id", "name", "state", "country", "coord": {"lat", "lon"}}, or from a JSON object with that list under "places",
+    plus "aliases" (alias to city id) and "zip_codes" ("zip,country" to city id).
+
+    :param places: Places of the gazetteer, Place or records of the OpenWeather city list.
+    :type places: iterable, optional
+    :param aliases: Alternative names of places, alias to city id.
+    :type aliases: dict, optional
+    :param zip_codes: Zip codes of places, "zip,country" to city id.
+    :type zip_codes: dict, optional
+
+    Methods:
+    - load(path): Load a gazetteer file, shared by every caller loading the same path.
+    - add(place): Add a place.
+    - add_alias(alias, place_id): Add an alternative name of a place.
+    - add_zip_code(zip_code, country, place_id): Add a zip code of a place.
+    - resolve(city, state, country, zip_code): Return the place of the location inputs or None.
+    """
+    _loaded = {}
+    _loaded_lock = threading.Lock()
+
+    def __init__(self, places=None, aliases: dict = None, zip_codes: dict = None):
+        self.places = {}
+        self._names = {}
+        self._zip_codes = {}
+        for place in places or ():
+            self.add(place)
+        for alias, place_id in (aliases or {}).items():
+            self.add_alias(alias, place_id)
+        for zip_country, place_id in (zip_codes or {}).items():
+            zip_code, _, country = zip_country.partition(",")
+            self.add_zip_code(zip_code, country, place_id)
+
+    @classmethod
+    def load(cls, path: str):
+        """
+        Load a gazetteer file. The index is built once per path and shared by the following calls.
+
+        :param path: Path of a JSON file, gzip compressed when it ends with ".gz".
+        :type path: str
+        :return: The gazetteer.
+        :rtype: Gazetteer
+        :raises OSError: When the file can not be read.
+        :raises ValueError: When the file is not a valid gazetteer.
+        """
+        path = os.path.abspath(path)
+        with cls._loaded_lock:
+            gazetteer = cls._loaded.get(path)
+            if gazetteer is None:
+                opener = gzip.open if path.endswith(".gz") else open
+                with opener(path, "rt", encoding="utf-8") as f:
+                    content = json.load(f)
+                if isinstance(content, list):
+                    gazetteer = cls(places=content)
+                elif isinstance(content, dict):
+                    gazetteer = cls(places=content.get("places"), aliases=content.get("aliases"),
+                                    zip_codes=content.get("zip_codes"))
+                else:
+                    raise ValueError(f"Invalid gazetteer file: {path}")
+                cls._loaded[path] = gazetteer
+            return gazetteer
+
+    def __len__(self):
+        return len(self.places)
+
+    def add(self, place):
+        """
+        Add a place.
+
+        :param place: The place, or a record of the OpenWeather city list.
+        :type place: Place or dict
+        """
+        if not isinstance(place, Place):
+            coord = place.get("coord") or {}
+            place = Place(int(place["id"]), place["name"], (place.get("state") or "").upper(),
+                          (place.get("country") or "").upper(), coord.get("lat"), coord.get("lon"))
+        self.places[place.id] = place
+        self._names.setdefault(_normalize_name(place.name), []).append(place.id)
+
+    def add_alias(self, alias: str, place_id: int):
+        """
+        Add an alternative name of a place.
+
+        :param alias: The alternative name.
+        :type alias: str
+        :param place_id: City id of the place.
+        :type place_id: int
+        """
+        self._names.setdefault(_normalize_name(alias), []).append(int(place_id))
+
+    def add_zip_code(self, zip_code: str, country: str, place_id: int):
+        """
+        Add a zip code of a place.
+
+        :param zip_code: The zip code.
+        :type zip_code: str
+        :param country: ISO 3166 country code.
+        :type country: str
+        :param place_id: City id of the place.
+        :type place_id: int
+        """
+        self._zip_codes[(_normalize_name(zip_code), _normalize_name(country))] = int(place_id)
+
+    def resolve(self, city: str = None, state: str = None, country: str = None, zip_code: str = None):
+        """
+        Return the place of the location inputs of a request.
+
+        The city may also be given as "city, state, country" or "city, country" in one string.
+
+        :param city: City name or alias.
+        :type city: str, optional
+        :param state: State name or code.
+        :type state: str, optional
+        :param country: ISO 3166 country code.
+        :type country: str, optional
+        :param zip_code: Zip code, used with the country when no city is given.
+        :type zip_code: str, optional
+        :return: The place, or None when the inputs are unknown or match several places.
+        :rtype: Place or None
+        """
+        if not city:
+            if zip_code and country:
+                place_id = self._zip_codes.get((_normalize_name(zip_code), _normalize_name(country)))
+                return self.places.get(place_id)
+            return None
+
+        parts = [part.strip() for part in city.split(",") if part.strip()]
+        if not parts:
+            return None
+        candidates = [self.places[place_id] for place_id in dict.fromkeys(self._names.get(
+            _normalize_name(parts[0]), ())) if place_id in self.places]
+        if len(parts) == 3:
+            state, country = state or parts[1], country or parts[2]
+        elif len(parts) == 2:
+            # "city, country" or "city, state".
+            if any(place.country == _normalize_name(parts[1]) for place in candidates):
+                country = country or parts[1]
+            else:
+                state = state or parts[1]
+
+        if country:
+            candidates = [place for place in candidates if place.country == _normalize_name(country)]
+        if state:
+            state_code = _normalize_name(state)
+            state_code = _US_STATES.get(state_code, state_code)
+            candidates = [place for place in candidates if place.state == state_code]
+        return candidates[0] if len(candidates) == 1 else None
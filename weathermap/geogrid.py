@@ -0,0 +1,134 @@
+import math
+from collections import namedtuple
+
+_GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+_GEOHASH_INDEX = {char: index for index, char in enumerate(_GEOHASH_ALPHABET)}
+
+GridCell = namedtuple("GridCell", ["key", "lat", "lon"])
+GridCell.__doc__ = """
+Cell of a CoordinateGrid.
+
+:param key: Identifier of the cell, the same for every point of the cell.
+:param lat: Latitude of the center of the cell.
+:param lon: Longitude of the center of the cell.
+"""
+
+
+def geohash_encode(lat: float, lon: float, precision: int) -> str:
+    """
+    Encode a point as a geohash.
+
+    :param lat: Latitude in degrees.
+    :type lat: float
+    :param lon: Longitude in degrees.
+    :type lon: float
+    :param precision: Number of characters of the geohash.
+    :type precision: int
+    :return: The geohash, e.g. 'dhvr5' for Tampa at precision 5.
+    :rtype: str
+    """
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        interval, coordinate = (lon_range, lon) if even else (lat_range, lat)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_GEOHASH_ALPHABET[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+
+def geohash_decode(geohash: str) -> tuple:
+    """
+    Decode a geohash to the center of its cell.
+
+    :param geohash: The geohash.
+    :type geohash: str
+    :return: Latitude and longitude of the center of the cell.
+    :rtype: tuple
+    :raises ValueError: When the geohash contains an invalid character.
+    """
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in geohash.lower():
+        if char not in _GEOHASH_INDEX:
+            raise ValueError(f"Invalid geohash character: {char}")
+        value = _GEOHASH_INDEX[char]
+        for shift in range(4, -1, -1):
+            interval = lon_range if even else lat_range
+            middle = (interval[0] + interval[1]) / 2
+            if (value >> shift) & 1:
+                interval[0] = middle
+            else:
+                interval[1] = middle
+            even = not even
+    return (lat_range[0] + lat_range[1]) / 2, (lon_range[0] + lon_range[1]) / 2
+
+
+class CoordinateGrid:
+    """
+    CoordinateGrid Class:
+
+    Grid of the coordinate cache entries. A point is snapped to the cell of the grid containing it, either a square
+    cell of cell_degrees degrees or a geohash cell of geohash_precision characters, so every point of a cell shares
+    one cache key and one API request for the center of the cell. Finding the cell of a point is a constant time
+    computation.
+
+    :param cell_degrees: Size of a cell in degrees (default is 0.01, about 1.1 km of latitude).
+    :type cell_degrees: float
+    :param geohash_precision: Use geohash cells of this many characters instead of square cells (default is None).
+    :type geohash_precision: int, optional
+
+    Methods:
+    - cell(lat, lon): Return the cell containing a point.
+    """
+
+    def __init__(self, cell_degrees: float = 0.01, geohash_precision: int = None):
+        if geohash_precision is not None and not 1 <= int(geohash_precision) <= 12:
+            raise ValueError("geohash_precision must be between 1 and 12")
+        if geohash_precision is None and not cell_degrees > 0:
+            raise ValueError("cell_degrees must be greater than 0")
+        self.cell_degrees = cell_degrees
+        self.geohash_precision = int(geohash_precision) if geohash_precision is not None else None
+
+    def cell(self, lat, lon) -> GridCell:
+        """
+        Return the cell containing a point.
+
+        :param lat: Latitude in degrees.
+        :type lat: float
+        :param lon: Longitude in degrees.
+        :type lon: float
+        :return: The cell.
+        :rtype: GridCell
+        :raises ValueError: When the point is not valid coordinates.
+        """
+        lat, lon = float(lat), float(lon)
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            raise ValueError("Please provide valid latitude and longitude values")
+
+        if self.geohash_precision is not None:
+            geohash = geohash_encode(lat, lon, self.geohash_precision)
+            center_lat, center_lon = geohash_decode(geohash)
+            return GridCell(f"GH-{geohash}", round(center_lat, 6), round(center_lon, 6))
+
+        # Rounded first, so a point on a cell boundary is not put in the previous cell (0.29 / 0.01 = 28.999...).
+        row = math.floor(round(lat / self.cell_degrees, 9))
+        column = math.floor(round(lon / self.cell_degrees, 9))
+        return self._grid_cell(row, column)
+
+    def _grid_cell(self, row: int, column: int) -> GridCell:
+        center_lat = min(max((row + 0.5) * self.cell_degrees, -90.0), 90.0)
+        center_lon = min(max((column + 0.5) * self.cell_degrees, -180.0), 180.0)
+        # Signs are spelled out, the key is normalized to letters, digits and dashes by the cache.
+        key = f"GRID{self.cell_degrees}:{'S' if row < 0 else 'N'}{abs(row)}:{'W' if column < 0 else 'E'}{abs(column)}"
+        return GridCell(key, round(center_lat, 6), round(center_lon, 6))
+
@@ -0,0 +1,137 @@
+import logging
+import os
+import sqlite3
+import threading
+import weakref
+
+logger = logging.getLogger(__name__)
+
+
+class CacheJanitor(threading.Thread):
+    """
+    CacheJanitor Class:
+
+    Daemon thread which calls WeatherCache.sweep() every ``interval`` seconds, so expired entries are deleted and the
+    size limit is enforced off the request path. One janitor runs per cache directory in a process, see for_cache().
+
+    The janitor only keeps weak references to the caches of its directory: an entry is expired once it is older than
+    the longest timeout of its request type among the live caches, and the janitor stops when no cache is left.
+
+    :param cache: The cache to sweep.
+    :type cache: WeatherCache
+    :param interval: Seconds between two sweeps.
+    :type interval: float
+
+    Methods:
+    - for_cache(cache, interval): Return the running janitor of the cache directory, starting one if needed.
+    - add(cache): Sweep the directory for one more cache.
+    - running(directory): Return the running janitor of a cache directory, or None.
+    - stop(timeout=None): Stop the janitor and wait for its thread to finish.
+    """
+    _janitors = {}
+    _janitors_lock = threading.Lock()
+
+    def __init__(self, cache, interval: float):
+        super().__init__(name=f"weathermap-janitor-{cache.cache_directory}", daemon=True)
+        if interval <= 0:
+            raise ValueError("interval must be greater than 0.")
+        self.directory = os.path.abspath(cache.cache_directory)
+        self.interval = interval
+        self._caches = weakref.WeakSet([cache])
+        self._caches_lock = threading.Lock()
+        self.sweeps = 0
+        self.last_error = None
+        self._stop_event = threading.Event()
+
+    @classmethod
+    def for_cache(cls, cache, interval: float):
+        """
+        Return the running janitor of the cache's directory, starting one for this cache if there is none. The cache
+        is added to the caches of a running janitor.
+
+        :param cache: The cache to sweep.
+        :type cache: WeatherCache
+        :param interval: Seconds between two sweeps, only used when a janitor is started.
+        :type interval: float
+        :return: The janitor of the directory.
+        :rtype: CacheJanitor
+        """
+        path = os.path.abspath(cache.cache_directory)
+        with cls._janitors_lock:
+            janitor = cls._janitors.get(path)
+            if janitor is None or not janitor.is_alive():
+                janitor = cls(cache, interval)
+                cls._janitors[path] = janitor
+                janitor.start()
+            else:
+                janitor.add(cache)
+            return janitor
+
+    def add(self, cache):
+        """
+        Sweep the directory for one more cache, its timeouts are taken into account from the next sweep.
+
+        :param cache: A cache of the directory.
+        :type cache: WeatherCache
+        """
+        with self._caches_lock:
+            self._caches.add(cache)
+
+    def _sweep_timeouts(self, caches) -> dict:
+        """
+        Return the longest timeout of every request type among the caches.
+        """
+        timeouts = {}
+        for cache in caches:
+            for req_type, max_age in cache.cache_timeouts.items():
+                if req_type not in timeouts or max_age > timeouts[req_type]:
+                    timeouts[req_type] = max_age
+        return timeouts
+
+    @classmethod
+    def running(cls, directory: str):
+        """
+        Return the running janitor of a cache directory.
+
+        :param directory: The cache directory.
+        :type directory: str
+        :return: The janitor, or None when no janitor runs for the directory.
+        :rtype: CacheJanitor or None
+        """
+        janitor = cls._janitors.get(os.path.abspath(directory))
+        if janitor is not None and janitor.is_alive():
+            return janitor
+        return None
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            with self._caches_lock:
+                caches = list(self._caches)
+            if not caches:
+                # Every cache of the directory was garbage collected.
+                self.stop()
+                break
+            try:
+                caches[0].sweep(cache_timeouts=self._sweep_timeouts(caches))
+                self.sweeps += 1
+            except Exception as e:
+                if not isinstance(e, (OSError, sqlite3.Error)):
+                    logger.exception("Sweep of the cache directory %s failed, retrying in %s seconds", self.directory,
+                                     self.interval)
+                # Keep sweeping, the next pass may succeed (e.g. a locked database).
+                self.last_error = e
+            del caches
+
+    def stop(self, timeout: float = None):
+        """
+        Stop the janitor and wait for its thread to finish.
+
+        :param timeout: Maximum number of seconds to wait, default is to wait until the thread finishes.
+        :type timeout: float, optional
+        """
+        self._stop_event.set()
+        with self._janitors_lock:
+            if self._janitors.get(self.directory) is self:
+                del self._janitors[self.directory]
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
@@ -1,7 +1,35 @@
+import os
+import json
+import time
+import threading
+
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+
 import geocoder
 import ipinfo
 import requests
 
+from .session import get_default_session, DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT
+from .singleflight import SingleFlight
+from .tracing import start_span
+
+DEFAULT_LOCATION_TTL = 3600
+DEFAULT_LOCATION_CACHE_PATH = os.path.join("weather_cache", "location.json")
+DEFAULT_LOCATION_PROVIDERS = ("ipinfo", "geocoder")
+DEFAULT_LOCATION_DEADLINE = 5.0
+IPINFO_URL = "https://ipinfo.io/json"
+
+_PROVIDER_ERRORS = (requests.exceptions.RequestException, KeyError, IndexError, TypeError, ValueError,
+                    AttributeError)
+# Counters of the geolocation providers queried by the process, by provider.
+_provider_stats = {}
+_provider_stats_lock = threading.Lock()
+
+# Resolved locations of this process by cache path, as (location dict, resolution time).
+_resolved_locations = {}
+_resolved_locations_lock = threading.Lock()
+_lookups = SingleFlight()
+
 
 class LocationError(Exception):
     pass
@@ -18,8 +46,23 @@ class LocationTrack:
     Args:
         track_location (bool): If True, attempts to track the location automatically. If False, no location tracking
         is performed.
+        session (requests.Session): Session used for the geolocation requests, default is the pooled session shared
+        by the process.
+        connect_timeout (float): Seconds to wait for a connection to a geolocation service, default is 3.05.
+        read_timeout (float): Seconds to wait for a geolocation service to answer, default is 10.
+        location_ttl (float): Seconds a resolved location is reused before it is looked up again, default is 3600.
+        location_cache_path (str): JSON file keeping the resolved location between processes, default is
+        "weather_cache/location.json". None keeps it in memory only.
+        location_providers (tuple): Providers queried for the location: "ipinfo", "geocoder" or URLs of ipinfo
+        compatible endpoints (e.g. a local stub), default is ("ipinfo", "geocoder").
+        location_resolution (str): "sequential" to try the providers in order, falling back to the next one on
+        failure, or "race" to query them in parallel and use the first valid answer, default is "sequential".
+        location_deadline (float): Seconds to wait for a valid answer in race resolution, default is 5.
         **kwargs: Additional keyword arguments.
 
+    A resolved location is shared by every LocationTrack of the process and saved to location_cache_path, so only
+    the first object within location_ttl sends geolocation requests. Concurrent lookups are coalesced into one.
+
     Attributes:
         city (str): The city name of the tracked location.
         state (str): The state or region name of the tracked location.
@@ -35,20 +78,34 @@ class LocationTrack:
 
     Methods:
         get_location_info(): Attempts to retrieve location information automatically using various methods.
+        provider_stats(): Returns the request, success, failure and latency counters of each provider.
+        refresh_location(): Looks the location up again, replacing the shared and saved location.
         loc_info_dict(): Returns a dictionary containing the tracked location information.
     """
 
-    def __init__(self, track_location=True, **kwargs):
+    def __init__(self, track_location=True, session=None, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout=DEFAULT_READ_TIMEOUT, location_ttl=DEFAULT_LOCATION_TTL,
+                 location_cache_path=DEFAULT_LOCATION_CACHE_PATH, location_providers=DEFAULT_LOCATION_PROVIDERS,
+                 location_resolution="sequential", location_deadline=DEFAULT_LOCATION_DEADLINE, **kwargs):
         """
         Initialize the LocationTrack object.
 
         Args:
             track_location (bool): If True, attempts to track the location automatically. If False, no location tracking is performed.
+            session (requests.Session): Session used for the geolocation requests.
+            connect_timeout (float): Seconds to wait for a connection to a geolocation service.
+            read_timeout (float): Seconds to wait for a geolocation service to answer.
+            location_ttl (float): Seconds a resolved location is reused before it is looked up again.
+            location_cache_path (str): JSON file keeping the resolved location between processes, or None.
+            location_providers (tuple): Providers queried for the location.
+            location_resolution (str): "sequential" or "race".
+            location_deadline (float): Seconds to wait for a valid answer in race resolution.
             **kwargs: Additional keyword arguments.
 
         Raises:
             LocationError: Raised if location tracking fails or if incorrect arguments are provided.
             TypeError: Raised if the type of 'track_location' is not bool.
+            ValueError: Raised if location_resolution or a provider is not valid.
         """
         self.city = None
         self.state = None
@@ -57,11 +114,25 @@ class LocationTrack:
         self.longitude = None
         self.zip_code = None
         self.timezone = None
+        self.session = session if session is not None else get_default_session()
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.location_ttl = location_ttl
+        self.location_cache_path = location_cache_path
+        self.location_providers = tuple(location_providers)
+        self.location_resolution = location_resolution
+        self.location_deadline = location_deadline
         self.kwargs = kwargs
 
+        if location_resolution not in ("sequential", "race"):
+            raise ValueError("location_resolution must be sequential or race.")
+        for provider in self.location_providers:
+            if provider not in ("ipinfo", "geocoder") and not str(provider).startswith(("http://", "https://")):
+                raise ValueError(f"Invalid location provider: {provider}")
+
         if type(track_location) is bool:
             if track_location:
-                self.get_location_info()
+                self._resolve_location()
             else:
                 raise LocationError("track_location is False.")
         else:
@@ -71,57 +142,255 @@ class LocationTrack:
         """
         Retrieve location information automatically using IP geolocation services.
 
-        This method attempts to retrieve location information automatically using IP geolocation services provided by the 'requests'
-        library and the 'geocoder' library. It first tries the 'requests' library and falls back to the 'geocoder' library if needed.
+        With location_resolution="sequential", the providers are tried in order and the next one is tried only when
+        a provider fails. With location_resolution="race", the providers are queried in parallel and the first valid
+        location returned within location_deadline seconds is used, the later answers are ignored.
 
         Raises:
-            LocationError: Raised if location tracking fails or if an invalid 'ipinfo_token' is provided.
-            requests.exceptions.RequestException: Raised if an error occurs while making a request to the IP geolocation API.
+            LocationError: Raised if an invalid 'ipinfo_token' is provided in sequential resolution.
+        """
+        with start_span("weathermap.location.lookup", {"resolution": self.location_resolution}) as span:
+            if self.location_resolution == "race":
+                location = self._race_providers()
+            else:
+                location = None
+                for provider in self.location_providers:
+                    location = self._timed_query(provider)
+                    if location is not None:
+                        break
+
+            span.set_attribute("found", location is not None)
+            if location is None:
+                return LocationError("Failed to retrieve location information automatically")
+            self._set_location(location)
+
+    @staticmethod
+    def provider_stats():
         """
+        Return the counters of the geolocation providers queried by the process.
+
+        Returns:
+            dict: For each provider, the number of requests, successes and failures, the total and last latency in
+            seconds.
+        """
+        with _provider_stats_lock:
+            return {provider: dict(stats) for provider, stats in _provider_stats.items()}
+
+    def _race_providers(self):
+        """
+        Query the providers in parallel and return the first valid location returned within location_deadline.
+
+        Returns:
+            dict: The location, or None when no provider answered in time.
+        """
+        executor = ThreadPoolExecutor(max_workers=len(self.location_providers),
+                                      thread_name_prefix="weathermap-location")
+        futures = [executor.submit(self._timed_query, provider) for provider in self.location_providers]
         try:
-            # First, try using the 'requests' library and IP geolocation API
-            if 'ipinfo_token' in self.kwargs:
+            for future in as_completed(futures, timeout=self.location_deadline):
                 try:
-                    access_token = self.kwargs['ipinfo_token']
-                    handler = ipinfo.getHandler(access_token)
-                    details = handler.getDetails()
-                    self.city = details.city
-                    self.state = details.region
-                    self.country = details.country
-                    self.latitude = details.latitude
-                    self.longitude = details.longitude
-                    self.zip_code = details.postal
-                    self.timezone = details.timezone
-
-                except requests.exceptions.HTTPError:
-                    raise "Invalid ipinfo_token, please check it or remove to try another location tracking."
+                    location = future.result()
+                except LocationError:
+                    continue
+                if location is not None:
+                    return location
+        except FuturesTimeoutError:
+            pass
+        finally:
+            # Slower providers finish in the background, within their request timeouts, and are ignored. The queries
+            # not started yet are cancelled (shutdown(cancel_futures=True) needs Python 3.9).
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+        return None
 
-            else:
-                response = requests.get('https://ipinfo.io/json')
-                loc_data = response.json()
-                self.city = loc_data['city']
-                self.state = loc_data['region']
-                self.country = loc_data['country']
-                self.latitude = loc_data['loc'].split(',')[0]
-                self.longitude = loc_data['loc'].split(',')[1]
-                self.zip_code = loc_data['postal']
-                self.timezone = loc_data['timezone']
-
-        except requests.exceptions.RequestException as e:
+    def _timed_query(self, provider):
+        """
+        Query a provider and record its latency and outcome.
+
+        Args:
+            provider (str): "ipinfo", "geocoder" or the URL of an ipinfo compatible endpoint.
+
+        Returns:
+            dict: The location, or None when the provider failed or did not return a city.
+        """
+        started = time.perf_counter()
+        location = None
+        try:
+            with start_span("weathermap.location.provider", {"provider": provider}):
+                location = self._query_provider(provider)
+        except _PROVIDER_ERRORS:
+            pass
+        finally:
+            succeeded = location is not None and location['city'] is not None
+            latency = time.perf_counter() - started
+            with _provider_stats_lock:
+                stats = _provider_stats.setdefault(provider, {
+                    'requests': 0, 'successes': 0, 'failures': 0, 'total_latency': 0.0, 'last_latency': None
+                })
+                stats['requests'] += 1
+                stats['successes' if succeeded else 'failures'] += 1
+                stats['total_latency'] += latency
+                stats['last_latency'] = latency
+        return location if succeeded else None
+
+    def _query_provider(self, provider):
+        """
+        Query a geolocation provider.
+
+        Args:
+            provider (str): "ipinfo", "geocoder" or the URL of an ipinfo compatible endpoint.
+
+        Returns:
+            dict: The location in the format of loc_info_dict().
+
+        Raises:
+            LocationError: Raised if an invalid 'ipinfo_token' is provided.
+            requests.exceptions.RequestException: Raised if the request to the provider fails.
+        """
+        timeout = (self.connect_timeout, self.read_timeout)
+        if provider == 'geocoder':
+            g = geocoder.ip('me', session=self.session, timeout=timeout)
+            properties = g.geojson['features'][0]['properties']
+            return {
+                'city': properties['city'],
+                'state': properties['state'],
+                'country': properties['country'],
+                'latitude': properties['lat'],
+                'longitude': properties['lng'],
+                'zip_code': properties['postal'],
+                'timezone': properties['timezone'],
+            }
+
+        if provider == 'ipinfo' and 'ipinfo_token' in self.kwargs:
             try:
-                # If the first method fails, try using the 'geocoder' library
-                g = geocoder.ip('me')
-                loc_data = g.geojson
-                self.city = loc_data['features'][0]['properties']['city']
-                self.state = loc_data['features'][0]['properties']['state']
-                self.country = loc_data['features'][0]['properties']['country']
-                self.latitude = loc_data['features'][0]['properties']['lat']
-                self.longitude = loc_data['features'][0]['properties']['lng']
-                self.zip_code = loc_data['features'][0]['properties']['postal']
-                self.timezone = loc_data['features'][0]['properties']['timezone']
-
-            except Exception as e:
-                return LocationError(e, "Failed to retrieve location information automatically")
+                handler = ipinfo.getHandler(self.kwargs['ipinfo_token'], request_options={'timeout': timeout})
+                details = handler.getDetails()
+            except requests.exceptions.HTTPError:
+                raise LocationError(
+                    "Invalid ipinfo_token, please check it or remove to try another location tracking."
+                )
+            return {
+                'city': details.city,
+                'state': details.region,
+                'country': details.country,
+                'latitude': details.latitude,
+                'longitude': details.longitude,
+                'zip_code': details.postal,
+                'timezone': details.timezone,
+            }
+
+        url = IPINFO_URL if provider == 'ipinfo' else provider
+        loc_data = self.session.get(url, timeout=timeout).json()
+        return {
+            'city': loc_data['city'],
+            'state': loc_data['region'],
+            'country': loc_data['country'],
+            'latitude': loc_data['loc'].split(',')[0],
+            'longitude': loc_data['loc'].split(',')[1],
+            'zip_code': loc_data['postal'],
+            'timezone': loc_data['timezone'],
+        }
+
+    def refresh_location(self):
+        """
+        Look the location up again, ignoring the shared and saved location, and share and save the new one.
+
+        Returns:
+            dict: A dictionary containing the tracked location information.
+        """
+        self._resolve_location(refresh=True)
+        return self.loc_info_dict()
+
+    def _resolve_location(self, refresh=False):
+        """
+        Set the location from the shared or saved location when it is younger than location_ttl, otherwise look it
+        up with get_location_info(). Only successful lookups are shared and saved.
+
+        Args:
+            refresh (bool): Look the location up even if a valid location is known.
+        """
+        memo_key = os.path.abspath(self.location_cache_path) if self.location_cache_path else None
+        if not refresh:
+            with start_span("weathermap.location.known", {"path": memo_key or ""}) as span:
+                location = self._known_location(memo_key)
+                span.set_attribute("hit", location is not None)
+            if location is not None:
+                self._set_location(location)
+                return
+
+        def lookup():
+            self.get_location_info()
+            location = self.loc_info_dict()
+            if location['city'] is not None:
+                self._save_location(memo_key, location)
+            return location
+
+        # Callers arriving during a lookup wait for it, so a process sends one lookup at a time.
+        self._set_location(_lookups.do(memo_key, lookup))
+
+    def _known_location(self, memo_key):
+        """
+        Return the location shared by the process or saved on disk if it is younger than location_ttl.
+
+        Args:
+            memo_key (str): Absolute path of the location file, or None.
+
+        Returns:
+            dict: The location, or None.
+        """
+        not_before = time.time() - self.location_ttl
+        with _resolved_locations_lock:
+            entry = _resolved_locations.get(memo_key)
+        if entry is not None and entry[1] >= not_before:
+            return entry[0]
+        if memo_key is None:
+            return None
+
+        try:
+            with open(memo_key, "r") as f:
+                saved = json.load(f)
+            location, resolved_at = saved['location'], float(saved['resolved_at'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        if resolved_at < not_before:
+            return None
+        with _resolved_locations_lock:
+            _resolved_locations[memo_key] = (location, resolved_at)
+        return location
+
+    @staticmethod
+    def _save_location(memo_key, location):
+        """
+        Share a resolved location with the process and write it to the location file.
+
+        Args:
+            memo_key (str): Absolute path of the location file, or None.
+            location (dict): The resolved location.
+        """
+        resolved_at = time.time()
+        with _resolved_locations_lock:
+            _resolved_locations[memo_key] = (location, resolved_at)
+        if memo_key is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(memo_key), exist_ok=True)
+            temp_path = f"{memo_key}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, "w") as f:
+                json.dump({'resolved_at': resolved_at, 'location': location}, f)
+            os.replace(temp_path, memo_key)
+        except OSError:
+            # The location stays shared in memory, it is looked up again by the next process.
+            pass
+
+    def _set_location(self, location):
+        self.city = location['city']
+        self.state = location['state']
+        self.country = location['country']
+        self.latitude = location['latitude']
+        self.longitude = location['longitude']
+        self.zip_code = location['zip_code']
+        self.timezone = location['timezone']
 
     def loc_info_dict(self):
         """
@@ -0,0 +1,161 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+
+
+class MemoryCache:
+    """
+    MemoryCache Class:
+
+    Bounded in-process cache used as the first tier in front of the JSON file cache. Entries are evicted in least
+    recently used order once either the entry count or the byte budget is exceeded. Freshness is checked on read
+    against the maximum age of the request type, so the same tier serves weather, forecast and air pollution entries
+    with their own timeouts.
+
+    Returned values are shared with the cache and must be treated as read-only.
+
+    :param max_entries: Maximum number of entries kept in memory (default is 256, 0 disables the tier).
+    :type max_entries: int
+    :param max_bytes: Maximum total size in bytes of the entries kept in memory (default is None, no byte budget).
+    :type max_bytes: int, optional
+
+    Methods:
+    - for_directory(directory, max_entries, max_bytes): Return the tier shared by a cache directory.
+    - get(key, max_age): Return a fresh value or None.
+    - get_entry(key, max_age): Return a fresh value with its creation and expiry times or None.
+    - set(key, value, created_at, size, expires_at): Add or replace an entry.
+    - remove(key): Remove an entry.
+    """
+    _tiers = {}
+    _tiers_lock = threading.Lock()
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_directory(cls, directory: str, max_entries: int = 256, max_bytes: int = None):
+        """
+        Return the memory tier shared by every cache using the given directory.
+
+        The limits of an existing tier are updated to the given ones.
+
+        :param directory: The cache directory.
+        :type directory: str
+        :param max_entries: Maximum number of entries kept in memory.
+        :type max_entries: int
+        :param max_bytes: Maximum total size in bytes of the entries kept in memory.
+        :type max_bytes: int, optional
+        :return: The memory tier of the directory.
+        :rtype: MemoryCache
+        """
+        path = os.path.abspath(directory)
+        with cls._tiers_lock:
+            tier = cls._tiers.get(path)
+            if tier is None:
+                tier = cls(max_entries=max_entries, max_bytes=max_bytes)
+                cls._tiers[path] = tier
+            elif (tier.max_entries, tier.max_bytes) != (max_entries, max_bytes):
+                tier.resize(max_entries=max_entries, max_bytes=max_bytes)
+            return tier
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, max_age: float):
+        """
+        Return the value of a key if it is younger than max_age seconds.
+
+        :param key: The cache key.
+        :param max_age: Maximum age of the entry in seconds.
+        :type max_age: float
+        :return: The cached value, or None on a miss.
+        """
+        entry = self.get_entry(key, max_age)
+        return entry[0] if entry is not None else None
+
+    def get_entry(self, key, max_age: float):
+        """
+        Return the value of a key with its creation and expiry times if it is younger than max_age seconds.
+
+        :param key: The cache key.
+        :param max_age: Maximum age of the entry in seconds.
+        :type max_age: float
+        :return: Tuple of the cached value, its creation time and its expiry time (None when the entry has none), or
+        None on a miss.
+        :rtype: tuple or None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, created_at, size, expires_at = entry
+            if created_at < time.time() - max_age:
+                del self._entries[key]
+                self.current_bytes -= size
+                return None
+            self._entries.move_to_end(key)
+            return value, created_at, expires_at
+
+    def set(self, key, value, created_at: float, size: int = 0, expires_at: float = None):
+        """
+        Add or replace an entry and evict the least recently used entries over the limits.
+
+        :param key: The cache key.
+        :param value: The value to cache.
+        :param created_at: Creation time of the value as a POSIX timestamp.
+        :type created_at: float
+        :param size: Size of the value in bytes, used for the byte budget.
+        :type size: int
+        :param expires_at: Expiry time of the value as a POSIX timestamp, default is None (no expiry time).
+        :type expires_at: float, optional
+        """
+        if not self.max_entries or (self.max_bytes is not None and size > self.max_bytes):
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous[2]
+            self._entries[key] = (value, created_at, size, expires_at)
+            self.current_bytes += size
+            self._evict()
+
+    def remove(self, key):
+        """
+        Remove an entry if it exists.
+
+        :param key: The cache key.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.current_bytes -= entry[2]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def resize(self, max_entries: int, max_bytes: int = None):
+        """
+        Change the limits of the tier, evicting entries when they are lowered.
+
+        :param max_entries: Maximum number of entries kept in memory.
+        :type max_entries: int
+        :param max_bytes: Maximum total size in bytes of the entries kept in memory.
+        :type max_bytes: int, optional
+        """
+        with self._lock:
+            self.max_entries = max_entries
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or
+                                 (self.max_bytes is not None and self.current_bytes > self.max_bytes)):
+            _, (_, _, size, _) = self._entries.popitem(last=False)
+            self.current_bytes -= size
@@ -0,0 +1,293 @@
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+from .cachebackend import CacheBackend
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, documentation: str, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels) -> tuple:
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} takes the labels {list(self.labels)}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            lines.extend(self._render_value(key, value))
+        return lines
+
+    def _render_value(self, key, value) -> list:
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    """
+    Counter Class:
+
+    Monotonic count per combination of label values, e.g. cache hits per request type.
+
+    Methods:
+    - inc(amount=1, **labels): Add to the count of the labels.
+    - value(**labels): Return the count of the labels.
+    """
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """
+    Gauge Class:
+
+    Value per combination of label values, set by the application or read from a callback when the metrics are
+    rendered, e.g. the bytes stored by the cache.
+
+    :param callback: Function returning the values as a dict of label value tuples to value, default is None.
+    :type callback: callable, optional
+
+    Methods:
+    - set(value, **labels): Set the value of the labels.
+    - value(**labels): Return the value of the labels.
+    """
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labels=(), callback=None):
+        super().__init__(name, documentation, labels)
+        self.callback = callback
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels):
+        if self.callback is not None:
+            return self.callback().get(self._key(labels), 0)
+        return self._values.get(self._key(labels), 0)
+
+    def render(self) -> list:
+        if self.callback is not None:
+            values = {tuple(str(value) for value in key): value for key, value in self.callback().items()}
+            with self._lock:
+                self._values = values
+        return super().render()
+
+
+class Histogram(_Metric):
+    """
+    Histogram Class:
+
+    Distribution of observed values per combination of label values, e.g. latencies in seconds, counted in cumulative
+    buckets like Prometheus histograms.
+
+    :param buckets: Upper bounds of the buckets, default is DEFAULT_BUCKETS (1 ms to 10 s).
+    :type buckets: tuple
+
+    Methods:
+    - observe(value, **labels): Add an observation.
+    - count(**labels): Return the number of observations.
+    - sum(**labels): Return the sum of the observations.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][bisect.bisect_left(self.buckets, value)] += 1
+            state[1] += value
+            state[2] += 1
+
+    def count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def sum(self, **labels) -> float:
+        state = self._values.get(self._key(labels))
+        return state[1] if state else 0.0
+
+    def _render_value(self, key, value) -> list:
+        counts, total, count = value
+        lines, cumulative = [], 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            labels = _format_labels(self.labels, key, [("le", _format_value(float(bound)))])
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+        lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    MetricsRegistry Class:
+
+    In-process registry of metrics, rendered in the Prometheus text format. The metrics of the package are
+    registered in REGISTRY:
+
+        print(REGISTRY.render())
+        start_http_server(9464)  # then scrape http://127.0.0.1:9464/metrics
+
+    Methods:
+    - counter(name, documentation, labels): Register a Counter.
+    - gauge(name, documentation, labels, callback): Register a Gauge.
+    - histogram(name, documentation, labels, buckets): Register a Histogram.
+    - get(name): Return a registered metric.
+    - render(): Return the metrics in the Prometheus text format.
+    - clear(): Reset the values of every metric.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels=()) -> Counter:
+        return self._register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels=(), callback=None) -> Gauge:
+        return self._register(Gauge(name, documentation, labels, callback))
+
+    def histogram(self, name: str, documentation: str, labels=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def get(self, name: str):
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """
+        Return the metrics in the Prometheus text exposition format.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        for metric in list(self._metrics.values()):
+            metric.clear()
+
+
+def _cache_bytes():
+    with CacheBackend._backends_lock:
+        backends = list(CacheBackend._backends.values())
+    return {(backend.directory,): backend.total_bytes for backend in backends}
+
+
+REGISTRY = MetricsRegistry()
+
+CACHE_HITS = REGISTRY.counter("weathermap_cache_hits_total", "Requests answered from the cache.", ["req_type"])
+CACHE_MISSES = REGISTRY.counter("weathermap_cache_misses_total", "Requests not found in the cache.", ["req_type"])
+CACHE_STALE = REGISTRY.counter("weathermap_cache_stale_total",
+                               "Requests answered with an expired cache entry (max_stale or API unavailable).",
+                               ["req_type"])
+CACHE_WRITES = REGISTRY.counter("weathermap_cache_writes_total", "Entries written to the cache.", ["req_type"])
+CACHE_EVICTIONS = REGISTRY.counter("weathermap_cache_evictions_total",
+                                   "Entries deleted from the cache, by reason (expired, size, oldest).", ["reason"])
+CACHE_BYTES = REGISTRY.gauge("weathermap_cache_bytes", "Bytes stored by the cache backends.", ["directory"],
+                             callback=_cache_bytes)
+UPSTREAM_REQUESTS = REGISTRY.counter("weathermap_upstream_requests_total",
+                                     "API requests sent, by request type and HTTP status ('error' when no response).",
+                                     ["req_type", "status"])
+CACHE_LOOKUP_SECONDS = REGISTRY.histogram("weathermap_cache_lookup_seconds", "Latency of the cache lookups.",
+                                          ["req_type"])
+HTTP_SECONDS = REGISTRY.histogram("weathermap_http_request_seconds", "Latency of the API requests.", ["req_type"])
+PARSE_SECONDS = REGISTRY.histogram("weathermap_response_parse_seconds", "Latency of the JSON decoding of the API "
+                                   "responses.", ["req_type"])
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    # http.server.ThreadingHTTPServer is only available from Python 3.7.
+    daemon_threads = True
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port: int, host: str = "127.0.0.1", registry: MetricsRegistry = REGISTRY):
+    """
+    Serve the metrics of a registry on http://host:port/metrics from a daemon thread.
+
+    :param port: The port, 0 for a free port.
+    :type port: int
+    :param host: The interface, default is "127.0.0.1" (local only).
+    :type host: str
+    :param registry: The registry to serve, default is REGISTRY.
+    :type registry: MetricsRegistry
+    :return: The server, server.server_address gives the port; stop it with server.shutdown().
+    :rtype: http.server.HTTPServer
+    """
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+    server = _ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, name="weathermap-metrics", daemon=True).start()
+    return server
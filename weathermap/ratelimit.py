@@ -0,0 +1,221 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+
+INTERACTIVE = 0
+BACKGROUND = 10
+PRIORITIES = {"interactive": INTERACTIVE, "background": BACKGROUND}
+
+# OpenWeather free plan: 60 calls per minute.
+DEFAULT_RATE = 60
+DEFAULT_PER = 60
+
+_default_limiter = None
+_default_limiter_lock = threading.Lock()
+
+
+def resolve_priority(priority) -> int:
+    """
+    Return the numeric priority of a priority name ("interactive", "background") or number, lower goes first.
+
+    :raises ValueError: When the priority is not valid.
+    """
+    if isinstance(priority, str):
+        if priority.strip().lower() not in PRIORITIES:
+            raise ValueError(f"Please provide valid priority. {list(PRIORITIES)}")
+        return PRIORITIES[priority.strip().lower()]
+    if type(priority) != int:
+        raise ValueError(f"Please provide valid priority. {list(PRIORITIES)}")
+    return priority
+
+
+class RateLimiter:
+    """
+    RateLimiter Class:
+
+    Token bucket limiting the API calls of a process to a quota, e.g. 60 calls per minute. The bucket holds up to
+    burst tokens and refills at rate tokens per per seconds; each call takes one token, waiting for it when the bucket
+    is empty. Waiting callers are served by priority, then in arrival order, so interactive requests go before
+    background refreshes.
+
+    A rate limited response (HTTP 429) pauses every caller: for the Retry-After of the response when given, otherwise
+    for an exponential back-off starting at base_backoff and doubling, up to max_backoff, until a call succeeds.
+
+    :param rate: Number of calls allowed per period, default is 60.
+    :type rate: float
+    :param per: Length of the period in seconds, default is 60.
+    :type per: float
+    :param burst: Size of the bucket, the number of calls sent at once after an idle period, default is rate.
+    :type burst: int, optional
+    :param base_backoff: First pause after a rate limited response in seconds, default is 1.
+    :type base_backoff: float
+    :param max_backoff: Longest pause after rate limited responses in seconds, default is 60.
+    :type max_backoff: float
+
+    Methods:
+    - acquire(priority, timeout): Wait for a call slot.
+    - penalize(retry_after): Pause the calls after a rate limited response.
+    - record_success(): Reset the back-off after a successful call.
+    - stats(): Return the queue depth, wait times, admitted rate and back-off.
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE, per: float = DEFAULT_PER, burst: int = None,
+                 base_backoff: float = 1.0, max_backoff: float = 60.0):
+        if not rate > 0 or not per > 0:
+            raise ValueError("rate and per must be greater than 0")
+        if burst is not None and not burst >= 1:
+            raise ValueError("burst must be at least 1")
+        self.rate = rate
+        self.per = per
+        self.burst = burst if burst is not None else max(1, int(rate))
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+        self._condition = threading.Condition()
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._backoff = 0.0
+        self._paused_until = 0.0
+        self._admissions = deque()
+        self._admitted = 0
+        self._throttled = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def acquire(self, priority=INTERACTIVE, timeout: float = None) -> bool:
+        """
+        Wait for a call slot, behind the waiting callers of a higher (lower numbered) or equal priority.
+
+        :param priority: "interactive", "background" or a number, default is interactive.
+        :type priority: str or int
+        :param timeout: Longest wait in seconds, default is no limit.
+        :type timeout: float, optional
+        :return: True when a slot was taken, False when the timeout expired first.
+        :rtype: bool
+        """
+        priority = resolve_priority(priority)
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+        entry = (priority, next(self._sequence))
+        with self._condition:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._waiters[0] is entry and now >= self._paused_until and self._tokens >= 1:
+                        heapq.heappop(self._waiters)
+                        self._tokens -= 1
+                        self._admit(now, now - start)
+                        # The next waiter may take a token left in the bucket.
+                        self._condition.notify_all()
+                        return True
+                    if deadline is not None and now >= deadline:
+                        self._waiters.remove(entry)
+                        heapq.heapify(self._waiters)
+                        self._condition.notify_all()
+                        return False
+                    wait = max(self._paused_until - now, (1 - self._tokens) * self.per / self.rate, 0.001)
+                    if deadline is not None:
+                        wait = min(wait, deadline - now)
+                    self._condition.wait(wait)
+            except BaseException:
+                if entry in self._waiters:
+                    self._waiters.remove(entry)
+                    heapq.heapify(self._waiters)
+                    self._condition.notify_all()
+                raise
+
+    def penalize(self, retry_after: float = None):
+        """
+        Pause every caller after a rate limited response.
+
+        :param retry_after: Pause given by the Retry-After of the response in seconds, default is the next step of
+        the exponential back-off.
+        :type retry_after: float, optional
+        """
+        with self._condition:
+            now = time.monotonic()
+            self._throttled += 1
+            self._backoff = min(self.max_backoff, self._backoff * 2 if self._backoff else self.base_backoff)
+            pause = retry_after if retry_after is not None else self._backoff
+            self._paused_until = max(self._paused_until, now + pause)
+            self._refill(now)
+            self._tokens = 0.0
+            self._condition.notify_all()
+
+    def record_success(self):
+        """
+        Reset the back-off after a call that was not rate limited.
+        """
+        if self._backoff:
+            with self._condition:
+                self._backoff = 0.0
+
+    def stats(self) -> dict:
+        """
+        Return the statistics of the limiter.
+
+        :return: "queue_depth" (callers waiting), "admitted" (calls admitted), "admitted_rate" (calls per second over
+        the last period), "wait_time_mean" and "wait_time_max" (seconds waited by the admitted calls), "throttled"
+        (rate limited responses), "backoff" (seconds left of the current pause) and "tokens" (calls available now).
+        :rtype: dict
+        """
+        with self._condition:
+            now = time.monotonic()
+            self._refill(now)
+            self._expire_admissions(now)
+            return {
+                "queue_depth": len(self._waiters),
+                "admitted": self._admitted,
+                "admitted_rate": len(self._admissions) / self.per,
+                "wait_time_mean": self._wait_total / self._admitted if self._admitted else 0.0,
+                "wait_time_max": self._wait_max,
+                "throttled": self._throttled,
+                "backoff": max(0.0, self._paused_until - now),
+                "tokens": self._tokens,
+            }
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate / self.per)
+        self._updated = now
+
+    def _admit(self, now, waited):
+        self._admitted += 1
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+        self._admissions.append(now)
+        self._expire_admissions(now)
+
+    def _expire_admissions(self, now):
+        while self._admissions and self._admissions[0] <= now - self.per:
+            self._admissions.popleft()
+
+
+def get_default_limiter() -> RateLimiter:
+    """
+    Return the limiter shared by every Weather created without a rate_limiter, None when no default limiter was set:
+    requests are then sent without limit, as before rate limiting was added.
+
+    :return: The default limiter, or None.
+    :rtype: RateLimiter or None
+    """
+    with _default_limiter_lock:
+        return _default_limiter
+
+
+def set_default_limiter(limiter: RateLimiter):
+    """
+    Set the limiter shared by every Weather created afterwards without a rate_limiter, e.g.
+    set_default_limiter(RateLimiter()) for the quota of the OpenWeather free plan (60 calls per minute).
+
+    :param limiter: The new default limiter, None to send requests without limit (the default).
+    :type limiter: RateLimiter
+    """
+    global _default_limiter
+    with _default_limiter_lock:
+        _default_limiter = limiter
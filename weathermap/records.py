@@ -0,0 +1,163 @@
+import sys
+from collections import namedtuple
+
+from .units import normalize_units
+from .weather import Weather
+
+_OBSERVATION_FIELDS = [
+    "location_id", "name", "country", "lat", "lon", "dt", "timezone_offset", "sunrise", "sunset", "temp",
+    "feels_like", "temp_min", "temp_max", "humidity", "pressure", "wind_speed", "wind_deg", "wind_gust", "clouds",
+    "visibility", "rain", "snow", "condition_id", "condition", "description", "units",
+]
+_FORECAST_POINT_FIELDS = [
+    "dt", "temp", "feels_like", "temp_min", "temp_max", "humidity", "pressure", "wind_speed", "wind_deg",
+    "wind_gust", "clouds", "visibility", "pop", "rain", "snow", "condition_id", "condition", "description",
+]
+
+
+def _intern(value):
+    # Countries, conditions and descriptions repeat across locations, one string is kept per distinct value.
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _condition(item):
+    condition = (item.get("weather") or [{}])[0]
+    return condition.get("id"), _intern(condition.get("main")), _intern(condition.get("description"))
+
+
+class Observation(namedtuple("Observation", _OBSERVATION_FIELDS)):
+    """
+    Observation Class:
+
+    Immutable record of a current weather response, keeping only the parsed fields. It is a tuple without a
+    per-instance __dict__, and the strings shared by many observations (country, condition, description) are
+    interned, so it is a fraction of the size of the decoded JSON it is built from. The values are the objects of the
+    decoded JSON, building a record copies nothing. Missing fields are None.
+
+    Methods:
+    - from_response(data, units): Build the observation of a weather response.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_response(cls, data: dict, units: str = "standard"):
+        """
+        Build the observation of a weather response.
+
+        :param data: A weather response of the API.
+        :type data: dict
+        :param units: The units of the response, default is "standard".
+        :type units: str
+        :return: The observation.
+        :rtype: Observation
+        """
+        main = data.get("main") or {}
+        wind = data.get("wind") or {}
+        sys_data = data.get("sys") or {}
+        coord = data.get("coord") or {}
+        return cls(
+            data.get("id"), data.get("name"), _intern(sys_data.get("country")), coord.get("lat"), coord.get("lon"),
+            data.get("dt"), data.get("timezone"), sys_data.get("sunrise"), sys_data.get("sunset"),
+            main.get("temp"), main.get("feels_like"), main.get("temp_min"), main.get("temp_max"),
+            main.get("humidity"), main.get("pressure"), wind.get("speed"), wind.get("deg"), wind.get("gust"),
+            (data.get("clouds") or {}).get("all"), data.get("visibility"), (data.get("rain") or {}).get("1h"),
+            (data.get("snow") or {}).get("1h"), *_condition(data), _intern(normalize_units(units)),
+        )
+
+
+class ForecastPoint(namedtuple("ForecastPoint", _FORECAST_POINT_FIELDS)):
+    """
+    ForecastPoint Class:
+
+    Immutable record of one step of a forecast response, keeping only the parsed fields, like Observation. Missing
+    fields are None.
+
+    Methods:
+    - from_item(item): Build the point of an item of a forecast "list".
+    - from_response(data): Build the points of a forecast response.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_item(cls, item: dict):
+        """
+        Build the point of an item of a forecast "list".
+
+        :param item: The item.
+        :type item: dict
+        :return: The point.
+        :rtype: ForecastPoint
+        """
+        main = item.get("main") or {}
+        wind = item.get("wind") or {}
+        return cls(
+            item.get("dt"), main.get("temp"), main.get("feels_like"), main.get("temp_min"), main.get("temp_max"),
+            main.get("humidity"), main.get("pressure"), wind.get("speed"), wind.get("deg"), wind.get("gust"),
+            (item.get("clouds") or {}).get("all"), item.get("visibility"), item.get("pop"),
+            (item.get("rain") or {}).get("3h"), (item.get("snow") or {}).get("3h"), *_condition(item),
+        )
+
+    @classmethod
+    def from_response(cls, data: dict) -> tuple:
+        """
+        Build the points of a forecast response.
+
+        :param data: A forecast response of the API.
+        :type data: dict
+        :return: The points, ordered by time as the response.
+        :rtype: tuple of ForecastPoint
+        """
+        return tuple(cls.from_item(item) for item in data.get("list") or ())
+
+
+class WeatherClient:
+    """
+    WeatherClient Class:
+
+    Lightweight client returning Observation and ForecastPoint records instead of keeping Weather objects and their
+    responses. One client serves any number of locations: each request goes through a short-lived Weather, so the
+    cache, request coalescing and units conversion are the same, and only the parsed records are kept.
+
+        client = WeatherClient(apikey="231432521352512355", units="Metric")
+        observation = client.current(city="Tampa", country="US")
+        points = client.forecast(lat=41.4, lon=-23.4)
+
+    :param apikey: Your API key from openweathermap.org
+    :type apikey: str
+    :param kwargs: Weather arguments applied to every request (units, cache options, session...).
+
+    Methods:
+    - current(**location): Return the Observation of a location.
+    - forecast(**location): Return the ForecastPoint records of a location.
+    """
+    __slots__ = ("apikey", "_options")
+
+    def __init__(self, apikey: str, **kwargs):
+        if not apikey:
+            raise ValueError("API key is required.")
+        self.apikey = apikey
+        self._options = kwargs
+
+    def current(self, **location) -> Observation:
+        """
+        Return the current weather of a location.
+
+        :param location: Weather location arguments (city, state, country, lat, lon, zip_code).
+        :return: The observation.
+        :rtype: Observation
+        """
+        weather = self._weather(location)
+        return Observation.from_response(weather.get_current_weather(), units=weather.units)
+
+    def forecast(self, **location) -> tuple:
+        """
+        Return the forecast of a location.
+
+        :param location: Weather location arguments (city, state, country, lat, lon, zip_code).
+        :return: The points of the forecast.
+        :rtype: tuple of ForecastPoint
+        """
+        return ForecastPoint.from_response(self._weather(location).get_forecast())
+
+    def _weather(self, location):
+        return Weather(apikey=self.apikey, track_location=False, **location, **self._options)
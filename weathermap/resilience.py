@@ -0,0 +1,183 @@
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+
+_default_breaker = None
+_default_breaker_lock = threading.Lock()
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """
+    Raised instead of requesting the API while the circuit breaker is open.
+    """
+
+
+class DeadlineExceededError(requests.exceptions.Timeout):
+    """
+    Raised when a request can not complete before its deadline.
+    """
+
+
+class RetryableStatusError(requests.exceptions.HTTPError):
+    """
+    Raised for a server error response (HTTP 5xx) once the retries are exhausted.
+    """
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """
+    Return the pause before a retry: exponential back-off with full jitter, a random delay between 0 and
+    base * 2 ** attempt, at most cap. The jitter spreads the retries of callers which failed together.
+
+    :param attempt: Number of the failed attempt, 0 for the first one.
+    :type attempt: int
+    :param base: Back-off of the first retry in seconds.
+    :type base: float
+    :param cap: Longest back-off in seconds.
+    :type cap: float
+    :return: The pause in seconds.
+    :rtype: float
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class LatencyTracker:
+    """
+    LatencyTracker Class:
+
+    Rolling window of the latencies of the last API responses, giving the delay after which a request is hedged.
+
+    :param window: Number of latencies kept, default is 200.
+    :type window: int
+    :param min_samples: Number of latencies needed before percentiles are given, default is 20.
+    :type min_samples: int
+
+    Methods:
+    - record(latency): Add the latency of a response.
+    - percentile(percent): Return a percentile of the window, None until it holds min_samples latencies.
+    """
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float):
+        with self._lock:
+            self._latencies.append(latency)
+
+    def percentile(self, percent: float):
+        """
+        Return a percentile of the recorded latencies.
+
+        :param percent: The percentile, between 0 and 100.
+        :type percent: float
+        :return: The latency in seconds, None when fewer than min_samples latencies are recorded.
+        :rtype: float or None
+        """
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            latencies = sorted(self._latencies)
+        index = min(len(latencies) - 1, max(0, int(round(percent / 100 * len(latencies))) - 1))
+        return latencies[index]
+
+
+class CircuitBreaker:
+    """
+    CircuitBreaker Class:
+
+    Stops requesting the API while it is down. After failure_threshold consecutive failed requests (connection
+    errors, timeouts and server errors) the circuit opens: requests fail immediately with CircuitOpenError, and Weather
+    serves cached responses whatever their age. After reset_timeout seconds one request is let through; the circuit
+    closes when it succeeds and opens again when it fails.
+
+    :param failure_threshold: Consecutive failures opening the circuit, default is 5.
+    :type failure_threshold: int
+    :param reset_timeout: Seconds the circuit stays open before a trial request, default is 30.
+    :type reset_timeout: float
+
+    Methods:
+    - allow(): Return True when a request may be sent.
+    - record_success(): Close the circuit after a successful request.
+    - record_failure(): Count a failed request, opening the circuit at the threshold.
+    - state: "closed", "open" or "half_open".
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        if not failure_threshold >= 1:
+            raise ValueError("failure_threshold must be at least 1")
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now):
+        if self._opened_at is None:
+            return "closed"
+        if now - self._opened_at < self.reset_timeout:
+            return "open"
+        return "half_open"
+
+    def allow(self) -> bool:
+        """
+        Return True when a request may be sent: the circuit is closed, or it is half open and no trial request is
+        running.
+        """
+        with self._lock:
+            state = self._state(time.monotonic())
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            now = time.monotonic()
+            self._failures += 1
+            if self._trial_running or self._failures >= self.failure_threshold:
+                self._opened_at = now
+            self._trial_running = False
+
+
+def get_default_breaker() -> CircuitBreaker:
+    """
+    Return the circuit breaker shared by every Weather created without a circuit_breaker, None when no default
+    breaker was set: every request is then sent to the API, as before circuit breaking was added.
+
+    :return: The default circuit breaker, or None.
+    :rtype: CircuitBreaker or None
+    """
+    with _default_breaker_lock:
+        return _default_breaker
+
+
+def set_default_breaker(breaker: CircuitBreaker):
+    """
+    Set the circuit breaker shared by every Weather created afterwards without a circuit_breaker, e.g.
+    set_default_breaker(CircuitBreaker()).
+
+    :param breaker: The new default circuit breaker, None to disable circuit breaking (the default).
+    :type breaker: CircuitBreaker
+    """
+    global _default_breaker
+    with _default_breaker_lock:
+        _default_breaker = breaker
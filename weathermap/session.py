@@ -0,0 +1,62 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 10
+
+_default_session = None
+_default_session_lock = threading.Lock()
+
+
+def create_session(pool_connections: int = 10, pool_maxsize: int = 10, keep_alive: bool = True) -> requests.Session:
+    """
+    Create a requests Session with a pooled HTTPAdapter.
+
+    Connections to a host are kept open and reused by the following requests, so only the first request to
+    OpenWeather pays for the TCP and TLS handshakes.
+
+    :param pool_connections: Number of hosts to keep a connection pool for, default is 10.
+    :type pool_connections: int
+    :param pool_maxsize: Maximum number of connections kept open per host, default is 10. Use at least the number
+    of threads sending requests through the session.
+    :type pool_maxsize: int
+    :param keep_alive: Keep connections open between requests, default is True.
+    :type keep_alive: bool
+    :return: The session.
+    :rtype: requests.Session
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if not keep_alive:
+        session.headers["Connection"] = "close"
+    return session
+
+
+def get_default_session() -> requests.Session:
+    """
+    Return the session shared by every Weather and LocationTrack created without a session, creating it on first use.
+
+    :return: The default session.
+    :rtype: requests.Session
+    """
+    global _default_session
+    with _default_session_lock:
+        if _default_session is None:
+            _default_session = create_session()
+        return _default_session
+
+
+def set_default_session(session: requests.Session):
+    """
+    Replace the session shared by every Weather and LocationTrack created without a session.
+
+    :param session: The new default session, e.g. from create_session() with a larger pool.
+    :type session: requests.Session
+    """
+    global _default_session
+    with _default_session_lock:
+        _default_session = session
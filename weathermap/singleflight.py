@@ -0,0 +1,161 @@
+import asyncio
+import functools
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    SingleFlight Class:
+
+    Coalesces concurrent calls for the same key: the first caller runs the function and the callers arriving while
+    it runs wait for its result (or its exception) instead of running the function themselves.
+
+    Methods:
+    - do(key, fn): Run fn, or wait for the running call of the same key, and return its result.
+    - in_flight(): Return the number of keys being computed.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """
+        Run fn for key unless a call for key is already running, in which case wait for it.
+
+        :param key: Hashable key identifying identical calls.
+        :param fn: Function without arguments computing the result.
+        :return: The result of the call, shared by every caller of the same flight.
+        :raises Exception: The exception raised by fn, re-raised in every caller of the same flight.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """
+    AsyncSingleFlight Class:
+
+    SingleFlight for coroutines: the first caller of a key runs the coroutine as a task of its event loop and the
+    callers arriving while it runs await the same task. A cancelled caller does not cancel the task of the others.
+
+    Methods:
+    - do(key, fn): Run fn(), or await the running call of the same key, and return its result.
+    - in_flight(): Return the number of keys being computed.
+    """
+
+    def __init__(self):
+        self._tasks = {}
+
+    async def do(self, key, fn):
+        """
+        Run the coroutine fn() for key unless a call for key is already running in this event loop, in which case
+        await it.
+
+        :param key: Hashable key identifying identical calls.
+        :param fn: Function without arguments returning the coroutine computing the result.
+        :return: The result of the call, shared by every caller of the same flight.
+        :raises Exception: The exception raised by the coroutine, re-raised in every caller of the same flight.
+        """
+        loop = asyncio.get_running_loop()
+        # Tasks belong to one event loop, flights of other loops (threads) are separate.
+        flight_key = (loop, key)
+        task = self._tasks.get(flight_key)
+        if task is None:
+            task = loop.create_task(fn())
+            self._tasks[flight_key] = task
+            task.add_done_callback(functools.partial(self._done, flight_key))
+        return await asyncio.shield(task)
+
+    def _done(self, flight_key, task):
+        if self._tasks.get(flight_key) is task:
+            del self._tasks[flight_key]
+        if not task.cancelled():
+            # Retrieved here, so a flight whose callers were all cancelled does not log an unretrieved exception.
+            task.exception()
+
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+
+class FileLock:
+    """
+    FileLock Class:
+
+    Exclusive lock on a file, held with ``with FileLock(path):``. It coalesces identical requests across processes
+    sharing a cache directory: the process holding the lock fetches, the others wait and then find the entry in the
+    cache. Uses fcntl.flock on POSIX and msvcrt.locking on Windows.
+
+    :param path: Path of the lock file, created if needed.
+    :type path: str
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = open(self.path, "a+")
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        else:
+            self._file.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK gives up after 10 seconds, keep waiting for the holder.
+                    continue
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._file = None
+        return False
@@ -0,0 +1,239 @@
+import threading
+import time
+from collections import namedtuple
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:
+    otel_trace = None
+
+_tracer = None
+
+SpanRecord = namedtuple("SpanRecord", ["name", "attributes", "start", "duration", "parent", "error"])
+SpanRecord.__doc__ = """
+Finished span of a RecordingTracer.
+
+:param name: Name of the span, e.g. 'weathermap.http'.
+:param attributes: Attributes of the span.
+:param start: time.perf_counter() time the span started.
+:param duration: Duration of the span in seconds.
+:param parent: Name of the enclosing span of the same thread, None for a root span.
+:param error: Name of the exception raised in the span, None when it succeeded.
+"""
+
+
+class _NoopSpan:
+    """
+    Span of the disabled tracing: a shared object doing nothing, so tracing costs one function call per span.
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set_attribute(self, key, value):
+        pass
+
+    def is_recording(self) -> bool:
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def start_span(name: str, attributes: dict = None):
+    """
+    Start a span of the installed tracer, used as ``with start_span("weathermap.http", {"req_type": ...}) as span:``.
+
+    Without a tracer it returns a shared no-op span. Attributes costly to compute should only be set when
+    span.is_recording() is True.
+
+    :param name: Name of the span.
+    :type name: str
+    :param attributes: Attributes of the span, default is None.
+    :type attributes: dict, optional
+    :return: A context manager giving the span, with set_attribute(key, value) and is_recording().
+    """
+    if _tracer is None:
+        return _NOOP_SPAN
+    return _tracer.start_span(name, attributes)
+
+
+def set_tracer(tracer):
+    """
+    Install the tracer receiving the spans of the process, None to disable tracing (the default).
+
+    A tracer is any object with a start_span(name, attributes) method returning a context manager which gives a span
+    with set_attribute(key, value) and is_recording(), such as RecordingTracer or OpenTelemetryTracer.
+
+    :param tracer: The tracer, or None.
+    """
+    global _tracer
+    _tracer = tracer
+
+
+def get_tracer():
+    """
+    Return the installed tracer, None when tracing is disabled.
+    """
+    return _tracer
+
+
+class _RecordingSpan:
+    __slots__ = ("tracer", "name", "attributes", "start", "parent")
+
+    def __init__(self, tracer, name, attributes):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.start = None
+        self.parent = None
+
+    def __enter__(self):
+        stack = self.tracer._stack()
+        self.parent = stack[-1].name if stack else None
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        stack = self.tracer._stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        self.tracer._finish(SpanRecord(self.name, self.attributes, self.start, duration, self.parent,
+                                       exc_type.__name__ if exc_type is not None else None))
+        return False
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def is_recording(self) -> bool:
+        return True
+
+
+class RecordingTracer:
+    """
+    RecordingTracer Class:
+
+    Tracer keeping the finished spans in memory, to profile where the time of the requests goes:
+
+        tracer = RecordingTracer()
+        set_tracer(tracer)
+        weather.get_forecast()
+        for span in tracer.spans:
+            print(span.parent, span.name, round(span.duration * 1000, 2), span.attributes)
+
+    Spans started inside another span of the same thread record it as their parent.
+
+    :param max_spans: Number of spans kept, the oldest are dropped first, default is 10000.
+    :type max_spans: int
+
+    Methods:
+    - start_span(name, attributes): Start a span.
+    - clear(): Drop the recorded spans.
+    - totals(): Return the total duration and count of the spans by name.
+    """
+
+    def __init__(self, max_spans: int = 10000):
+        self.max_spans = max_spans
+        self.spans = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def start_span(self, name: str, attributes: dict = None):
+        return _RecordingSpan(self, name, attributes)
+
+    def clear(self):
+        with self._lock:
+            self.spans = []
+
+    def totals(self) -> dict:
+        """
+        Return the total duration in seconds and the number of the recorded spans by name.
+
+        :rtype: dict of str to (float, int)
+        """
+        totals = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            duration, count = totals.get(span.name, (0.0, 0))
+            totals[span.name] = (duration + span.duration, count + 1)
+        return totals
+
+    def _stack(self) -> list:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _finish(self, record):
+        with self._lock:
+            self.spans.append(record)
+            if len(self.spans) > self.max_spans:
+                del self.spans[:len(self.spans) - self.max_spans]
+
+
+def _otel_value(value):
+    # OpenTelemetry attributes are str, bool, int or float.
+    return value if isinstance(value, (str, bool, int, float)) else str(value)
+
+
+class _OpenTelemetrySpan:
+    """
+    Current OpenTelemetry span of an OpenTelemetryTracer span, skipping the attributes without a value, which
+    OpenTelemetry rejects with a warning.
+    """
+    __slots__ = ("_context", "_span")
+
+    def __init__(self, context):
+        self._context = context
+        self._span = None
+
+    def __enter__(self):
+        self._span = self._context.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._context.__exit__(exc_type, exc, tb)
+
+    def set_attribute(self, key, value):
+        if value is not None:
+            self._span.set_attribute(key, _otel_value(value))
+
+    def is_recording(self) -> bool:
+        return self._span.is_recording()
+
+
+class OpenTelemetryTracer:
+    """
+    OpenTelemetryTracer Class:
+
+    Adapter sending the spans to OpenTelemetry, as children of the current OpenTelemetry span:
+
+        set_tracer(OpenTelemetryTracer())
+
+    Requires the opentelemetry-api package, the spans are exported by the SDK configured by the application.
+
+    :param tracer: OpenTelemetry tracer, default is the tracer named "weathermap" of the global tracer provider.
+    :type tracer: opentelemetry.trace.Tracer, optional
+
+    Methods:
+    - start_span(name, attributes): Start a span as the current OpenTelemetry span.
+    """
+
+    def __init__(self, tracer=None):
+        if tracer is None:
+            if otel_trace is None:
+                raise ImportError("OpenTelemetryTracer requires OpenTelemetry, install it with "
+                                  "'pip install opentelemetry-api'.")
+            tracer = otel_trace.get_tracer("weathermap")
+        self.tracer = tracer
+
+    def start_span(self, name: str, attributes: dict = None):
+        attributes = {key: _otel_value(value) for key, value in (attributes or {}).items() if value is not None}
+        return _OpenTelemetrySpan(self.tracer.start_as_current_span(name, attributes=attributes))
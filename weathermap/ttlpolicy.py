@@ -0,0 +1,146 @@
+import re
+import time
+
+# Seconds between two updates of the OpenWeather data of a request type.
+UPSTREAM_CADENCE = {"weather": 600, "forecast": 3 * 3600, "air_pollution": 3600}
+
+_TIMEOUT_UNITS = {"S": 1, "M": 60, "H": 3600, "D": 86400}
+
+
+def parse_timeout(timeout: str) -> float:
+    """
+    Convert a timeout string to seconds.
+
+    :param timeout: The timeout, e.g. "30S", "5M", "1H" or "1D".
+    :type timeout: str
+    :return: The timeout in seconds.
+    :rtype: float
+    :raises ValueError: When the timeout is not valid.
+    """
+    match = re.match(r"^(\d+)\s*([a-zA-Z]+)$", str(timeout).strip())
+    if not match or match.group(2)[0].upper() not in _TIMEOUT_UNITS:
+        raise ValueError("Please provide a valid timeout interval")
+    return float(int(match.group(1)) * _TIMEOUT_UNITS[match.group(2)[0].upper()])
+
+
+def _normalize_location(location: str) -> str:
+    return re.sub(r"[^0-9A-Z]+", "", str(location).upper())
+
+
+class TTLPolicy:
+    """
+    TTLPolicy Class:
+
+    Expiry of the cache entries, parsed once from the timeouts of a Weather.
+
+    With the "fixed" policy an entry expires its timeout after it was cached. With the "upstream" policy it expires
+    when OpenWeather publishes the next update of its data: the time of the data (dt of a weather response, of the
+    first step of an air pollution response, the period before the first step of a forecast) plus the update cadence
+    of the request type plus publish_delay. The timeout is then an upper bound, and an entry lives at least min_ttl
+    seconds, so data late upstream is not requested in a loop.
+
+    Overrides set the timeouts of single locations, keyed by their cache location key ("TAMPAFLUS", "ZIP-33602US",
+    "CITY-4174757", "GRID0-01-N2795-W8247", see WeatherCache._get_location_key()), compared without their separators.
+    Weather builds these keys from the "city, state, country", "city, country" and "zip code, country" locations of its
+    ttl_overrides:
+
+        TTLPolicy({"weather": 3600, "forecast": 86400}, overrides={"TAMPAFLUS": "10M", "LONDONGB": {"forecast": "3H"}})
+
+    :param timeouts: Timeout in seconds per request type.
+    :type timeouts: dict
+    :param mode: "fixed" or "upstream", default is "fixed".
+    :type mode: str
+    :param overrides: Timeouts per location key, a timeout string for every request type or a dict of timeout strings
+    per request type.
+    :type overrides: dict, optional
+    :param cadence: Update cadence in seconds per request type, default is UPSTREAM_CADENCE.
+    :type cadence: dict, optional
+    :param publish_delay: Seconds between the time of an update and its publication, default is 60.
+    :type publish_delay: float
+    :param min_ttl: Shortest lifetime of an entry in seconds with the "upstream" policy, default is 60.
+    :type min_ttl: float
+
+    Methods:
+    - ttl(req_type, location_key, timeout): Return the timeout of a request type at a location.
+    - expires_at(req_type, data, location_key, now, timeout): Return the expiry time of a response.
+    """
+    MODES = ("fixed", "upstream")
+
+    def __init__(self, timeouts: dict, mode: str = "fixed", overrides: dict = None, cadence: dict = None,
+                 publish_delay: float = 60.0, min_ttl: float = 60.0):
+        if mode not in self.MODES:
+            raise ValueError(f"Please provide valid ttl_policy. {list(self.MODES)}")
+        self.timeouts = dict(timeouts)
+        self.mode = mode
+        self.cadence = dict(UPSTREAM_CADENCE, **(cadence or {}))
+        self.publish_delay = publish_delay
+        self.min_ttl = min_ttl
+        self.overrides = {}
+        for location, timeout in (overrides or {}).items():
+            if isinstance(timeout, dict):
+                parsed = {req_type: parse_timeout(value) for req_type, value in timeout.items()}
+            else:
+                parsed = {req_type: parse_timeout(timeout) for req_type in self.timeouts}
+            self.overrides[_normalize_location(location)] = parsed
+
+    def ttl(self, req_type: str, location_key: str = None, timeout: float = None) -> float:
+        """
+        Return the timeout of a request type, overridden for the location when it has an override.
+
+        :param req_type: The request type.
+        :type req_type: str
+        :param location_key: Location key of the cache entry, see WeatherCache._get_location_key().
+        :type location_key: str, optional
+        :param timeout: Timeout in seconds used instead of the parsed one when the location has no override, default
+        is None.
+        :type timeout: float, optional
+        :return: The timeout in seconds.
+        :rtype: float
+        """
+        if location_key is not None and self.overrides:
+            override = self.overrides.get(_normalize_location(location_key), {})
+            if req_type in override:
+                return override[req_type]
+        return self.timeouts[req_type] if timeout is None else timeout
+
+    def expires_at(self, req_type: str, data: dict, location_key: str = None, now: float = None,
+                   timeout: float = None) -> float:
+        """
+        Return the expiry time of a response.
+
+        :param req_type: The request type.
+        :type req_type: str
+        :param data: The response.
+        :type data: dict
+        :param location_key: Location key of the cache entry, see WeatherCache._get_location_key().
+        :type location_key: str, optional
+        :param now: Time the response was received as a POSIX timestamp, default is now.
+        :type now: float, optional
+        :param timeout: Timeout in seconds used instead of the parsed one when the location has no override, default
+        is None.
+        :type timeout: float, optional
+        :return: The expiry time as a POSIX timestamp.
+        :rtype: float
+        """
+        now = time.time() if now is None else now
+        latest = now + self.ttl(req_type, location_key, timeout)
+        issued_at = self._issued_at(req_type, data) if self.mode == "upstream" else None
+        if issued_at is None:
+            return latest
+        return min(max(issued_at + self.cadence[req_type] + self.publish_delay, now + self.min_ttl), latest)
+
+    def _issued_at(self, req_type, data):
+        """
+        Return the time of the data of a response, None when the response does not tell it.
+        """
+        try:
+            if req_type == "weather":
+                return float(data["dt"])
+            if req_type == "forecast":
+                # The first step is the end of the current period of the forecast.
+                return float(data["list"][0]["dt"]) - self.cadence[req_type]
+            if req_type == "air_pollution":
+                return float(data["list"][0]["dt"])
+        except (KeyError, IndexError, TypeError, ValueError):
+            pass
+        return None
@@ -0,0 +1,81 @@
+CANONICAL_UNITS = "standard"
+
+_TEMPERATURE_FIELDS = ("temp", "feels_like", "temp_min", "temp_max")
+# Temperature differences, converted without the offset.
+_TEMPERATURE_DELTA_FIELDS = ("temp_kf",)
+_SPEED_FIELDS = ("speed", "gust")
+
+_MPH_PER_METER_PER_SECOND = 2.2369362920544
+
+
+def normalize_units(units: str) -> str:
+    """
+    Return the OpenWeather units system of a units name: "imperial", "metric" or "standard".
+
+    :param units: Units name, any case. OpenWeather answers unknown units in standard units.
+    :type units: str
+    :return: The units system.
+    :rtype: str
+    """
+    units = (units or CANONICAL_UNITS).strip().lower()
+    return units if units in ("imperial", "metric") else CANONICAL_UNITS
+
+
+def _converters(units: str):
+    """
+    Return the temperature, temperature difference and speed conversions from standard units to units.
+    """
+    if units == "imperial":
+        return (lambda kelvin: round((kelvin - 273.15) * 9 / 5 + 32, 2),
+                lambda delta: round(delta * 9 / 5, 2),
+                lambda speed: round(speed * _MPH_PER_METER_PER_SECOND, 2))
+    return (lambda kelvin: round(kelvin - 273.15, 2), None, None)
+
+
+def convert_units(data, units: str):
+    """
+    Convert an OpenWeather response from standard units (Kelvin, meter/sec) to units.
+
+    The temperatures and the wind speeds of a weather response, and of every item of a forecast response, are
+    converted in one pass. The response is not modified: the converted dictionaries are copies, the others are shared.
+    Other responses, such as air pollution, are returned as they are.
+
+    :param data: The response in standard units.
+    :type data: dict
+    :param units: The units of the result: "imperial", "metric" or "standard".
+    :type units: str
+    :return: The response in units.
+    :rtype: dict
+    """
+    units = normalize_units(units)
+    if units == CANONICAL_UNITS or not isinstance(data, dict):
+        return data
+
+    temperature, temperature_delta, speed = _converters(units)
+
+    def convert_item(item):
+        converted = dict(item)
+        main = item.get("main")
+        if isinstance(main, dict):
+            main = dict(main)
+            for field in _TEMPERATURE_FIELDS:
+                if isinstance(main.get(field), (int, float)):
+                    main[field] = temperature(main[field])
+            if temperature_delta is not None:
+                for field in _TEMPERATURE_DELTA_FIELDS:
+                    if isinstance(main.get(field), (int, float)):
+                        main[field] = temperature_delta(main[field])
+            converted["main"] = main
+        wind = item.get("wind")
+        if speed is not None and isinstance(wind, dict):
+            wind = dict(wind)
+            for field in _SPEED_FIELDS:
+                if isinstance(wind.get(field), (int, float)):
+                    wind[field] = speed(wind[field])
+            converted["wind"] = wind
+        return converted
+
+    converted = convert_item(data)
+    if isinstance(data.get("list"), list):
+        converted["list"] = [convert_item(item) if isinstance(item, dict) else item for item in data["list"]]
+    return converted
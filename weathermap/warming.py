@@ -0,0 +1,152 @@
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+
+import requests
+
+from .WeatherCache import CacheCleaningDisabledError
+from .weather import Weather
+
+_REFRESH_ERRORS = (ValueError, AttributeError, TypeError, OSError, requests.exceptions.RequestException)
+
+logger = logging.getLogger(__name__)
+
+
+class CacheWarmer(threading.Thread):
+    """
+    CacheWarmer Class:
+
+    Daemon thread keeping the cache entries of hot locations fresh, so interactive requests for them always hit the
+    cache. Each entry is refreshed shortly before it expires: at a random time within the last 2 * refresh_ahead of
+    its timeout, so entries created together are refreshed at different times. Entries missing from the cache are
+    fetched at random times within startup_window seconds of the start, so many locations do not hit the API at
+    once. Refreshes are sent at background priority through the rate limiter, behind the interactive requests, and a
+    failed refresh is retried after retry_interval seconds while the entry stays in use. Unexpected errors are logged
+    and retried the same way, they never stop the warmer.
+
+        warmer = CacheWarmer("231432521352512355", [{"city": "Tampa", "country": "US"}, "London"],
+                             req_types=("weather", "forecast"))
+        warmer.start()
+
+    :param apikey: Your API key from openweathermap.org
+    :type apikey: str
+    :param locations: Hot locations. Each one is a dict of Weather location arguments (city, state, country, lat,
+    lon, zip_code) or a city name.
+    :type locations: iterable
+    :param req_types: Request types kept fresh for every location, default is ("weather",).
+    :type req_types: tuple
+    :param refresh_ahead: Fraction of the timeout of an entry, the entry is refreshed between 2 * refresh_ahead and
+    refresh_ahead of its timeout before it expires, default is 0.1.
+    :type refresh_ahead: float
+    :param retry_interval: Seconds before a failed refresh is retried, default is 60.
+    :type retry_interval: float
+    :param startup_window: Seconds over which the entries missing from the cache are fetched, default is 30.
+    :type startup_window: float
+    :param kwargs: Other Weather arguments applied to every location (units, cache options, timeouts...), they must
+    match the ones of the interactive requests for both to share the cache entries.
+
+    Methods:
+    - stop(timeout=None): Stop the warmer and wait for its thread to finish.
+    - stats(): Return the number of locations, refreshes, failures and the seconds until the next refresh.
+    """
+
+    def __init__(self, apikey: str, locations, req_types=("weather",), refresh_ahead: float = 0.1,
+                 retry_interval: float = 60.0, startup_window: float = 30.0, **kwargs):
+        super().__init__(name="weathermap-warmer", daemon=True)
+        if not 0 < refresh_ahead < 0.5:
+            raise ValueError("refresh_ahead must be between 0 and 0.5")
+        if retry_interval <= 0:
+            raise ValueError("retry_interval must be greater than 0.")
+        if startup_window < 0:
+            raise ValueError("startup_window must be 0 or greater.")
+        self.refresh_ahead = refresh_ahead
+        self.retry_interval = retry_interval
+        self.startup_window = startup_window
+        self.refreshes = 0
+        self.failures = 0
+        self.last_error = None
+        self._stop_event = threading.Event()
+        self._sequence = itertools.count()
+        self._schedule = []
+
+        kwargs.setdefault("request_priority", "background")
+        now = time.time()
+        for location in locations:
+            location_kwargs = {"city": location} if isinstance(location, str) else dict(location)
+            for req_type in req_types:
+                weather = Weather(apikey=apikey, req_type=req_type, track_location=False, **location_kwargs,
+                                  **kwargs)
+                if not weather.cache_system or not weather._cacheable():
+                    raise ValueError(f"Location is not cacheable: {location}")
+                self._push(self._next_refresh(weather, now, now + random.uniform(0, startup_window)), weather)
+        self._locations = len(self._schedule)
+
+    def run(self):
+        while self._schedule and not self._stop_event.is_set():
+            due, _, weather = self._schedule[0]
+            if self._stop_event.wait(max(due - time.time(), 0)):
+                break
+            heapq.heappop(self._schedule)
+            try:
+                weather.refresh()
+                self.refreshes += 1
+                self._push(self._next_refresh(weather, time.time()), weather)
+            except Exception as e:
+                if not isinstance(e, _REFRESH_ERRORS):
+                    logger.exception("Refresh of a %s cache entry failed, retrying in %s seconds", weather.req_type,
+                                     self.retry_interval)
+                # The cached entry keeps being used, stale, until a refresh succeeds.
+                self.failures += 1
+                self.last_error = e
+                self._push(time.time() + self.retry_interval, weather)
+
+    def stop(self, timeout: float = None):
+        """
+        Stop the warmer and wait for its thread to finish.
+
+        :param timeout: Maximum number of seconds to wait, default is to wait until the thread finishes.
+        :type timeout: float, optional
+        """
+        self._stop_event.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
+
+    def stats(self) -> dict:
+        """
+        Return the statistics of the warmer.
+
+        :return: "locations" (entries kept fresh), "refreshes", "failures" and "next_refresh" (seconds until the next
+        refresh).
+        :rtype: dict
+        """
+        schedule = list(self._schedule)
+        return {
+            "locations": self._locations,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "next_refresh": max(min(schedule)[0] - time.time(), 0.0) if schedule else None,
+        }
+
+    def _push(self, due, weather):
+        heapq.heappush(self._schedule, (due, next(self._sequence), weather))
+
+    def _next_refresh(self, weather, now, missing=None) -> float:
+        """
+        Return the time of the next refresh of a location: missing (default now) when it is not cached, otherwise a
+        random time between 2 * refresh_ahead and refresh_ahead of its timeout before its cache entry expires.
+        """
+        timeout_param = weather._begin_request()
+        try:
+            names = weather._cache_names()
+            ttl = weather._max_age(timeout_param, names)
+            lookup = weather._lookup_cache(timeout=timeout_param, max_stale=float("inf"), max_age=ttl, **names)
+        except (OSError, FileNotFoundError, CacheCleaningDisabledError, TypeError):
+            return now if missing is None else missing
+        expires_at = lookup.created_at + ttl
+        if lookup.expires_at is not None:
+            expires_at = min(expires_at, lookup.expires_at)
+        lead = ttl * self.refresh_ahead
+        return max(expires_at - lead - random.uniform(0, lead), now)
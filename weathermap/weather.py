@@ -1,8 +1,46 @@
+import os
 import re
+import copy
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from datetime import timedelta
 
 import requests
-from .WeatherCache import WeatherCache, CacheCleaningDisabledError
+
+from .WeatherCache import WeatherCache, CacheCleaningDisabledError, NEGATIVE_REQ_TYPE
 from .locationtrack import LocationTrack, LocationError
+from .gazetteer import Gazetteer
+from .units import CANONICAL_UNITS, convert_units, normalize_units
+from .forecastframe import ForecastFrame
+from .ttlpolicy import TTLPolicy, parse_timeout
+from .tracing import start_span
+from .metrics import CACHE_HITS, CACHE_MISSES, CACHE_STALE, HTTP_SECONDS, PARSE_SECONDS, UPSTREAM_REQUESTS
+from .session import get_default_session, DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT
+from .singleflight import SingleFlight, FileLock
+from .ratelimit import BACKGROUND, get_default_limiter, resolve_priority
+from .resilience import (CircuitOpenError, DeadlineExceededError, LatencyTracker, RetryableStatusError,
+                         backoff_delay, get_default_breaker)
+
+# Requests in flight in this process, shared by every Weather.
+_in_flight = SingleFlight()
+# Requests being refreshed in the background after a stale cache hit.
+_revalidating = set()
+_revalidating_lock = threading.Lock()
+# Latencies of the API responses of this process, for the hedge_after percentiles.
+_latencies = LatencyTracker()
+# Threads sending hedged requests, created on first use.
+_hedge_executor = None
+_hedge_executor_lock = threading.Lock()
+_MAX_RETRY_BACKOFF = 5.0
+
+
+def _get_hedge_executor():
+    global _hedge_executor
+    with _hedge_executor_lock:
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="weathermap-hedge")
+        return _hedge_executor
 
 
 class Weather(WeatherCache, LocationTrack):
@@ -37,6 +75,9 @@ class Weather(WeatherCache, LocationTrack):
 
     To get a simplified version of the data for the next 12 hours, you can use:
         weather1.next12h_simplified()
+
+    To read the forecast as NumPy columns (temp, humidity, wind_speed, pop, condition...), use:
+        weather1.forecast_frame()
     """
 
     def __init__(
@@ -74,6 +115,77 @@ class Weather(WeatherCache, LocationTrack):
         :type cache_system: bool
         :keyword track_location: Enable or disable location tracking, default is True
         :type track_location: bool
+        :keyword session: Session used for the API requests, default is the pooled session shared by the process
+        (see weathermap.session)
+        :type session: requests.Session
+        :keyword connect_timeout: Seconds to wait for a connection to the API, default is 3.05
+        :type connect_timeout: float
+        :keyword read_timeout: Seconds to wait for the API to answer, default is 10
+        :type read_timeout: float
+        :keyword rate_limiter: Token bucket the API requests wait on, None to send them without limit, default is the
+        limiter set with set_default_limiter(), None unless one was set (see weathermap.ratelimit)
+        :type rate_limiter: RateLimiter
+        :keyword request_priority: "interactive" or "background", waiting interactive requests are sent first,
+        default is "interactive"
+        :type request_priority: str
+        :keyword request_deadline: Seconds an API request may take in total, retries and rate limiting included,
+        default is 30 (None for no deadline)
+        :type request_deadline: float
+        :keyword max_retries: Retries of an API request failing with a connection error, a timeout or a server error
+        (HTTP 5xx), after a jittered exponential back-off, default is 2
+        :type max_retries: int
+        :keyword retry_backoff: Back-off of the first retry in seconds, doubled at each retry, default is 0.25
+        :type retry_backoff: float
+        :keyword hedge_after: Send a second identical request when the first one has not answered after this many
+        seconds, or after this percentile of the recent response times (e.g. "p95"), and use the first response,
+        default is None (no hedging)
+        :type hedge_after: float or str
+        :keyword circuit_breaker: Circuit breaker failing fast while the API is down, None to disable it, default is
+        the breaker set with set_default_breaker(), None unless one was set (see weathermap.resilience). While it is
+        open, and whenever the API can not be reached, requests are answered from the cache whatever the age of the
+        cached response.
+        :type circuit_breaker: CircuitBreaker
+        :keyword base_url: Base url of the API, e.g. a local stub server in tests, default is
+        "https://api.openweathermap.org/data/2.5/"
+        :type base_url: str
+        :keyword coalesce_requests: Let concurrent identical requests of the process wait for the first one instead of
+        each requesting the API, default is True
+        :type coalesce_requests: bool
+        :keyword cache_file_lock: Also coalesce identical requests across processes sharing the cache directory with
+        a lock file per request, default is False
+        :type cache_file_lock: bool
+        :keyword cache_directory: Directory of the cache system, default is "weather_cache"
+        :type cache_directory: str
+        :keyword memory_cache_entries: Number of entries kept in the in-process memory tier of the cache, default is
+        256 (0 disables it)
+        :type memory_cache_entries: int
+        :keyword memory_cache_bytes: Byte budget of the in-process memory tier of the cache, default is None
+        :type memory_cache_bytes: int
+        :keyword cache_backend: "file" to store each cache entry as a JSON file or "sqlite" to store them in a single
+        SQLite database, default is "file"
+        :type cache_backend: str
+        :keyword auto_cache_clean_for_exceed_limit: Evict cache entries when the cache exceeds cache_size_limit_mb,
+        default is False
+        :type auto_cache_clean_for_exceed_limit: bool
+        :keyword cache_size_limit_mb: Size limit of the cache in megabytes, default is 200
+        :type cache_size_limit_mb: int
+        :keyword cache_low_watermark: Fraction of cache_size_limit_mb the cache is brought under by an eviction,
+        default is 0.5
+        :type cache_low_watermark: float
+        :keyword cache_janitor_interval: Seconds between two sweeps of a background thread deleting expired cache
+        entries and enforcing cache_size_limit_mb, default is None (no background thread)
+        :type cache_janitor_interval: float
+        :keyword cache_grid: Size in degrees of the grid cells coordinates are snapped to when the cache system is
+        enabled. Every point of a cell shares one cache entry and one API request for the center of the cell, default
+        is 0.01
+        :type cache_grid: float
+        :keyword cache_geohash_precision: Snap coordinates to geohash cells of this many characters instead of the
+        cache_grid cells, default is None
+        :type cache_geohash_precision: int
+        :keyword gazetteer: Gazetteer, or path of a gazetteer file such as OpenWeather's city.list.json, resolving the
+        city, state and country or the zip code and country to a city id. Every input form of a place then shares one
+        cache entry and the API is queried by city id, default is None
+        :type gazetteer: Gazetteer or str
 
         Weather instance inherits LocationTrack module which can detect the location of the user based on the user IP.
         If a value for the city, zip_code, lat, and long is provided, location tracking will be disabled. It can be
@@ -81,6 +193,20 @@ class Weather(WeatherCache, LocationTrack):
         the provided inputs of city, state, country, zip_code, latitude, and longitude values. The LocationTrack
         function tracks the location of the user by IP address which may not be an accurate location. Please consider
         that the incorrect location may provide you inaccurate weather data.)
+        The tracked location is looked up once and reused by every Weather of the process, and saved to
+        "<cache_directory>/location.json" for the following processes (in memory only when cache_system is False).
+        :keyword location_ttl: Seconds a tracked location is reused before it is looked up again, default is 3600
+        :type location_ttl: float
+        :keyword location_cache_path: File of the saved tracked location, default is "<cache_directory>/location.json"
+        :type location_cache_path: str
+        :keyword location_resolution: "sequential" to try the geolocation providers in order or "race" to query them
+        in parallel and use the first valid answer, default is "sequential"
+        :type location_resolution: str
+        :keyword location_providers: Geolocation providers, "ipinfo", "geocoder" or URLs of ipinfo compatible
+        endpoints, default is ("ipinfo", "geocoder")
+        :type location_providers: tuple
+        :keyword location_deadline: Seconds to wait for a valid answer in race resolution, default is 5
+        :type location_deadline: float
 
         By default, the cache system is turned on which helps reduce API calls to save costs. It can be disabled by
         providing the keyword argument cache_system=False. It is recommended to use a cache system. The timeout inputs
@@ -92,6 +218,26 @@ class Weather(WeatherCache, LocationTrack):
         :keyword air_pollution_timeout: Default is "1D" which is 1 day.
         :type air_pollution_timeout: str (e.g., "1D" for 1 day, "5M" for 5 minutes, "3H" for 3 hours)
 
+        Stale-while-revalidate: with max_stale set, a cached response which expired less than max_stale ago is
+        returned immediately and refreshed in the background. After each request, the freshness attribute holds the
+        source ("cache" or "network"), the age in seconds and whether the response is stale.
+        :keyword ttl_policy: "fixed" to expire cached responses their timeout after they were cached, "upstream" to
+        expire them when OpenWeather publishes the next update of their data (the dt of the response plus the update
+        cadence of the request type, see weathermap.ttlpolicy), the timeouts being an upper bound. Default is "fixed".
+        :type ttl_policy: str
+        :keyword ttl_overrides: Timeouts of single locations, keyed by "city, state, country", "city, country"
+        or "zip code, country", a timeout string for every request type or a dict of them per request type. The
+        locations match the requests giving the same inputs, or the same place of the gazetteer. Default is None.
+        :type ttl_overrides: dict (e.g., {"Tampa, FL, US": "10M", "London, GB": {"forecast": "3H"}})
+
+        :keyword max_stale: Default is None, expired responses are never returned.
+        :type max_stale: str (e.g., "30M" for 30 minutes, "2H" for 2 hours)
+
+        Error responses due to the location or the arguments of a request, such as "city not found", are cached
+        separately from the weather data, so repeating the request raises the same error without an API call.
+        :keyword negative_cache_timeout: Default is "5M" which is 5 minutes, "0S" disables the negative cache.
+        :type negative_cache_timeout: str (e.g., "5M" for 5 minutes, "1H" for 1 hour)
+
         """
         self.base_url = "https://api.openweathermap.org/data/2.5/"
         self.city = city.strip() if city is not None else None
@@ -105,11 +251,32 @@ class Weather(WeatherCache, LocationTrack):
         self.units = "Imperial"
         self.cache_system = True
         self.cache_cleaning = True
+        self.cache_directory = "weather_cache"
         self.forecast_timeout = "1D"
         self.weather_timeout = "1H"
         self.air_pollution_timeout = "1D"
         self.track_location = True
         self.req_type = req_type
+        self.session = None
+        self.connect_timeout = DEFAULT_CONNECT_TIMEOUT
+        self.read_timeout = DEFAULT_READ_TIMEOUT
+        self.rate_limiter = get_default_limiter()
+        self.request_priority = "interactive"
+        self.request_deadline = 30.0
+        self.max_retries = 2
+        self.retry_backoff = 0.25
+        self.hedge_after = None
+        self.circuit_breaker = get_default_breaker()
+        self.coalesce_requests = True
+        self.cache_file_lock = False
+        self.max_stale = None
+        self.freshness = None
+        self.gazetteer = None
+        self.place = None
+        self.negative_cache_timeout = "5M"
+        self.ttl_policy = "fixed"
+        self.ttl_overrides = None
+        self._timeout_params = {}
 
         if "zip_code" in kwargs:
             self.zip_code = str(kwargs["zip_code"]).strip()
@@ -135,6 +302,72 @@ class Weather(WeatherCache, LocationTrack):
                 del kwargs["cache_cleaning"]
             else:
                 raise ValueError("cache_cleaning must be bool")
+        if "session" in kwargs:
+            self.session = kwargs["session"]
+            del kwargs["session"]
+        if "connect_timeout" in kwargs:
+            self.connect_timeout = kwargs["connect_timeout"]
+            del kwargs["connect_timeout"]
+        if "read_timeout" in kwargs:
+            self.read_timeout = kwargs["read_timeout"]
+            del kwargs["read_timeout"]
+        if self.session is None:
+            self.session = get_default_session()
+        if "rate_limiter" in kwargs:
+            self.rate_limiter = kwargs["rate_limiter"]
+            del kwargs["rate_limiter"]
+        if "request_priority" in kwargs:
+            resolve_priority(kwargs["request_priority"])
+            self.request_priority = kwargs["request_priority"]
+            del kwargs["request_priority"]
+        if "request_deadline" in kwargs:
+            deadline = kwargs["request_deadline"]
+            if deadline is None or (type(deadline) in (int, float) and deadline > 0):
+                self.request_deadline = deadline
+                del kwargs["request_deadline"]
+            else:
+                raise ValueError("request_deadline must be a positive number or None")
+        if "max_retries" in kwargs:
+            if type(kwargs["max_retries"]) == int and kwargs["max_retries"] >= 0:
+                self.max_retries = kwargs["max_retries"]
+                del kwargs["max_retries"]
+            else:
+                raise ValueError("max_retries must be a positive int or 0")
+        if "retry_backoff" in kwargs:
+            if type(kwargs["retry_backoff"]) in (int, float) and kwargs["retry_backoff"] >= 0:
+                self.retry_backoff = kwargs["retry_backoff"]
+                del kwargs["retry_backoff"]
+            else:
+                raise ValueError("retry_backoff must be a positive number or 0")
+        if "hedge_after" in kwargs:
+            hedge_after = kwargs["hedge_after"]
+            if hedge_after is None or (type(hedge_after) in (int, float) and hedge_after > 0) or (
+                    isinstance(hedge_after, str) and re.match(r"^[pP]\d+(\.\d+)?$", hedge_after.strip())):
+                self.hedge_after = hedge_after.strip().lower() if isinstance(hedge_after, str) else hedge_after
+                del kwargs["hedge_after"]
+            else:
+                raise ValueError("Please provide valid hedge_after. eg. 0.5 for half a second or 'p95'")
+        if "circuit_breaker" in kwargs:
+            self.circuit_breaker = kwargs["circuit_breaker"]
+            del kwargs["circuit_breaker"]
+        if "base_url" in kwargs:
+            self.base_url = kwargs["base_url"].rstrip("/") + "/"
+            del kwargs["base_url"]
+        if "coalesce_requests" in kwargs:
+            if type(kwargs["coalesce_requests"]) == bool:
+                self.coalesce_requests = kwargs["coalesce_requests"]
+                del kwargs["coalesce_requests"]
+            else:
+                raise ValueError("coalesce_requests must be bool")
+        if "cache_file_lock" in kwargs:
+            if type(kwargs["cache_file_lock"]) == bool:
+                self.cache_file_lock = kwargs["cache_file_lock"]
+                del kwargs["cache_file_lock"]
+            else:
+                raise ValueError("cache_file_lock must be bool")
+        if "cache_directory" in kwargs:
+            self.cache_directory = kwargs["cache_directory"]
+            del kwargs["cache_directory"]
         if "forecast_timeout" in kwargs:
             match = re.match(r"^\d+\s*[a-zA-Z]+$", kwargs["forecast_timeout"])
             if match:
@@ -162,6 +395,36 @@ class Weather(WeatherCache, LocationTrack):
                 raise ValueError(
                     "Please provide valid air_pollution_timeout. eg.'1D' for 1 Day"
                 )
+        if "max_stale" in kwargs:
+            match = re.match(r"^\d+\s*[a-zA-Z]+$", kwargs["max_stale"])
+            if match:
+                self.max_stale = kwargs["max_stale"]
+                del kwargs["max_stale"]
+            else:
+                raise ValueError("Please provide valid max_stale. eg.'1H' for 1 Hour")
+        if "negative_cache_timeout" in kwargs:
+            match = re.match(r"^\d+\s*[a-zA-Z]+$", kwargs["negative_cache_timeout"])
+            if match:
+                self.negative_cache_timeout = kwargs["negative_cache_timeout"]
+                del kwargs["negative_cache_timeout"]
+            else:
+                raise ValueError("Please provide valid negative_cache_timeout. eg.'5M' for 5 Minutes")
+        if "ttl_policy" in kwargs:
+            if kwargs["ttl_policy"] in TTLPolicy.MODES:
+                self.ttl_policy = kwargs["ttl_policy"]
+                del kwargs["ttl_policy"]
+            else:
+                raise ValueError(f"Please provide valid ttl_policy. {list(TTLPolicy.MODES)}")
+        if "ttl_overrides" in kwargs:
+            if kwargs["ttl_overrides"] is None or isinstance(kwargs["ttl_overrides"], dict):
+                self.ttl_overrides = kwargs["ttl_overrides"]
+                del kwargs["ttl_overrides"]
+            else:
+                raise ValueError("ttl_overrides must be a dict")
+        if "gazetteer" in kwargs:
+            gazetteer = kwargs["gazetteer"]
+            self.gazetteer = Gazetteer.load(gazetteer) if isinstance(gazetteer, str) else gazetteer
+            del kwargs["gazetteer"]
         if "track_location" in kwargs:
             if type(kwargs["track_location"]) == bool:
                 self.track_location = kwargs["track_location"]
@@ -174,18 +437,57 @@ class Weather(WeatherCache, LocationTrack):
         if "track_location" in kwargs:
             self.track_location = kwargs["track_location"]
 
+        self._max_stale_seconds = 0
+        if self.max_stale:
+            self._max_stale_seconds = self._forecast_timedelta(
+                self._timeout_time_clean(timeout=self.max_stale, req_type="weather")
+            ).total_seconds()
+
+        self._negative_max_age = self._forecast_timedelta(
+            self._timeout_time_clean(timeout=self.negative_cache_timeout, req_type="weather")
+        ).total_seconds()
+
+        # Parsed once, the requests of this object only look the timeouts up.
+        self._ttl = TTLPolicy(
+            {req_type: parse_timeout(getattr(self, f"{req_type}_timeout"))
+             for req_type in ("weather", "forecast", "air_pollution")},
+            mode=self.ttl_policy,
+            overrides={self._override_location_key(location): timeout
+                       for location, timeout in (self.ttl_overrides or {}).items()},
+        )
+
         if self.cache_system:
+            cache_timeouts = {
+                req_type: timedelta(seconds=self._ttl.ttl(req_type))
+                for req_type in ("weather", "forecast", "air_pollution")
+            }
+            cache_timeouts[NEGATIVE_REQ_TYPE] = timedelta(seconds=self._negative_max_age)
             WeatherCache.__init__(
                 self,
                 cache_system=self.cache_system,
-                cache_directory="weather_cache",
+                cache_directory=self.cache_directory,
                 cache_cleaning=self.cache_cleaning,
+                cache_timeouts=cache_timeouts,
                 **kwargs,
             )
         if self.track_location:
-            LocationTrack.__init__(self, track_location=self.track_location, **kwargs)
+            if "location_cache_path" not in kwargs:
+                kwargs["location_cache_path"] = (
+                    os.path.join(self.cache_directory, "location.json") if self.cache_system else None
+                )
+            LocationTrack.__init__(
+                self,
+                track_location=self.track_location,
+                session=self.session,
+                connect_timeout=self.connect_timeout,
+                read_timeout=self.read_timeout,
+                **kwargs,
+            )
 
         self._validate_input()
+        if self.gazetteer is not None:
+            self.place = self.gazetteer.resolve(city=self.city, state=self.state, country=self.country,
+                                                zip_code=self.zip_code)
 
     def _validate_input(self):
         """
@@ -207,10 +509,12 @@ class Weather(WeatherCache, LocationTrack):
         try:
             if type(self.track_location) == bool:
                 if self.track_location:
-                    location = LocationTrack()
-                    self.city = location.city.strip()
-                    self.state = location.state.strip()
-                    self.country = location.country.strip()
+                    # The location was resolved by LocationTrack.__init__, from the shared location when known.
+                    if self.city is None:
+                        raise LocationError("Failed to retrieve location information automatically")
+                    self.city = self.city.strip()
+                    self.state = self.state.strip() if self.state else self.state
+                    self.country = self.country.strip() if self.country else self.country
                 else:
                     raise LocationError
             else:
@@ -249,170 +553,723 @@ class Weather(WeatherCache, LocationTrack):
         It first checks if the cached data is available and within the valid time range. If not, it makes a new API
         request and either caches the received data or uses it directly based on the response status.
 
+        Concurrent requests for the same location and request type in a process are coalesced: one of them requests
+        the API and the others wait for its response (see coalesce_requests and cache_file_lock). The returned data
+        may then be shared and should not be modified.
+
+        Cacheable requests are sent and cached in standard units and converted to the units of this object on return,
+        so Imperial, Metric and Standard requests share one cache entry and one API call.
+
+        When the API can not be reached (after the retries, past the request_deadline, or while the circuit breaker
+        is open), the cached response is returned whatever its age, and the error is raised only when there is none.
+
+        The phases of the request are traced as spans (see weathermap.tracing) when a tracer is installed.
+
         :param req_type: The request type ("weather", "forecast", "air_pollution"). If provided, it updates the request
         type for this call.
         :type req_type: str, optional
         :return: Retrieved weather data.
         :rtype: dict
-        :raises OSError: When an OS error occurs during API request.
-        :raises FileNotFoundError: When the API response indicates an error.
-        :raises CacheCleaningDisabledError: When cache cleaning is disabled and cached data is not available.
-        :raises ValueError: When there is a missing attribute or the provided arguments are not valid.
+        :raises requests.exceptions.RequestException: When the API request fails or times out.
+        :raises ValueError: When the API response indicates an error or the provided arguments are not valid.
         :raises AttributeError: When there are not enough arguments provided to retrieve weather information.
         """
+        with start_span("weathermap.api_request") as span:
+            timeout_param = self._begin_request(req_type)
+            if span.is_recording():
+                self._trace_request(span)
+            cached = self._cached_response(timeout_param)
+            if cached is not None:
+                span.set_attribute("cache", "stale" if self.freshness["stale"] else "hit")
+                self.data = cached
+                return self.data
+
+            span.set_attribute("cache", "miss")
+            self.data = self._fetch_missed(timeout_param)
+            if self.freshness["source"] == "cache":
+                span.set_attribute("cache", "fallback")
+            return self.data
+
+    def _fetch_missed(self, timeout_param):
+        """
+        Fetch the current request once its cache lookup missed, without looking it up again. When the API can not be
+        reached, the cached response is returned whatever its age (see _fallback_response()).
+
+        :param timeout_param: Timeout values of the request type.
+        :type timeout_param: dict
+        :return: The response in the units of this object.
+        :rtype: dict
+        :raises requests.exceptions.RequestException: When the API request fails and nothing is cached.
+        """
+        try:
+            data = self._coalesced_fetch(timeout_param, missed=True)
+        except requests.exceptions.RequestException:
+            data = self._fallback_response(timeout_param)
+            if data is None:
+                raise
+            return data
+        self.freshness = {"source": "network", "age": 0.0, "stale": False}
+        return data
+
+    def refresh(self, req_type=None):
+        """
+        Request the API and update the cache, whether or not the cached data is still valid.
+
+        :param req_type: The request type ("weather", "forecast", "air_pollution"), default is the current req_type.
+        :type req_type: str, optional
+        :return: Retrieved weather data.
+        :rtype: dict
+        """
+        with start_span("weathermap.refresh") as span:
+            timeout_param = self._begin_request(req_type)
+            if span.is_recording():
+                self._trace_request(span)
+            self.data = self._coalesced_fetch(timeout_param, check_cache=False)
+            self.freshness = {"source": "network", "age": 0.0, "stale": False}
+            return self.data
+
+    def _trace_request(self, span):
+        """
+        Set the request type and the location key of the current request as attributes of a span.
+        """
+        span.set_attribute("req_type", self.req_type)
+        try:
+            span.set_attribute("location_key", self._request_identity()[0])
+        except (AttributeError, CacheCleaningDisabledError, TypeError, ValueError):
+            pass
+
+    def _coalesced_fetch(self, timeout_param, check_cache=True, missed=False):
+        """
+        Fetch the current request, waiting for an identical request in flight when coalesce_requests is enabled.
+
+        :return: The API response in the units of this object.
+        :rtype: dict
+        """
+        if self.coalesce_requests:
+            data = _in_flight.do(
+                self._request_identity(), lambda: self._fetch(timeout_param, check_cache, missed)
+            )
+        else:
+            data = self._fetch(timeout_param, check_cache, missed)
+        return self._in_requested_units(data)
+
+    def _fetch(self, timeout_param, check_cache=True, missed=False):
+        """
+        Request the API and cache the response, holding the cache file lock of the request when cache_file_lock is
+        enabled. The cache is checked first, unless the caller just missed it: then it is only checked again after
+        waiting for the cache file lock, as another process may have filled it in the meantime.
+
+        :param timeout_param: Timeout values of the request type.
+        :type timeout_param: dict
+        :param check_cache: Return the cached data if it is valid, default is True.
+        :type check_cache: bool
+        :param missed: The cache was just looked up without a valid entry, default is False.
+        :type missed: bool
+        :return: The API response, in the units of the API request (see _api_units()).
+        :rtype: dict
+        """
+        if self.cache_file_lock and self.cache_system and self._cacheable():
+            lock_name = f"{self._get_cache_key(self._cache_names())}.lock"
+            with FileLock(os.path.join(self.cache_directory, "locks", lock_name)):
+                return self._fetch_unlocked(timeout_param, check_cache)
+        return self._fetch_unlocked(timeout_param, check_cache, missed)
+
+    def _fetch_unlocked(self, timeout_param, check_cache=True, missed=False):
+        if check_cache and not missed:
+            cached = self._cached_entry(timeout_param, allow_stale=False)
+            if cached is not None:
+                return cached
+
+        url, error_hint = self._request_url()
+        cached_error = self._cached_error(url) if check_cache else None
+        if cached_error is not None:
+            self._check_response(cached_error, error_hint)
+        data = self._parse_response(self._http_get(url))
+        self._store_error(data, url)
+        self._check_response(data, error_hint)
+        self._store_response(data, timeout_param)
+        return data
+
+    def _begin_request(self, req_type=None):
+        """
+        Set and validate the request type of a request.
+
+        :param req_type: The request type, default is the current req_type.
+        :type req_type: str, optional
+        :return: Timeout values of the request type.
+        :rtype: dict
+        :raises ValueError: When the request type is not valid.
+        """
         if req_type:
             self.req_type = req_type
+        if self.req_type not in ["weather", "forecast", "air_pollution"]:
+            raise ValueError(
+                "Provide valid req_type. ['weather', 'forecast', 'air_pollution']"
+            )
+        # Parsed once per timeout value, the timeouts may still be changed between requests.
+        timeout = getattr(self, f"{self.req_type}_timeout")
+        parsed = self._timeout_params.get(self.req_type)
+        if parsed is None or parsed[0] != timeout:
+            parsed = (timeout, self._timeout_time_clean(timeout=timeout, req_type=self.req_type))
+            self._timeout_params[self.req_type] = parsed
+        return parsed[1]
 
-        try:
-            if self.req_type == "weather":
-                timeout_param = self._timeout_time_clean(timeout=self.weather_timeout)
-                self.data = self._get_cached_weather(
-                    timeout=timeout_param,
-                    req_type=self.req_type,
-                    city=self.city,
-                    state=self.state,
-                    country=self.country,
-                    lat=self.lat,
-                    lon=self.lon,
-                )
-                if str(self.data["cod"]) != "200":
-                    raise FileNotFoundError(self.data["message"])
-                else:
-                    return self.data
-            elif self.req_type == "forecast":
-                timeout_param = self._timeout_time_clean(timeout=self.forecast_timeout)
-                self.data = self._get_cached_weather(
-                    timeout=timeout_param,
-                    req_type=self.req_type,
-                    city=self.city,
-                    state=self.state,
-                    country=self.country,
-                    lat=self.lat,
-                    lon=self.lon,
-                )
-                if str(self.data["cod"]) != "200":
-                    raise FileNotFoundError(self.data["message"])
-                else:
-                    return self.data
-            elif self.req_type == "air_pollution":
-                timeout_param = self._timeout_time_clean(
-                    timeout=self.air_pollution_timeout
-                )
-                self.data = self._get_cached_weather(
-                    timeout=timeout_param,
-                    req_type=self.req_type,
-                    city=self.city,
-                    state=self.state,
-                    country=self.country,
-                    lat=self.lat,
-                    lon=self.lon,
-                )
-                if str(self.data["cod"]) != "200":
-                    raise FileNotFoundError(self.data["message"])
-                else:
-                    return self.data
+    def _cached_response(self, timeout_param, allow_stale=True):
+        """
+        Return the cached response of the current request in the units of this object, or None when it is not
+        cached. See _cached_entry().
+
+        :param timeout_param: Timeout values of the request type.
+        :type timeout_param: dict
+        :param allow_stale: Return expired responses within max_stale, default is True.
+        :type allow_stale: bool
+        :return: The cached response.
+        :rtype: dict or None
+        """
+        data = self._cached_entry(timeout_param, allow_stale)
+        if self.cache_system:
+            if data is None:
+                CACHE_MISSES.inc(req_type=self.req_type)
             else:
-                raise ValueError(
-                    "Provide valid req_type. ['weather', 'forecast', 'air_pollution']"
-                )
+                CACHE_HITS.inc(req_type=self.req_type)
+                if self.freshness["stale"]:
+                    CACHE_STALE.inc(req_type=self.req_type)
+        return self._in_requested_units(data)
+
+    def _cached_entry(self, timeout_param, allow_stale=True):
+        """
+        Return the cached response of the current request, in standard units, or None when it is not cached.
 
+        With max_stale set, an expired response at most max_stale past its timeout is returned as well and a
+        background refresh of it is started. The freshness of the returned response is stored in self.freshness.
+
+        :param timeout_param: Timeout values of the request type.
+        :type timeout_param: dict
+        :param allow_stale: Return expired responses within max_stale, default is True.
+        :type allow_stale: bool
+        :return: The cached response.
+        :rtype: dict or None
+        """
+        try:
+            names = self._cache_names()
+            lookup = self._lookup_cache(
+                timeout=timeout_param,
+                max_stale=self._max_stale_seconds if allow_stale else 0,
+                max_age=self._max_age(timeout_param, names),
+                **names,
+            )
         except (OSError, FileNotFoundError, CacheCleaningDisabledError, TypeError):
-            timeout_param = self._timeout_time_clean(timeout=self.forecast_timeout)
-            if self.city and self.req_type != "air_pollution":
-                if self.city and self.state and self.country:
-                    url = (
-                        f"{self.base_url}{self.req_type}?q={self.city},{self.state},{self.country}&APPID="
-                        f"{self.apikey}&units={self.units}"
-                    )
-                    r = requests.get(url.strip())
-                    self.data = r.json()
-                    if str(self.data["cod"]) == "200":
-                        try:
-                            self._create_cache(
-                                data=r.json(),
-                                timeout=timeout_param,
-                                city=self.city,
-                                state=self.state,
-                                country=self.country,
-                                req_type=self.req_type,
-                            )
-                        except OSError:
-                            self.data = r.json()
-
-                elif self.city and self.country:
-                    url = f"{self.base_url}{self.req_type}?q={self.city},{self.country}&APPID={self.apikey}&units={self.units}"
-                    r = requests.get(url.strip())
-                    self.data = r.json()
-                    if str(self.data["cod"]) == "200":
-                        try:
-                            self._create_cache(
-                                data=r.json(),
-                                timeout=timeout_param,
-                                city=self.city,
-                                state=self.state,
-                                country=self.country,
-                                req_type=self.req_type,
-                            )
-                        except OSError:
-                            self.data = r.json()
-                else:
-                    url = f"{self.base_url}{self.req_type}?q={self.city}&APPID={self.apikey}&units={self.units}"
-                    r = requests.get(url.strip())
-                    self.data = r.json()
-                    if str(self.data["cod"]) == "200":
-                        try:
-                            self._create_cache(
-                                data=r.json(),
-                                timeout=timeout_param,
-                                city=self.city,
-                                state=self.state,
-                                country=self.country,
-                                req_type=self.req_type,
-                            )
-                        except OSError:
-                            self.data = r.json()
-
-                    if str(self.data["cod"]) != "200":
-                        raise ValueError(
-                            self.data["message"],
-                            "Check spelling or provide state and country code, "
-                            "or try zipcode and country.",
-                        )
-
-            elif self.lat and self.lon:
-                url = f"{self.base_url}{self.req_type}?lat={self.lat}&lon={self.lon}&APPID={self.apikey}&units={self.units}"
-                r = requests.get(url.strip())
-                self.data = r.json()
-
-                if str(self.data["cod"]) != "200":
-                    raise ValueError(
-                        self.data["message"],
-                        "Please provide valid latitude and longitude value",
-                    )
+            return None
+        if not self._response_ok(lookup.data):
+            return None
 
-            elif self.zip_code and self.country:
-                url = (
-                    f"{self.base_url}{self.req_type}?zip={self.zip_code},{self.country}&"
-                    f"APPID={self.apikey}&units={self.units}"
-                )
-                r = requests.get(url.strip())
-                self.data = r.json()
+        self.freshness = {"source": "cache", "age": lookup.age, "stale": lookup.stale}
+        if lookup.stale:
+            self._revalidate(timeout_param)
+        return lookup.data
 
-                if str(self.data["cod"]) != "200":
-                    raise ValueError(
-                        self.data["message"],
-                        "Please provide valid zipcode and country code.",
-                    )
+    def _max_age(self, timeout_param, names):
+        """
+        Return the timeout in seconds of the current request at its location, by the ttl_overrides.
+
+        :param timeout_param: Timeout values of the request type.
+        :type timeout_param: dict
+        :param names: Cache names of the request, see _cache_names().
+        :type names: dict
+        :rtype: float
+        """
+        return self._ttl.ttl(timeout_param['req_type'], self._get_location_key(names),
+                             self._forecast_timedelta(timeout_param).total_seconds())
+
+    def _override_location_key(self, location):
+        """
+        Return the cache location key of a ttl_overrides location, built like the keys of the requests so both match.
+
+        :param location: "city, state, country", "city, country", "zip code, country" or a cache location key.
+        :type location: str
+        :return: The location key, e.g. 'TAMPAFLUS', 'ZIP-33602US' or 'CITY-4174757' when the gazetteer knows the
+        place.
+        :rtype: str
+        :raises ValueError: When the location is not valid.
+        """
+        parts = [part.strip() for part in str(location).split(",")]
+        if len(parts) == 1:
+            return location
+        if len(parts) == 2 and any(char.isdigit() for char in parts[0]):
+            names = {"zip_code": parts[0], "country": parts[1]}
+        elif len(parts) == 2:
+            names = {"city": parts[0], "country": parts[1]}
+        elif len(parts) == 3:
+            names = {"city": parts[0], "state": parts[1], "country": parts[2]}
+        else:
+            raise ValueError(f"Please provide a valid ttl_overrides location: {location}")
+        if self.gazetteer is not None:
+            place = self.gazetteer.resolve(city=location if "city" in names else None, country=names["country"],
+                                           zip_code=names.get("zip_code"))
+            if place is not None:
+                names = {"place_id": place.id}
+        try:
+            return self._get_location_key(names)
+        except CacheCleaningDisabledError:
+            raise ValueError(f"Please provide a valid ttl_overrides location: {location}")
 
+    def _fallback_response(self, timeout_param):
+        """
+        Return the cached response of the current request whatever its age, in the units of this object, or None.
+        Used when the API can not be reached; self.freshness marks it stale when it expired.
+
+        :param timeout_param: Timeout values of the request type.
+        :type timeout_param: dict
+        :return: The cached response.
+        :rtype: dict or None
+        """
+        try:
+            names = self._cache_names()
+            lookup = self._lookup_cache(timeout=timeout_param, max_stale=float("inf"),
+                                        max_age=self._max_age(timeout_param, names), **names)
+        except (OSError, FileNotFoundError, CacheCleaningDisabledError, TypeError):
+            return None
+        if not self._response_ok(lookup.data):
+            return None
+        self.freshness = {"source": "cache", "age": lookup.age, "stale": lookup.stale}
+        if lookup.stale:
+            CACHE_STALE.inc(req_type=self.req_type)
+        return self._in_requested_units(lookup.data)
+
+    def _revalidate(self, timeout_param):
+        """
+        Refresh the cache of the current request in a background thread, unless a refresh of it is already running.
+
+        :param timeout_param: Timeout values of the request type.
+        :type timeout_param: dict
+        """
+        identity = self._request_identity()
+        with _revalidating_lock:
+            if identity in _revalidating:
+                return
+            _revalidating.add(identity)
+
+        # The refresh works on a copy, so later requests of this object may change its request type.
+        snapshot = copy.copy(self)
+        snapshot.request_priority = BACKGROUND
+
+        def refresh():
+            try:
+                snapshot._coalesced_fetch(timeout_param)
+            except Exception:
+                # The stale response keeps being served until a refresh succeeds.
+                pass
+            finally:
+                with _revalidating_lock:
+                    _revalidating.discard(identity)
+
+        threading.Thread(target=refresh, name="weathermap-revalidate", daemon=True).start()
+
+    def _api_units(self):
+        """
+        Return the units of the API request: standard units for cached requests, the units of this object otherwise.
+        """
+        if self.cache_system and self._cacheable():
+            return CANONICAL_UNITS
+        return normalize_units(self.units)
+
+    def _in_requested_units(self, data):
+        """
+        Convert a response in the units of the API request to the units of this object.
+
+        :param data: The response, or None.
+        :type data: dict
+        :return: The response in the units of this object.
+        :rtype: dict
+        """
+        if data is None or self._api_units() == normalize_units(self.units):
+            return data
+        return convert_units(data, self.units)
+
+    def _store_response(self, data, timeout_param):
+        """
+        Cache a successful response when the current request is cacheable, with its expiry time by the ttl_policy and
+        the ttl_overrides.
+
+        :param data: The API response.
+        :type data: dict
+        :param timeout_param: Timeout values of the request type.
+        :type timeout_param: dict
+        """
+        if self._cacheable():
+            names = self._cache_names()
+            try:
+                expires_at = self._ttl.expires_at(self.req_type, data, self._get_location_key(names),
+                                                  timeout=self._forecast_timedelta(timeout_param).total_seconds())
+                self._create_cache(data=data, timeout=timeout_param, expires_at=expires_at, **names)
+            except (OSError, CacheCleaningDisabledError):
+                pass
+
+    def _negative_query(self, url):
+        """
+        Return the request type and query of an API url, without the API key and the units.
+        """
+        return f"{self.req_type}?{url.split('?', 1)[1].split('&APPID=', 1)[0]}"
+
+    def _cached_error(self, url):
+        """
+        Return the cached error response of an API url, or None.
+
+        :param url: The url of the request.
+        :type url: str
+        :return: The error response, or None.
+        :rtype: dict or None
+        """
+        if not self._negative_max_age:
+            return None
+        try:
+            return self._get_negative_cache(self._negative_query(url), self._negative_max_age)
+        except (OSError, CacheCleaningDisabledError):
+            return None
+
+    def _store_error(self, data, url):
+        """
+        Cache an error response for negative_cache_timeout when it is due to the location or the arguments of the
+        request ("city not found", "wrong latitude"), so retries fail without an API call. Other errors, such as an
+        invalid API key or a rate limit, are never cached.
+
+        :param data: The API response.
+        :type data: dict
+        :param url: The url of the request.
+        :type url: str
+        """
+        if self._negative_max_age and self.cache_system and str(data.get("cod")) in ("400", "404"):
+            try:
+                self._create_negative_cache(data, self._negative_query(url))
+            except (OSError, CacheCleaningDisabledError):
+                pass
+
+    def _check_response(self, data, error_hint=None):
+        """
+        Raise when an API response is an error.
+
+        :param data: The API response.
+        :type data: dict
+        :param error_hint: Hint added to the error, see _request_url().
+        :type error_hint: str, optional
+        :raises ValueError: When the response is an error.
+        """
+        if not self._response_ok(data):
+            if error_hint:
+                raise ValueError(data["message"], error_hint)
+            raise ValueError(data["message"])
+
+    def _cache_names(self):
+        """
+        Return the inputs identifying the cache entry of the current request, the location inputs of the API query
+        sent by _request_url() and the units of the cached responses.
+
+        :return: Location, request type and units of the request, only the request type when it is not cacheable.
+        :rtype: dict
+        """
+        if self.place is not None and self.req_type != "air_pollution":
+            names = {"req_type": self.req_type, "place_id": self.place.id}
+        elif self.city and self.req_type != "air_pollution":
+            names = {"req_type": self.req_type, "city": self.city, "state": self.state, "country": self.country}
+        elif self.lat and self.lon:
+            names = {"req_type": self.req_type, "lat": self.lat, "lon": self.lon}
+        elif self.zip_code and self.country and self.req_type != "air_pollution":
+            names = {"req_type": self.req_type, "zip_code": self.zip_code, "country": self.country}
+        else:
+            return {"req_type": self.req_type}
+        # Responses are cached in standard units (see _api_units()). The units are part of the cache key, so entries
+        # cached in the units of the object by earlier versions are never converted as if they were standard.
+        names["units"] = CANONICAL_UNITS
+        return names
+
+    def _request_identity(self):
+        """
+        Return what identifies the current request: two Weather objects with the same identity get the same response.
+
+        :return: Tuple of the location key, the request type and the units of the API request (standard units for
+        cached requests, see _api_units()). The location key is the cache key's
+        location for cacheable requests and the API query otherwise.
+        :rtype: tuple
+        """
+        if self._cacheable():
+            location_key = self._get_location_key(self._cache_names())
+        else:
+            location_key = self._request_url()[0].split("?", 1)[1].split("&APPID=", 1)[0]
+        return location_key, self.req_type, self._api_units()
+
+    def _cacheable(self):
+        """
+        Return True when responses of the current request are cached: requests by city, by coordinates (shared by
+        the cell of the coordinate grid) and by zip code.
+        """
+        return len(self._cache_names()) > 1
+
+    def _request_url(self):
+        """
+        Build the API url of the current request.
+
+        :return: The url and the hint added to the error when the API rejects the location.
+        :rtype: tuple
+        :raises AttributeError: When there are not enough arguments provided to retrieve weather information.
+        """
+        if self.place is not None and self.req_type != "air_pollution":
+            query, error_hint = f"id={self.place.id}", None
+        elif self.city and self.req_type != "air_pollution":
+            if self.city and self.state and self.country:
+                query, error_hint = f"q={self.city},{self.state},{self.country}", None
+            elif self.city and self.country:
+                query, error_hint = f"q={self.city},{self.country}", None
             else:
-                raise AttributeError(
-                    "Not enough arguments provided to provide weather information."
+                query, error_hint = (
+                    f"q={self.city}",
+                    "Check spelling or provide state and country code, or try zipcode and country.",
                 )
-
-        if str(self.data["cod"]) != "200":
-            raise ValueError(self.data["message"])
+        elif self.lat and self.lon:
+            if self.cache_system:
+                # Every point of a grid cell shares the response for the center of the cell.
+                cell = self._grid_cell(self.lat, self.lon)
+                query = f"lat={cell.lat}&lon={cell.lon}"
+            else:
+                query = f"lat={self.lat}&lon={self.lon}"
+            error_hint = "Please provide valid latitude and longitude value"
+        elif self.zip_code and self.country:
+            query = f"zip={self.zip_code},{self.country}"
+            error_hint = "Please provide valid zipcode and country code."
         else:
-            return self.data
+            raise AttributeError(
+                "Not enough arguments provided to provide weather information."
+            )
+        units = self.units if self._api_units() == normalize_units(self.units) else self._api_units()
+        url = f"{self.base_url}{self.req_type}?{query}&APPID={self.apikey}&units={units}"
+        return url.strip(), error_hint
+
+    def _http_get(self, url):
+        """
+        Send a GET request through the pooled session, within the request_deadline.
+
+        Connection errors, timeouts and server errors (HTTP 5xx) are retried up to max_retries times after a jittered
+        exponential back-off, each attempt being hedged when hedge_after is set (see _hedged_get()). The request fails
+        fast while the circuit breaker is open.
+
+        :param url: The url to request.
+        :type url: str
+        :return: The response.
+        :rtype: requests.Response
+        :raises CircuitOpenError: When the circuit breaker is open.
+        :raises DeadlineExceededError: When the request can not complete before the request_deadline.
+        :raises requests.exceptions.RequestException: When the last attempt fails.
+        """
+        breaker = self.circuit_breaker
+        if breaker is not None and not breaker.allow():
+            raise CircuitOpenError("OpenWeather is unavailable, requests are answered from the cache.")
+        deadline = None if self.request_deadline is None else time.monotonic() + self.request_deadline
+
+        attempt = 0
+        while True:
+            try:
+                response = self._hedged_get(url, deadline)
+                # Mocked sessions may not give a status code.
+                if isinstance(response.status_code, int) and response.status_code >= 500:
+                    raise RetryableStatusError(f"{response.status_code} Server Error for url: {self.base_url}",
+                                               response=response)
+            except DeadlineExceededError:
+                # Raised before the attempt was sent, e.g. waiting for the rate limiter: only the earlier attempts
+                # failed upstream.
+                if attempt and breaker is not None:
+                    breaker.record_failure()
+                raise
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout, RetryableStatusError) as e:
+                time.sleep(self._retry_delay(attempt, e, deadline))
+                attempt += 1
+                continue
+            except requests.exceptions.RequestException:
+                if breaker is not None:
+                    breaker.record_failure()
+                raise
+            if breaker is not None:
+                breaker.record_success()
+            return response
+
+    def _retry_delay(self, attempt, error, deadline):
+        """
+        Return the back-off before retrying a failed attempt, or raise the error when it is not retried: the retries
+        are exhausted, the next one would end past the deadline, or the error is a deadline or an open circuit.
+
+        :param attempt: Number of the failed attempt, 0 for the first one.
+        :type attempt: int
+        :param error: The error of the attempt.
+        :type error: requests.exceptions.RequestException
+        :param deadline: time.monotonic() time the request must complete by, None for no deadline.
+        :type deadline: float
+        :return: Seconds to wait before the next attempt.
+        :rtype: float
+        :raises requests.exceptions.RequestException: The error, or DeadlineExceededError, when it is not retried.
+        """
+        delay = backoff_delay(attempt, self.retry_backoff, _MAX_RETRY_BACKOFF)
+        retry = attempt < self.max_retries and not isinstance(error, (DeadlineExceededError, CircuitOpenError))
+        if retry and deadline is not None and time.monotonic() + delay >= deadline:
+            retry, error = False, DeadlineExceededError("Request deadline exceeded before the next retry.")
+        if not retry:
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.record_failure()
+            raise error
+        return delay
+
+    def _hedged_get(self, url, deadline):
+        """
+        Send one attempt of a GET request. With hedge_after set, a second identical request is sent when the first
+        one has not answered in time and a call slot is free right away, and the first response wins. The late
+        request completes in the background and its response is dropped.
+
+        :param url: The url to request.
+        :type url: str
+        :param deadline: time.monotonic() time the attempt must complete by, None for no deadline.
+        :type deadline: float
+        :return: The first response.
+        :rtype: requests.Response
+        """
+        delay = self._hedge_delay()
+        if delay is None:
+            return self._send(url, deadline)
+
+        executor = _get_hedge_executor()
+        futures = [executor.submit(self._send, url, deadline)]
+        done, _ = wait(futures, timeout=delay)
+        if not done and (self.rate_limiter is None or self.rate_limiter.acquire(self.request_priority, timeout=0)):
+            futures.append(executor.submit(self._send, url, deadline, True))
+        error = None
+        for future in as_completed(futures):
+            try:
+                return future.result()
+            except requests.exceptions.RequestException as e:
+                error = e
+        raise error
+
+    def _hedge_delay(self):
+        """
+        Return the seconds after which a request is hedged, None when it is not: hedge_after is not set or there are
+        not enough response times yet for its percentile.
+        """
+        if isinstance(self.hedge_after, str):
+            return _latencies.percentile(float(self.hedge_after[1:]))
+        return self.hedge_after
+
+    def _send(self, url, deadline, admitted=False):
+        """
+        Send a GET request once the rate limiter admits it, with the connect and read timeouts cut to the deadline.
+
+        :param url: The url to request.
+        :type url: str
+        :param deadline: time.monotonic() time the request must complete by, None for no deadline.
+        :type deadline: float
+        :param admitted: The rate limiter already admitted the request, default is False.
+        :type admitted: bool
+        :return: The response.
+        :rtype: requests.Response
+        :raises DeadlineExceededError: When the deadline passes before the request is sent.
+        """
+        connect_timeout, read_timeout, remaining = self.connect_timeout, self.read_timeout, None
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise DeadlineExceededError("Request deadline exceeded.")
+        if not admitted and not self._acquire_rate_limit(remaining):
+            raise DeadlineExceededError("Request deadline exceeded waiting for the rate limiter.")
+        if deadline is not None:
+            remaining = max(deadline - time.monotonic(), 0.001)
+            connect_timeout, read_timeout = min(connect_timeout, remaining), min(read_timeout, remaining)
+
+        with start_span("weathermap.http", {"req_type": self.req_type}) as span:
+            start = time.monotonic()
+            try:
+                response = self.session.get(url, timeout=(connect_timeout, read_timeout))
+            except requests.exceptions.RequestException:
+                UPSTREAM_REQUESTS.inc(req_type=self.req_type, status="error")
+                raise
+            latency = time.monotonic() - start
+            _latencies.record(latency)
+            HTTP_SECONDS.observe(latency, req_type=self.req_type)
+            UPSTREAM_REQUESTS.inc(req_type=self.req_type, status=response.status_code)
+            if span.is_recording():
+                span.set_attribute("status", response.status_code)
+                # Only set when the server tells it, tracers may reject attributes without a value.
+                content_length = response.headers.get("Content-Length")
+                if content_length is not None:
+                    span.set_attribute("bytes", content_length)
+            self._record_rate_limit(response.status_code, response.headers)
+            return response
+
+    def _parse_response(self, response):
+        """
+        Decode the JSON body of an API response.
+
+        :param response: The response.
+        :type response: requests.Response
+        :return: The decoded response.
+        :rtype: dict
+        """
+        with start_span("weathermap.parse", {"req_type": self.req_type}):
+            start = time.perf_counter()
+            try:
+                return response.json()
+            finally:
+                PARSE_SECONDS.observe(time.perf_counter() - start, req_type=self.req_type)
+
+    def _acquire_rate_limit(self, timeout=None):
+        """
+        Wait for the rate limiter to admit an API request.
+
+        :param timeout: Longest wait in seconds, default is no limit.
+        :type timeout: float, optional
+        :return: False when the timeout expired first.
+        :rtype: bool
+        """
+        if self.rate_limiter is None:
+            return True
+        with start_span("weathermap.rate_limit", {"priority": self.request_priority}):
+            return self.rate_limiter.acquire(self.request_priority, timeout=timeout)
+
+    def _record_rate_limit(self, status_code, headers):
+        """
+        Report the status of an API response to the rate limiter: a rate limited response (HTTP 429) pauses the
+        requests of the process, for its Retry-After when given.
+
+        :param status_code: HTTP status of the response.
+        :type status_code: int
+        :param headers: Headers of the response.
+        :type headers: dict
+        """
+        if self.rate_limiter is None:
+            return
+        if status_code != 429:
+            self.rate_limiter.record_success()
+            return
+        try:
+            retry_after = float(headers.get("Retry-After"))
+        except (TypeError, ValueError):
+            retry_after = None
+        self.rate_limiter.penalize(retry_after)
+
+    @staticmethod
+    def _response_ok(data):
+        """
+        Return True when an API response is a success. Air pollution responses carry no "cod".
+        """
+        return str(data.get("cod", "200")) == "200"
+
+    def forecast_frame(self):
+        """
+        Get the forecast data as a ForecastFrame of NumPy columns. The frame is built once per forecast response.
+
+        :return: The frame of the current forecast data.
+        :rtype: ForecastFrame
+        :raises ValueError: When the current data is not a forecast.
+        """
+        frame = self.__dict__.get("_forecast_frame")
+        if frame is None or frame[0] is not self.data:
+            frame = (self.data, ForecastFrame.from_response(self.data))
+            self._forecast_frame = frame
+        return frame[1]
 
     def next_12h(self):
         """
@@ -443,7 +1300,7 @@ class Weather(WeatherCache, LocationTrack):
         req_type = "forecast"
         return self.api_request(req_type=req_type)
 
-    def _timeout_time_clean(self, timeout):
+    def _timeout_time_clean(self, timeout, req_type=None):
         """
         Clean and convert timeout string into a dictionary format.
 
@@ -454,6 +1311,8 @@ class Weather(WeatherCache, LocationTrack):
 
         :param timeout: The timeout string to be cleaned and converted.
         :type timeout: str
+        :param req_type: The request type the timeout belongs to, default is the current req_type.
+        :type req_type: str, optional
         :return: A dictionary containing cleaned timeout values for different request types.
         :rtype: dict
         :raises InvalidTimeoutFormatError: If the provided timeout string format is invalid.
@@ -461,7 +1320,7 @@ class Weather(WeatherCache, LocationTrack):
         """
         # Constants for timeout dictionary keys
         output = {
-            "req_type": self.req_type,
+            "req_type": req_type or self.req_type,
             "forecast_timeout": {"seconds": 0, "minutes": 0, "hours": 0, "days": 0},
             "weather_timeout": {"seconds": 0, "minutes": 0, "hours": 0, "days": 0},
             "air_pollution_timeout": {